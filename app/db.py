@@ -1,5 +1,10 @@
 from sqlalchemy import create_engine
+from sqlalchemy.pool import QueuePool
 from sqlalchemy.orm import sessionmaker, declarative_base # 👈 1. 여기 declarative_base 추가!
+from starlette.concurrency import run_in_threadpool
+from contextlib import asynccontextmanager
+from typing import Protocol
+from app.services.pool_metrics import instrumented_pool_class, watch_engine
 import os
 
 
@@ -13,18 +18,97 @@ db_name = os.getenv("DB_NAME")
 # 3. URL 조합하기
 SQLALCHEMY_DATABASE_URL = f"mysql+pymysql://{user}:{password}@{host}:{port}/{db_name}"
 
+# 🚀 커넥션 풀 설정 (SQLAlchemy 기본값: 5 / 10 / 30초 / 재활용 없음)
+# API 요청은 async 엔진, 백그라운드 작업은 동기 엔진을 쓰므로 두 엔진이 같은 설정으로 따로 풀을 가집니다.
+# MySQL wait_timeout(기본 8시간)보다 짧게 재활용해서 끊긴 커넥션을 pre_ping 전에 미리 걸러냅니다.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+
+POOL_OPTIONS = {
+    "pool_size": DB_POOL_SIZE,
+    "max_overflow": DB_MAX_OVERFLOW,
+    "pool_timeout": DB_POOL_TIMEOUT,
+    "pool_recycle": DB_POOL_RECYCLE,
+    "pool_pre_ping": True,  # 연결이 끊겼는지 확인 후 다시 연결하는 옵션
+}
+
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL,
-    pool_pre_ping=True  # 연결이 끊겼는지 확인 후 다시 연결하는 옵션
+    poolclass=instrumented_pool_class(QueuePool, "sync"),
+    **POOL_OPTIONS,
 )
+watch_engine("sync", engine)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
\ No newline at end of file
+# 4. 🚀 API 요청용 async 엔진 (aiomysql)
+# DB_ASYNC=0 이면 예전처럼 pymysql 동기 세션을 스레드풀에서 돌립니다. (비교/롤백용)
+# 어느 쪽이든 컨트롤러는 `await db.execute(...)` 로 같은 코드를 씁니다.
+# 백그라운드 작업(조회수 버퍼, 채팅 쓰기 큐, 마이그레이션)은 계속 위의 동기 엔진을 씁니다.
+DB_ASYNC = os.getenv("DB_ASYNC", "1").lower() in ("1", "true", "yes")
+ASYNC_DATABASE_URL = f"mysql+aiomysql://{user}:{password}@{host}:{port}/{db_name}"
+
+# sqlalchemy.ext.asyncio 는 greenlet 이 필요해서 DB_ASYNC=1 일 때만 불러옵니다. (DB_ASYNC=0 은 greenlet 없이도 동작)
+async_engine = None
+AsyncSessionLocal = None
+if DB_ASYNC:
+    from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+    from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+    async_engine = create_async_engine(
+        ASYNC_DATABASE_URL,
+        poolclass=instrumented_pool_class(AsyncAdaptedQueuePool, "async"),
+        **POOL_OPTIONS,
+    )
+    watch_engine("async", async_engine.sync_engine)
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+
+# 라우트에서 쓰는 세션 타입 (AsyncSession / SyncSessionAdapter 둘 다 이 모양을 따릅니다)
+class DBSession(Protocol):
+    async def execute(self, *args, **kwargs): ...
+
+    async def commit(self): ...
+
+    async def rollback(self): ...
+
+
+# 동기 Session 을 AsyncSession 과 같은 모양(await execute/commit/rollback)으로 감싸는 어댑터
+# pymysql 기본 커서는 결과를 execute 때 모두 받아 오므로 fetchall/fetchone 은 이벤트 루프에서 불러도 됩니다.
+class SyncSessionAdapter:
+    def __init__(self, session):
+        self.session = session
+
+    async def execute(self, *args, **kwargs):
+        return await run_in_threadpool(self.session.execute, *args, **kwargs)
+
+    async def commit(self):
+        await run_in_threadpool(self.session.commit)
+
+    async def rollback(self):
+        await run_in_threadpool(self.session.rollback)
+
+    async def close(self):
+        await run_in_threadpool(self.session.close)
+
+
+@asynccontextmanager
+async def db_session():
+    if DB_ASYNC:
+        async with AsyncSessionLocal() as session:
+            yield session
+    else:
+        session = SyncSessionAdapter(SessionLocal())
+        try:
+            yield session
+        finally:
+            await session.close()
+
+
+async def get_db():
+    async with db_session() as db:
+        yield db
\ No newline at end of file
@@ -1,50 +1,63 @@
-from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, APIRouter, Depends, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse, ORJSONResponse, PlainTextResponse
 from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
 from app.routers.routes import router
 from fastapi.staticfiles import StaticFiles
 import os
 import json
-from typing import Dict
-from datetime import datetime
-from app.db import SessionLocal
+import logging
+from app.db import db_session, async_engine
 from sqlalchemy import text
-from app.db import engine
-from app.models import model
-
-model.Base.metadata.create_all(bind=engine)
-
-app = FastAPI(root_path="/api")
-
-
-class ConnectionManager:
-    def __init__(self):
-        self.active_connections: Dict[int, list[WebSocket]] = {}
-
-    async def connect(self, room_id: int, websocket: WebSocket):
-        await websocket.accept()
-        if room_id not in self.active_connections:
-            self.active_connections[room_id] = []
-        self.active_connections[room_id].append(websocket)
-
-    def disconnect(self, room_id: int, websocket: WebSocket):
-        if room_id in self.active_connections:
-            if websocket in self.active_connections[room_id]:
-                self.active_connections[room_id].remove(websocket)
-            if not self.active_connections[room_id]:
-                del self.active_connections[room_id]
-
-    async def send_personal_message(self, message: str, websocket: WebSocket):
-        await websocket.send_text(message)
-
-    async def broadcast_to_local(self, room_id: int, message: str):
-        if room_id in self.active_connections:
-            for connection in self.active_connections[room_id]:
-                await connection.send_text(message)
-
-
-manager = ConnectionManager()
+from app.services.session_cache import session_cache, lookup_session_user_id
+from app.services.view_buffer import view_buffer
+from app.services.passwords import password_hasher
+from app.services.response_cache import response_cache
+from app.services.query_counter import QueryCountMiddleware
+from app.services.message_writer import message_writer
+from app.services.room_summary import advance_read_watermark
+from app.services.connections import manager
+from app.services.images import UploadSizeLimitMiddleware, IMAGE_DIR
+from app.services.image_variants import VariantStaticFiles, variant_generator, VARIANT_DIR_NAME
+from app.services.static_files import ImmutableStaticFiles
+from app.services.etags import bump_versions, chat_user_version_key
+from app.services.compression import CompressionMiddleware, compression_stats
+from app.services.metrics import MetricsMiddleware, render_metrics
+from app.services.internal_access import require_internal
+
+logger = logging.getLogger(__name__)
+
+# 테이블/인덱스 생성은 `python -m app.migrate` (배포 시 initContainer) 에서 한 번만 수행합니다.
+# 🚀 기본 응답을 orjson 으로 (목록 컨트롤러는 ORJSONResponse 를 직접 돌려 jsonable_encoder 도 건너뜀)
+app = FastAPI(root_path="/api", default_response_class=ORJSONResponse)
+
+
+@app.on_event("startup")
+def start_background_workers():
+    view_buffer.start()
+
+
+@app.on_event("shutdown")
+def stop_background_workers():
+    # 버퍼에 남아 있는 조회 기록을 종료 전에 반영합니다.
+    view_buffer.stop()
+    password_hasher.shutdown()
+    variant_generator.shutdown()
+
+
+@app.on_event("startup")
+async def start_chat_workers():
+    await manager.start()
+    await message_writer.start()
+
+
+@app.on_event("shutdown")
+async def stop_chat_workers():
+    # 쓰기 큐에 남은 메시지를 먼저 저장한 뒤 broadcast 를 내립니다.
+    await message_writer.stop()
+    await manager.stop()
+    if async_engine is not None:
+        await async_engine.dispose()
 
 # --- CORS 설정 ---
 origins = [
@@ -64,15 +77,43 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# 🚀 JSON 응답 압축 (br/gzip 협상, 작은 응답/이미지는 건너뜀)
+app.add_middleware(CompressionMiddleware)
+# 라우트 템플릿별 지연시간/상태코드/SQL 수/DB 시간 (GET /metrics, QueryCountMiddleware 안쪽이어야 함)
+app.add_middleware(MetricsMiddleware)
+# 요청마다 SQL 실행 수를 세는 카운터 (app/services/query_counter.py)
+app.add_middleware(QueryCountMiddleware)
+# 🚀 용량 초과 업로드는 폼 파싱 중에 바로 413 으로 끊습니다.
+app.add_middleware(UploadSizeLimitMiddleware)
 app.include_router(router)
 
 
 # --- WebSocket Endpoint ---
+async def authorize_websocket(token: str, room_id: int):
+    # 인증/참여 권한 확인이 끝나면 DB 세션은 바로 돌려줍니다. (소켓이 살아 있는 동안 들고 있지 않음)
+    async with db_session() as db:
+        sender_id = await lookup_session_user_id(token, db)
+        if sender_id is None:
+            return None
+
+        sql_check = text("SELECT id FROM chat_participants WHERE room_id = :room_id AND user_id = :user_id")
+        if not (await db.execute(sql_check, {"room_id": room_id, "user_id": sender_id})).fetchone():
+            return None
+        return sender_id
+
+
+async def mark_messages_read(room_id: int, user_id: int, message_id: int):
+    # 실제로 올라간 워터마크(방의 마지막 메시지로 잘린 값) 또는 None
+    async with db_session() as db:
+        watermark = await advance_read_watermark(db, room_id, user_id, message_id)
+        await db.commit()
+    if watermark:
+        bump_versions(chat_user_version_key(user_id))
+    return watermark
+
+
 @app.websocket("/ws/{room_id}")
 async def websocket_endpoint(websocket: WebSocket, room_id: int):
-    db = SessionLocal()
-    sender_id = None
-
     try:
         # 1. 쿠키에서 세션 토큰 가져오기
         token = websocket.cookies.get("session_id")
@@ -81,18 +122,10 @@ async def websocket_endpoint(websocket: WebSocket, room_id: int):
             await websocket.close(code=1008)
             return
 
-        sql = text("SELECT data FROM sessions WHERE session_id = :session_id")
-        result = db.execute(sql, {"session_id": token}).fetchone()
-
-        if not result:
-            await websocket.close(code=1008)
-            return
-
-        sender_id = int(result.data)
+        # 2. 세션/참여 권한 확인
+        sender_id = await authorize_websocket(token, room_id)
 
-        # 2. 참여 권한 확인
-        sql_check = text("SELECT id FROM chat_participants WHERE room_id = :room_id AND user_id = :user_id")
-        if not db.execute(sql_check, {"room_id": room_id, "user_id": sender_id}).fetchone():
+        if sender_id is None:
             await websocket.close(code=1008)
             return
 
@@ -103,33 +136,57 @@ async def websocket_endpoint(websocket: WebSocket, room_id: int):
         while True:
             data = await websocket.receive_text()
             message_data = json.loads(data)
+
+            # 읽음 이벤트: {"type": "read", "message_id": N} -> 내 워터마크를 올리고 상대에게 알립니다.
+            if message_data.get("type") == "read":
+                message_id = message_data.get("message_id")
+                if not isinstance(message_id, int) or isinstance(message_id, bool) or message_id <= 0:
+                    continue
+                try:
+                    watermark = await mark_messages_read(room_id, sender_id, message_id)
+                except Exception:
+                    # 잘못된 프레임 하나나 일시적인 DB 오류로 소켓 전체가 끊기지 않게 합니다.
+                    logger.warning("읽음 처리 실패 (room=%s, user=%s)", room_id, sender_id, exc_info=True)
+                    await manager.send_personal_message(
+                        json.dumps({"type": "error", "message": "읽음 처리에 실패했습니다."}), websocket)
+                    continue
+                if watermark:
+                    await manager.publish(room_id, json.dumps({
+                        "type": "read",
+                        "room_id": room_id,
+                        "user_id": sender_id,
+                        "last_read_message_id": watermark
+                    }))
+                continue
+
             content = message_data.get("content")
 
             if content:
-                insert_sql = text("""
-                    INSERT INTO messages (room_id, sender_id, content, created_at, is_read)
-                    VALUES (:room_id, :sender_id, :content, NOW(), 0)
-                """)
-                db.execute(insert_sql, {
-                    "room_id": room_id,
-                    "sender_id": sender_id,
-                    "content": content
-                })
-                db.commit()
+                # 🚀 이벤트 루프를 막지 않도록 쓰기 큐에 넣고, 묶음 커밋이 끝나면 id/시각을 받습니다.
+                try:
+                    saved = await message_writer.write(room_id, sender_id, content)
+                except Exception:
+                    await manager.send_personal_message(
+                        json.dumps({"type": "error", "message": "메시지 저장에 실패했습니다."}), websocket)
+                    continue
 
                 response_message = {
+                    "type": "message",
+                    "id": saved["id"],
                     "room_id": room_id,
                     "sender_id": sender_id,
                     "content": content,
-                    "created_at": datetime.now().isoformat()
+                    "created_at": saved["created_at"].isoformat()
                 }
 
-                await manager.broadcast_to_local(room_id, json.dumps(response_message))
+                # 다른 파드에 붙은 상대방에게도 가도록 broadcast 백엔드(pub/sub)로 보냅니다.
+                await manager.publish(room_id, json.dumps(response_message))
 
     except WebSocketDisconnect:
-        manager.disconnect(room_id, websocket)
+        pass
     finally:
-        db.close()
+        # 정상 종료든 전송 실패든 소켓과 writer 태스크를 정리합니다.
+        manager.disconnect(room_id, websocket)
 
 
 @app.exception_handler(RequestValidationError)
@@ -138,10 +195,72 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
                         content={"code": "INVALID_INPUT", "message": "입력값이 잘못되었습니다.", "detail": exc.errors()})
 
 
-os.makedirs("static/images", exist_ok=True)
+os.makedirs(f"{IMAGE_DIR}/{VARIANT_DIR_NAME}", exist_ok=True)
+# 🚀 아직 없는 변형 이미지는 첫 요청 때 원본에서 만들어 줍니다. (/static 보다 먼저 등록해야 잡힙니다)
+app.mount(f"/static/images/{VARIANT_DIR_NAME}",
+          VariantStaticFiles(source_dir=IMAGE_DIR, directory=f"{IMAGE_DIR}/{VARIANT_DIR_NAME}"),
+          name="image_variants")
+# 🚀 업로드 이미지는 URL 이 바뀌지 않으므로 immutable 캐시 + 강한 ETag/304 로 내려줍니다.
+app.mount("/static/images", ImmutableStaticFiles(directory=IMAGE_DIR), name="images")
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
 
 @app.get("/")
 def read_root():
-    return {"message": "Community Backend Server is Running!"}
\ No newline at end of file
+    return {"message": "Community Backend Server is Running!"}
+
+
+# 🚀 운영용 엔드포인트는 전부 이 라우터에 모아 한 곳(app/services/internal_access.py)에서 막습니다.
+# 기본은 꺼져 있음(404) -> INTERNAL_ENDPOINTS_ENABLED=1 + INTERNAL_ALLOWED_NETWORKS 로 내부에서만 엽니다.
+internal = APIRouter(dependencies=[Depends(require_internal)], include_in_schema=False)
+
+
+# 세션 캐시가 제대로 먹히는지 확인용 (hit/miss 카운터)
+@internal.get("/stats/session-cache")
+def session_cache_stats():
+    return session_cache.stats()
+
+
+@internal.get("/stats/view-buffer")
+def view_buffer_stats():
+    return view_buffer.stats()
+
+
+@internal.get("/stats/image-variants")
+def image_variants_stats():
+    return variant_generator.stats()
+
+
+@internal.get("/stats/response-cache")
+def response_cache_stats():
+    return response_cache.stats()
+
+
+@internal.get("/stats/websocket")
+def websocket_stats():
+    return manager.stats()
+
+
+@internal.get("/stats/message-writer")
+def message_writer_stats():
+    return message_writer.stats()
+
+
+@internal.get("/stats/passwords")
+def password_hasher_stats():
+    return password_hasher.stats()
+
+
+# 압축 전/후 바이트 수와 압축에 쓴 CPU 시간
+@internal.get("/stats/compression")
+def compression_stats_view():
+    return compression_stats.as_dict()
+
+
+# Prometheus 스크레이프용 (라우트별 지연시간 히스토그램, 상태코드, SQL 수/DB 시간, 커넥션 풀 사용량/대기 시간)
+@internal.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+
+app.include_router(internal)
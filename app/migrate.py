@@ -0,0 +1,231 @@
+import argparse
+import sys
+
+from sqlalchemy import inspect, text
+
+from app.db import engine
+from app.models import model
+from app.services import queries
+
+# 스키마 마이그레이션 (워커가 뜰 때마다 create_all 하던 것을 대체)
+#
+#   python -m app.migrate            # 밀린 마이그레이션 적용
+#   python -m app.migrate --status   # 적용된 버전 확인
+#   python -m app.migrate --explain  # 컨트롤러 쿼리가 인덱스를 타는지 EXPLAIN 으로 확인
+#
+# 마이그레이션은 버전 순서대로 한 번씩만 적용되고(schema_migrations 테이블에 기록),
+# 각 단계도 이미 적용된 상태에서 다시 돌려도 문제 없도록 작성합니다.
+
+MIGRATION_LOCK_NAME = "community_schema_migrations"
+
+
+def _index_exists(conn, table, index_name):
+    return any(ix["name"] == index_name for ix in inspect(conn).get_indexes(table))
+
+
+def _create_index(conn, table, index_name, dedupe_sql=None):
+    if _index_exists(conn, table, index_name):
+        return
+    # 유니크 인덱스를 걸기 전에 그동안 쌓인 중복 행을 먼저 정리합니다. (id 가 가장 작은 행만 남김)
+    if dedupe_sql:
+        conn.execute(text(dedupe_sql))
+    index = next(ix for ix in model.Base.metadata.tables[table].indexes if ix.name == index_name)
+    index.create(bind=conn)
+
+
+# --- 1. 기본 테이블 ---
+def create_base_tables(conn):
+    model.Base.metadata.create_all(bind=conn)
+
+
+# --- 2. 자주 조회하는 컬럼 인덱스 ---
+def add_hot_lookup_indexes(conn):
+    duplicate_emails = conn.execute(text(
+        "SELECT email FROM users GROUP BY email HAVING COUNT(*) > 1"
+    )).fetchall()
+    if duplicate_emails:
+        emails = ", ".join(row.email for row in duplicate_emails)
+        raise RuntimeError(f"users.email 중복이 있어 유니크 인덱스를 만들 수 없습니다: {emails}")
+    _create_index(conn, "users", "uq_users_email")
+
+    _create_index(conn, "likes", "uq_likes_user_id_post_id", """
+        DELETE l1 FROM likes l1
+        JOIN likes l2 ON l1.user_id = l2.user_id AND l1.post_id = l2.post_id AND l1.id > l2.id
+    """)
+    # 중복 좋아요를 지웠으니 반정규화된 likes_count 도 실제 행 수에 맞춰 둡니다.
+    conn.execute(text("""
+        UPDATE posts p
+        SET likes_count = (SELECT COUNT(*) FROM likes l WHERE l.post_id = p.id)
+    """))
+
+    _create_index(conn, "views", "uq_views_user_id_post_id", """
+        DELETE v1 FROM views v1
+        JOIN views v2 ON v1.user_id = v2.user_id AND v1.post_id = v2.post_id AND v1.id > v2.id
+    """)
+    _create_index(conn, "chat_participants", "uq_chat_participants_room_id_user_id", """
+        DELETE c1 FROM chat_participants c1
+        JOIN chat_participants c2 ON c1.room_id = c2.room_id AND c1.user_id = c2.user_id AND c1.id > c2.id
+    """)
+    _create_index(conn, "chat_participants", "ix_chat_participants_user_id_room_id")
+    _create_index(conn, "comments", "ix_comments_post_id_deleted_at")
+    _create_index(conn, "messages", "ix_messages_room_id_created_at")
+
+
+# --- 3. 채팅 메시지 커서 페이지네이션 ---
+def add_message_cursor_index(conn):
+    _create_index(conn, "messages", "ix_messages_room_id_id")
+
+
+# --- 4. 채팅 목록용 room_summary ---
+def create_room_summary(conn):
+    model.Base.metadata.tables["room_summary"].create(bind=conn, checkfirst=True)
+    # 기존 방/메시지로 요약을 채웁니다. 이미 있는 행은 건드리지 않습니다.
+    # (안 읽은 수는 5번에서 워터마크 기반으로 바뀌었으므로 여기서는 채우지 않습니다.)
+    conn.execute(text("""
+        INSERT IGNORE INTO room_summary
+            (room_id, user_id, last_message_id, last_message_at, last_message_preview)
+        SELECT cp.room_id,
+               cp.user_id,
+               lm.id,
+               lm.created_at,
+               LEFT(lm.content, 100)
+        FROM chat_participants cp
+        LEFT JOIN messages lm ON lm.id = (SELECT MAX(id) FROM messages WHERE room_id = cp.room_id)
+    """))
+
+
+# --- 5. 메시지별 is_read -> 참여자별 읽음 워터마크 ---
+def _column_exists(conn, table, column_name):
+    return any(col["name"] == column_name for col in inspect(conn).get_columns(table))
+
+
+def add_read_watermarks(conn):
+    if not _column_exists(conn, "chat_participants", "last_read_message_id"):
+        conn.execute(text(
+            "ALTER TABLE chat_participants ADD COLUMN last_read_message_id INT NOT NULL DEFAULT 0"
+        ))
+        # 기존 is_read 데이터 이관: 안 읽은 메시지가 있으면 그 중 가장 오래된 것 바로 앞까지,
+        # 없으면 방의 마지막 메시지까지 읽은 것으로 봅니다.
+        conn.execute(text("""
+            UPDATE chat_participants cp
+            SET last_read_message_id = COALESCE(
+                (SELECT MIN(m.id) - 1 FROM messages m
+                 WHERE m.room_id = cp.room_id AND m.sender_id != cp.user_id AND m.is_read = 0),
+                (SELECT MAX(m.id) FROM messages m WHERE m.room_id = cp.room_id),
+                0)
+        """))
+    # 안 읽은 수는 이제 워터마크로 계산하므로 room_summary 의 카운터는 없앱니다.
+    if _column_exists(conn, "room_summary", "unread_count"):
+        conn.execute(text("ALTER TABLE room_summary DROP COLUMN unread_count"))
+
+
+# (버전, 이름, 함수) - 새 마이그레이션은 항상 맨 뒤에 추가합니다.
+MIGRATIONS = [
+    (1, "create base tables", create_base_tables),
+    (2, "add hot lookup indexes", add_hot_lookup_indexes),
+    (3, "add message cursor index", add_message_cursor_index),
+    (4, "create room_summary", create_room_summary),
+    (5, "add chat read watermarks", add_read_watermarks),
+]
+
+
+def _ensure_version_table(conn):
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INT PRIMARY KEY,
+            name VARCHAR(255) NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """))
+
+
+def applied_versions(conn):
+    _ensure_version_table(conn)
+    return {row.version for row in conn.execute(text("SELECT version FROM schema_migrations")).fetchall()}
+
+
+def upgrade():
+    with engine.connect() as conn:
+        # 여러 파드가 동시에 initContainer 를 돌려도 한 곳에서만 적용되도록 잠급니다.
+        if engine.dialect.name == "mysql":
+            conn.execute(text("SELECT GET_LOCK(:name, 600)"), {"name": MIGRATION_LOCK_NAME})
+        try:
+            done = applied_versions(conn)
+            conn.commit()
+            for version, name, migrate in MIGRATIONS:
+                if version in done:
+                    continue
+                print(f"[migrate] {version:04d} {name} ...")
+                migrate(conn)
+                conn.execute(text("INSERT INTO schema_migrations (version, name) VALUES (:v, :n)"),
+                             {"v": version, "n": name})
+                conn.commit()
+            print("[migrate] 최신 상태입니다.")
+        finally:
+            if engine.dialect.name == "mysql":
+                conn.execute(text("SELECT RELEASE_LOCK(:name)"), {"name": MIGRATION_LOCK_NAME})
+
+
+def status():
+    with engine.connect() as conn:
+        done = applied_versions(conn)
+        conn.commit()
+    for version, name, _ in MIGRATIONS:
+        mark = "x" if version in done else " "
+        print(f"[{mark}] {version:04d} {name}")
+
+
+# --- EXPLAIN 확인용 쿼리 ---
+# 컨트롤러가 실행하는 문자열(app/services/queries.py)을 그대로 씁니다. 값만 예시로 채웁니다.
+EXPLAIN_CHECKS = [
+    ("lookup_session_user_id", queries.SESSION_USER, {"session_id": "x"}),
+    ("login_controller", queries.LOGIN_USER, {"email": "x@x.x"}),
+    ("check_email_controller", queries.EMAIL_EXISTS, {"email": "x@x.x"}),
+    ("get_posts_list_controller (offset)", queries.POST_LIST_OFFSET, {"limit": 10, "offset": 0}),
+    ("get_posts_list_controller (before)", queries.POST_LIST_BEFORE, {"before_id": 1000, "limit": 10}),
+    ("get_posts_list_controller (after)", queries.POST_LIST_AFTER, {"after_id": 1000, "limit": 10}),
+    ("load_post_detail", queries.POST_DETAIL, {"pid": 1, "uid": 1}),
+    ("get_post_detail_controller (likes)", queries.LIKE_EXISTS, {"uid": 1, "pid": 1}),
+    ("like_post_controller", queries.LIKE_DELETE, {"uid": 1, "pid": 1}),
+    ("get_comments_controller", queries.COMMENT_LIST, {"pid": 1}),
+    ("initiate_chat_controller", queries.FIND_DIRECT_ROOM, {"user_id": 1, "recipient_id": 2}),
+    ("get_chat_list_controller (etag rooms)", queries.USER_ROOM_IDS, {"user_id": 1}),
+    ("get_chat_list_controller", queries.CHAT_LIST, {"user_id": 1}),
+    ("get_messages_controller (participant)", queries.ROOM_PARTICIPANTS, {"room_id": 1}),
+    ("get_messages_controller (latest)", queries.MESSAGES_LATEST, {"room_id": 1, "limit": 50}),
+    ("get_messages_controller (before)", queries.MESSAGES_BEFORE, {"room_id": 1, "before_id": 1000, "limit": 50}),
+]
+
+def explain():
+    failed = []
+    with engine.connect() as conn:
+        for name, sql, params in EXPLAIN_CHECKS:
+            rows = [dict(row._mapping) for row in conn.execute(text("EXPLAIN " + sql), params).fetchall()]
+            # type=ALL 이고 key 가 없으면 풀스캔입니다.
+            scans = [r for r in rows if r.get("table") and r.get("type") == "ALL" and not r.get("key")]
+            used = ", ".join(f"{r.get('table')}:{r.get('key')}" for r in rows if r.get("table"))
+            if scans:
+                failed.append(name)
+                print(f"[FULL SCAN] {name} -> {used}")
+            else:
+                print(f"[ok]        {name} -> {used}")
+    return failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="DB 스키마 마이그레이션")
+    parser.add_argument("--status", action="store_true", help="적용된 마이그레이션 목록 출력")
+    parser.add_argument("--explain", action="store_true", help="컨트롤러 쿼리의 인덱스 사용 여부 확인")
+    args = parser.parse_args(argv)
+
+    if args.status:
+        status()
+    elif args.explain:
+        if explain():
+            sys.exit(1)
+    else:
+        upgrade()
+
+
+if __name__ == "__main__":
+    main()
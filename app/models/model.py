@@ -1,10 +1,13 @@
-from sqlalchemy import Column, Integer, String, Text, TIMESTAMP
+from sqlalchemy import Column, Integer, String, Text, TIMESTAMP, Index
 from sqlalchemy.sql import func
 from app.db import Base
 
 
 class User(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        Index("uq_users_email", "email", unique=True),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     nickname = Column(String(10), nullable=False)
@@ -40,6 +43,9 @@ class Post(Base):
 
 class Comment(Base):
     __tablename__ = "comments"
+    __table_args__ = (
+        Index("ix_comments_post_id_deleted_at", "post_id", "deleted_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     post_id = Column(Integer, nullable=False)
@@ -52,6 +58,9 @@ class Comment(Base):
 
 class Likes(Base):
     __tablename__ = "likes"
+    __table_args__ = (
+        Index("uq_likes_user_id_post_id", "user_id", "post_id", unique=True),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, nullable=False)
@@ -63,6 +72,9 @@ class Likes(Base):
 
 class Views(Base):
     __tablename__ = "views"
+    __table_args__ = (
+        Index("uq_views_user_id_post_id", "user_id", "post_id", unique=True),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, nullable=False)
@@ -89,21 +101,48 @@ class ChatRoom(Base):
 
 class ChatParticipant(Base):
     __tablename__ = "chat_participants"
+    __table_args__ = (
+        Index("uq_chat_participants_room_id_user_id", "room_id", "user_id", unique=True),
+        # 채팅 목록/1:1 방 찾기는 user_id 로 먼저 들어옵니다.
+        Index("ix_chat_participants_user_id_room_id", "user_id", "room_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     room_id = Column(Integer, nullable=False)
     user_id = Column(Integer, nullable=False)
+    # 이 참여자가 읽은 마지막 메시지 id (이 값보다 큰 상대방 메시지 = 안 읽음)
+    last_read_message_id = Column(Integer, nullable=False, default=0, server_default="0")
 
 
 class Message(Base):
     __tablename__ = "messages"
+    __table_args__ = (
+        Index("ix_messages_room_id_created_at", "room_id", "created_at"),
+        # 커서 페이지네이션 (room_id = ? AND id < ? ORDER BY id DESC)
+        Index("ix_messages_room_id_id", "room_id", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     room_id = Column(Integer, nullable=False)
     sender_id = Column(Integer, nullable=False)
     content = Column(Text, nullable=False)
     created_at = Column(TIMESTAMP, server_default=func.now())
-    is_read = Column(Integer, default=0)
+    is_read = Column(Integer, default=0)  # 더 이상 갱신하지 않음 (chat_participants.last_read_message_id 사용)
+
+
+
+# 채팅 목록용 방 요약 (참여자별 한 줄)
+class RoomSummary(Base):
+    __tablename__ = "room_summary"
+    __table_args__ = (
+        Index("ix_room_summary_user_id_last_message_at", "user_id", "last_message_at"),
+    )
+
+    room_id = Column(Integer, primary_key=True, autoincrement=False)
+    user_id = Column(Integer, primary_key=True, autoincrement=False)
+    last_message_id = Column(Integer, nullable=True)
+    last_message_at = Column(TIMESTAMP, nullable=True)
+    last_message_preview = Column(String(255), nullable=True)
 
 class TrainReservation(Base):
     __tablename__ = "train_reservations"
@@ -0,0 +1,149 @@
+import asyncio
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+BROADCAST_BACKEND = os.getenv("BROADCAST_BACKEND", "memory")  # memory | redis
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+BROADCAST_CHANNEL_PREFIX = os.getenv("BROADCAST_CHANNEL_PREFIX", "community:chat:room:")
+# 방과 상관없이 모든 노드가 받는 제어 채널 (세션/캐시 무효화 등)
+BROADCAST_CONTROL_CHANNEL = os.getenv("BROADCAST_CONTROL_CHANNEL", "community:control")
+
+
+# 채팅 메시지를 모든 노드(파드/워커)로 퍼뜨리는 백엔드
+# - publish 한 메시지는 그 방을 subscribe 한 모든 노드의 on_message(room_id, message) 로 들어옵니다.
+# - 각 노드는 로컬 소켓이 있는 방만 subscribe 합니다. (ConnectionManager 가 관리)
+# - publish_control 한 메시지는 모든 노드의 on_control(message) 로 들어옵니다.
+class BroadcastBackend:
+    async def start(self, on_message, on_control=None):
+        raise NotImplementedError
+
+    async def stop(self):
+        raise NotImplementedError
+
+    async def subscribe(self, room_id: int):
+        raise NotImplementedError
+
+    async def unsubscribe(self, room_id: int):
+        raise NotImplementedError
+
+    async def publish(self, room_id: int, message: str):
+        raise NotImplementedError
+
+    async def publish_control(self, message: str):
+        raise NotImplementedError
+
+
+# 같은 프로세스 안의 메모리 백엔드들을 잇는 브로커
+# 기본은 백엔드마다 따로 하나씩이고, 테스트에서는 하나를 나눠 써서 노드 여러 개를 흉내냅니다.
+class MemoryBroker:
+    def __init__(self):
+        self.backends: list = []
+
+
+# 단일 프로세스용 (replicas: 1, 워커 1개일 때 / 로컬 개발)
+class MemoryBroadcastBackend(BroadcastBackend):
+    def __init__(self, broker: MemoryBroker = None):
+        self.broker = broker or MemoryBroker()
+        self.broker.backends.append(self)
+        self._on_message = None
+        self._on_control = None
+        self._rooms: set[int] = set()
+
+    async def start(self, on_message, on_control=None):
+        self._on_message = on_message
+        self._on_control = on_control
+
+    async def stop(self):
+        self._rooms.clear()
+        self._on_message = None
+        self._on_control = None
+
+    async def subscribe(self, room_id: int):
+        self._rooms.add(room_id)
+
+    async def unsubscribe(self, room_id: int):
+        self._rooms.discard(room_id)
+
+    async def publish(self, room_id: int, message: str):
+        for backend in list(self.broker.backends):
+            if room_id in backend._rooms and backend._on_message:
+                await backend._on_message(room_id, message)
+
+    async def publish_control(self, message: str):
+        for backend in list(self.broker.backends):
+            if backend._on_control:
+                await backend._on_control(message)
+
+
+# Redis pub/sub (방마다 채널 하나)
+class RedisBroadcastBackend(BroadcastBackend):
+    def __init__(self, url: str = REDIS_URL, prefix: str = BROADCAST_CHANNEL_PREFIX,
+                 control_channel: str = BROADCAST_CONTROL_CHANNEL):
+        import redis.asyncio as redis
+
+        self.client = redis.Redis.from_url(url)
+        self.pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        self.prefix = prefix
+        self.control_channel = control_channel
+        self._on_message = None
+        self._on_control = None
+        self._listener = None
+
+    def _channel(self, room_id: int) -> str:
+        return f"{self.prefix}{room_id}"
+
+    async def start(self, on_message, on_control=None):
+        self._on_message = on_message
+        self._on_control = on_control
+        if on_control:
+            await self.pubsub.subscribe(self.control_channel)
+        self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        if self._listener:
+            self._listener.cancel()
+            self._listener = None
+        await self.pubsub.close()
+        await self.client.close()
+
+    async def subscribe(self, room_id: int):
+        await self.pubsub.subscribe(self._channel(room_id))
+
+    async def unsubscribe(self, room_id: int):
+        await self.pubsub.unsubscribe(self._channel(room_id))
+
+    async def publish(self, room_id: int, message: str):
+        await self.client.publish(self._channel(room_id), message)
+
+    async def publish_control(self, message: str):
+        await self.client.publish(self.control_channel, message)
+
+    async def _listen(self):
+        while True:
+            try:
+                if not self.pubsub.subscribed:
+                    await asyncio.sleep(0.1)
+                    continue
+                item = await self.pubsub.get_message(timeout=1.0)
+                if not item or item.get("type") != "message":
+                    continue
+                channel = item["channel"].decode() if isinstance(item["channel"], bytes) else item["channel"]
+                data = item["data"].decode() if isinstance(item["data"], bytes) else item["data"]
+                if channel == self.control_channel:
+                    if self._on_control:
+                        await self._on_control(data)
+                    continue
+                await self._on_message(int(channel[len(self.prefix):]), data)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.warning("redis pub/sub 수신 실패, 재시도합니다.", exc_info=True)
+                await asyncio.sleep(1)
+
+
+def create_broadcast_backend(name: str = BROADCAST_BACKEND) -> BroadcastBackend:
+    if name == "redis":
+        return RedisBroadcastBackend()
+    return MemoryBroadcastBackend()
@@ -0,0 +1,181 @@
+import os
+import time
+import zlib
+
+from starlette.datastructures import Headers, MutableHeaders
+
+from app.services.static_files import accepted_encodings
+
+try:
+    import brotli
+except ImportError:  # brotli 가 없으면 gzip 만 씁니다.
+    brotli = None
+
+# 응답 압축 미들웨어 (br > gzip)
+# 게시글 목록/채팅 내역 같은 JSON 은 반복이 많아 크게 줄어듭니다.
+# - COMPRESSION_MIN_SIZE 보다 작은 응답은 압축 비용이 더 크므로 그대로 보냅니다.
+# - 이미지처럼 이미 압축된 형식, Content-Encoding 이 이미 붙은 응답(미리 압축된 정적 파일), Range 응답은 건너뜁니다.
+# - 스트리밍 응답은 청크마다 이어서 압축합니다.
+
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "500"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+# JSON API 는 매 요청마다 압축하므로 기본 품질을 낮게 둡니다. (11 은 정적 파일 미리 압축용)
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "4"))
+
+SKIP_CONTENT_TYPES = (
+    "image/", "video/", "audio/", "font/woff", "font/woff2",
+    "application/zip", "application/gzip", "application/x-gzip", "application/octet-stream",
+    "text/event-stream",
+)
+
+
+class _GzipEncoder:
+    name = "gzip"
+
+    def __init__(self, level: int):
+        # wbits=31 → gzip 헤더/트레일러 포함
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush()
+
+
+class _BrotliEncoder:
+    name = "br"
+
+    def __init__(self, quality: int):
+        self._compressor = brotli.Compressor(quality=quality, mode=brotli.MODE_TEXT)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.finish()
+
+
+# 미들웨어 인스턴스는 Starlette 가 만들기 때문에 /stats 에서 볼 수 있게 카운터는 모듈 싱글톤에 둡니다.
+# bytes_in/bytes_out/cpu_seconds 가 곧 실제 트래픽 기준 압축 효과와 비용입니다.
+class CompressionStats:
+    def __init__(self):
+        self.compressed_responses = 0
+        self.skipped_responses = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.cpu_seconds = 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "brotli_available": brotli is not None,
+            "minimum_size": COMPRESSION_MIN_SIZE,
+            "gzip_level": GZIP_LEVEL,
+            "brotli_quality": BROTLI_QUALITY,
+            "compressed_responses": self.compressed_responses,
+            "skipped_responses": self.skipped_responses,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "ratio": round(self.bytes_out / self.bytes_in, 4) if self.bytes_in else 0.0,
+            "cpu_seconds": round(self.cpu_seconds, 4),
+        }
+
+
+compression_stats = CompressionStats()
+
+
+class CompressionMiddleware:
+    def __init__(self, app, minimum_size: int = COMPRESSION_MIN_SIZE, gzip_level: int = GZIP_LEVEL,
+                 brotli_quality: int = BROTLI_QUALITY):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.stats = compression_stats
+
+    def _choose_encoder(self, scope):
+        accepted = accepted_encodings(Headers(scope=scope))
+        if brotli is not None and "br" in accepted:
+            return _BrotliEncoder(self.brotli_quality)
+        if "gzip" in accepted:
+            return _GzipEncoder(self.gzip_level)
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoder = self._choose_encoder(scope)
+        if encoder is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        passthrough = False
+        streaming = False
+
+        async def compressing_send(message):
+            nonlocal start_message, passthrough, streaming
+
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                content_type = headers.get("content-type", "")
+                if (message["status"] in (204, 206, 304) or "content-encoding" in headers
+                        or content_type.startswith(SKIP_CONTENT_TYPES)):
+                    passthrough = True
+                    self.stats.skipped_responses += 1
+                    await send(message)
+                else:
+                    # 본문 첫 조각을 보고 압축 여부를 정하므로 시작 메시지는 잠시 들고 있습니다.
+                    start_message = message
+                return
+
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if not streaming:
+                if not more_body and len(body) < self.minimum_size:
+                    # 작은 응답은 그대로
+                    passthrough = True
+                    self.stats.skipped_responses += 1
+                    await send(start_message)
+                    await send(message)
+                    return
+
+                headers = MutableHeaders(raw=start_message["headers"])
+                headers["Content-Encoding"] = encoder.name
+                headers.add_vary_header("Accept-Encoding")
+                if "content-length" in headers:
+                    del headers["content-length"]
+
+                if not more_body:
+                    compressed = self._encode(encoder, body, finish=True)
+                    headers["Content-Length"] = str(len(compressed))
+                    self.stats.compressed_responses += 1
+                    await send(start_message)
+                    await send({"type": "http.response.body", "body": compressed})
+                    return
+
+                streaming = True
+                self.stats.compressed_responses += 1
+                await send(start_message)
+
+            await send({"type": "http.response.body", "body": self._encode(encoder, body, finish=not more_body),
+                        "more_body": more_body})
+
+        await self.app(scope, receive, compressing_send)
+
+    def _encode(self, encoder, body: bytes, finish: bool) -> bytes:
+        # 압축은 이벤트 루프 스레드에서 돌므로 이 스레드의 CPU 시간만 잽니다.
+        started = time.thread_time()
+        compressed = encoder.compress(body)
+        if finish:
+            compressed += encoder.flush()
+        self.stats.cpu_seconds += time.thread_time() - started
+        self.stats.bytes_in += len(body)
+        self.stats.bytes_out += len(compressed)
+        return compressed
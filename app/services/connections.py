@@ -0,0 +1,252 @@
+import asyncio
+import json
+import logging
+import os
+from collections import OrderedDict
+from typing import Dict
+
+from fastapi import WebSocket
+
+from app.services.broadcast import BroadcastBackend, create_broadcast_backend
+
+logger = logging.getLogger(__name__)
+
+WS_SEND_QUEUE_SIZE = int(os.getenv("WS_SEND_QUEUE_SIZE", "100"))
+# 큐가 가득 찬(느린) 클라이언트 처리 방식: drop_oldest | drop_newest | disconnect
+WS_SLOW_CONSUMER_POLICY = os.getenv("WS_SLOW_CONSUMER_POLICY", "drop_oldest")
+WS_SEND_TIMEOUT = float(os.getenv("WS_SEND_TIMEOUT", "10"))
+# pub/sub 로 같은 메시지가 두 번 들어와도 한 번만 내보내기 위해 기억해 두는 메시지 id 수
+WS_DEDUP_SIZE = int(os.getenv("WS_DEDUP_SIZE", "10000"))
+
+# 1013 = Try Again Later (너무 느려서 서버가 끊음)
+SLOW_CONSUMER_CLOSE_CODE = 1013
+
+
+# 소켓 하나 = 전용 송신 큐 + writer 태스크
+# 브로드캐스트는 큐에 넣기만 하고, 실제 send_text 는 소켓마다 따로 돌기 때문에
+# 느린 클라이언트 하나가 같은 방의 다른 사람 전송을 막지 않습니다.
+class LocalConnection:
+    def __init__(self, room_id: int, websocket: WebSocket, queue_size: int):
+        self.room_id = room_id
+        self.websocket = websocket
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.writer_task = None
+        self.closed = False
+
+    async def close(self, code: int):
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            await self.websocket.close(code=code)
+        except Exception:
+            pass
+
+
+# active_connections 는 이 프로세스의 소켓만 들고 있고, 다른 노드와는 broadcast 백엔드로 주고받습니다.
+class ConnectionManager:
+    def __init__(self, backend: BroadcastBackend = None, queue_size: int = WS_SEND_QUEUE_SIZE,
+                 policy: str = WS_SLOW_CONSUMER_POLICY, send_timeout: float = WS_SEND_TIMEOUT,
+                 dedup_size: int = WS_DEDUP_SIZE):
+        self.active_connections: Dict[int, list[LocalConnection]] = {}
+        self.backend = backend or create_broadcast_backend()
+        self.queue_size = queue_size
+        self.policy = policy
+        self.send_timeout = send_timeout
+        self.dedup_size = dedup_size
+        self._seen_messages: "OrderedDict[tuple[int, int], None]" = OrderedDict()
+        self._subscription_lock = asyncio.Lock()
+        self._control_handlers: dict = {}
+        self._pending_controls: set = set()
+        self._loop = None
+
+        self.sent_messages = 0
+        self.dropped_messages = 0
+        self.slow_disconnects = 0
+        self.send_errors = 0
+        self.published_messages = 0
+        self.publish_errors = 0
+        self.duplicate_messages = 0
+
+    async def start(self):
+        self._loop = asyncio.get_running_loop()
+        await self.backend.start(self.deliver, self._dispatch_control)
+
+    async def stop(self):
+        await self.backend.stop()
+
+    async def connect(self, room_id: int, websocket: WebSocket) -> LocalConnection:
+        await websocket.accept()
+        connection = LocalConnection(room_id, websocket, self.queue_size)
+        connection.writer_task = asyncio.create_task(self._writer(connection))
+        if room_id not in self.active_connections:
+            self.active_connections[room_id] = []
+            # 이 노드에 처음 생긴 방이면 구독을 시작합니다.
+            async with self._subscription_lock:
+                await self.backend.subscribe(room_id)
+        self.active_connections[room_id].append(connection)
+        return connection
+
+    async def _unsubscribe_if_empty(self, room_id: int):
+        async with self._subscription_lock:
+            # 그 사이에 같은 방에 다시 들어온 소켓이 있으면 구독을 유지합니다.
+            if room_id not in self.active_connections:
+                await self.backend.unsubscribe(room_id)
+
+    def _find(self, room_id: int, websocket: WebSocket):
+        for connection in self.active_connections.get(room_id, []):
+            if connection.websocket is websocket:
+                return connection
+        return None
+
+    def _remove(self, connection: LocalConnection):
+        connections = self.active_connections.get(connection.room_id)
+        if connections and connection in connections:
+            connections.remove(connection)
+            if not connections:
+                del self.active_connections[connection.room_id]
+                asyncio.create_task(self._unsubscribe_if_empty(connection.room_id))
+        if connection.writer_task and connection.writer_task is not asyncio.current_task():
+            connection.writer_task.cancel()
+
+    def disconnect(self, room_id: int, websocket: WebSocket):
+        connection = self._find(room_id, websocket)
+        if connection:
+            self._remove(connection)
+
+    async def _writer(self, connection: LocalConnection):
+        try:
+            while True:
+                message = await connection.queue.get()
+                await asyncio.wait_for(connection.websocket.send_text(message), self.send_timeout)
+                self.sent_messages += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # 전송 실패/타임아웃은 이 소켓만 정리하고 다른 소켓이나 보낸 사람의 수신 루프로 번지지 않게 합니다.
+            self.send_errors += 1
+            logger.info("websocket 전송 실패로 연결 종료 (room=%s)", connection.room_id, exc_info=True)
+            self._remove(connection)
+            await connection.close(SLOW_CONSUMER_CLOSE_CODE)
+
+    def _enqueue(self, connection: LocalConnection, message: str):
+        if connection.closed:
+            return
+        try:
+            connection.queue.put_nowait(message)
+            return
+        except asyncio.QueueFull:
+            pass
+
+        if self.policy == "disconnect":
+            self.slow_disconnects += 1
+            self.dropped_messages += connection.queue.qsize() + 1
+            self._remove(connection)
+            asyncio.create_task(connection.close(SLOW_CONSUMER_CLOSE_CODE))
+        elif self.policy == "drop_newest":
+            self.dropped_messages += 1
+        else:
+            # drop_oldest: 제일 오래된 메시지를 버리고 최신 메시지를 넣습니다.
+            connection.queue.get_nowait()
+            connection.queue.put_nowait(message)
+            self.dropped_messages += 1
+
+    async def send_personal_message(self, message: str, websocket: WebSocket):
+        for connections in self.active_connections.values():
+            for connection in connections:
+                if connection.websocket is websocket:
+                    self._enqueue(connection, message)
+                    return
+
+    async def broadcast_to_local(self, room_id: int, message: str):
+        # 큐에 넣기만 하므로 기다리지 않습니다.
+        for connection in list(self.active_connections.get(room_id, [])):
+            self._enqueue(connection, message)
+
+    async def publish(self, room_id: int, message: str):
+        # 모든 노드(자기 자신 포함)로 보냅니다. 백엔드가 죽었으면 최소한 이 노드의 소켓에는 전달합니다.
+        try:
+            await self.backend.publish(room_id, message)
+            self.published_messages += 1
+        except Exception:
+            self.publish_errors += 1
+            logger.warning("broadcast publish 실패, 로컬로만 전달합니다. (room=%s)", room_id, exc_info=True)
+            await self.deliver(room_id, message)
+
+    async def deliver(self, room_id: int, message: str):
+        # 백엔드에서 받은 메시지를 로컬 소켓으로. 메시지 id 기준으로 중복은 한 번만 보냅니다.
+        try:
+            message_id = json.loads(message).get("id")
+        except (ValueError, AttributeError):
+            message_id = None
+        if message_id is not None:
+            key = (room_id, message_id)
+            if key in self._seen_messages:
+                self.duplicate_messages += 1
+                return
+            self._seen_messages[key] = None
+            if len(self._seen_messages) > self.dedup_size:
+                self._seen_messages.popitem(last=False)
+        await self.broadcast_to_local(room_id, message)
+
+    # --- 제어 메시지 (모든 노드로 보내는 세션/캐시 무효화 등) ---
+    def add_control_handler(self, kind: str, handler):
+        # handler(payload: dict) 는 동기 함수. 보낸 노드 자신에게도 다시 들어오므로 여러 번 불려도 괜찮아야 합니다.
+        self._control_handlers[kind] = handler
+
+    async def publish_control(self, kind: str, **payload):
+        try:
+            await self.backend.publish_control(json.dumps({"kind": kind, **payload}))
+        except Exception:
+            self.publish_errors += 1
+            logger.warning("broadcast control publish 실패 (kind=%s)", kind, exc_info=True)
+
+    def publish_control_nowait(self, kind: str, **payload):
+        # 동기 코드(워커 스레드 포함)에서 부를 때. start() 전이면 이 노드에서만 반영된 채로 끝납니다.
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            task = loop.create_task(self.publish_control(kind, **payload))
+            self._pending_controls.add(task)
+            task.add_done_callback(self._pending_controls.discard)
+        else:
+            asyncio.run_coroutine_threadsafe(self.publish_control(kind, **payload), loop)
+
+    async def _dispatch_control(self, message: str):
+        try:
+            payload = json.loads(message)
+            handler = self._control_handlers.get(payload.pop("kind"))
+        except (ValueError, AttributeError, KeyError):
+            return
+        if handler:
+            try:
+                handler(payload)
+            except Exception:
+                logger.warning("control 메시지 처리 실패: %s", message, exc_info=True)
+
+    def stats(self) -> dict:
+        depths = [c.queue.qsize() for connections in self.active_connections.values() for c in connections]
+        return {
+            "rooms": len(self.active_connections),
+            "connections": len(depths),
+            "queue_size": self.queue_size,
+            "policy": self.policy,
+            "queue_depth_total": sum(depths),
+            "queue_depth_max": max(depths, default=0),
+            "sent_messages": self.sent_messages,
+            "dropped_messages": self.dropped_messages,
+            "slow_disconnects": self.slow_disconnects,
+            "send_errors": self.send_errors,
+            "backend": type(self.backend).__name__,
+            "published_messages": self.published_messages,
+            "publish_errors": self.publish_errors,
+            "duplicate_messages": self.duplicate_messages,
+        }
+
+
+manager = ConnectionManager()
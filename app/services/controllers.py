@@ -1,32 +1,29 @@
-from fastapi import HTTPException, UploadFile, Request
+from fastapi import HTTPException, Request
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy import text
-import bcrypt
-import os
+from sqlalchemy.exc import OperationalError
 import uuid
-import shutil
 import random
+import json
+import base64
 from datetime import datetime
-
-ALLOWED_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.gif'}
-
-
-def save_image(file: UploadFile) -> str:
-    if not file or not file.filename:
-        return ""
-    ext = os.path.splitext(file.filename)[1].lower()
-
-    if ext not in ALLOWED_EXTENSIONS:
-        raise HTTPException(status_code=400, detail="이미지 파일(png, jpg,gif,jpeg)만 업로드 가능합니다.")
-
-    filename = f"{uuid.uuid4()}_{file.filename}"
-    file_path = f"static/images/{filename}"
-    os.makedirs(os.path.dirname(file_path), exist_ok=True)
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
-    return f"/static/images/{filename}"
-
-
-def get_current_user_id(request: Request, db):
+from app.services.session_cache import lookup_session_user_id, revoke_session, revoke_user_sessions
+from app.services.images import save_image
+from app.services.image_variants import variant_generator, variant_urls
+from app.services.view_buffer import view_buffer
+from app.services.passwords import password_hasher
+from app.services.room_summary import create_room_summaries, advance_read_watermark
+from app.services.serializers import row_mapper, json_response
+from app.services import queries
+from app.services.etags import (conditional_response, bump_versions,
+    PROFILES_VERSION_KEY, comments_version_key, chat_room_version_key, chat_user_version_key)
+from app.services.response_cache import (
+    response_cache, post_detail_key, post_list_key, is_cacheable_post_page, invalidate_feed, invalidate_post,
+    POST_DETAIL_CACHE_TTL, POST_LIST_CACHE_TTL, FEED_VERSION_KEY,
+)
+
+
+async def get_current_user_id(request: Request, db):
     session_id = request.cookies.get("session_id")
     auth_header = request.headers.get("Authorization")
 
@@ -36,73 +33,78 @@ def get_current_user_id(request: Request, db):
     if not session_id:
         raise HTTPException(status_code=401, detail="로그인이 필요합니다.")
 
-    sql = text("SELECT data FROM sessions WHERE session_id = :session_id")
-    result = db.execute(sql, {"session_id": session_id}).fetchone()
+    user_id = await lookup_session_user_id(session_id, db)
 
-    if not result:
+    if user_id is None:
         raise HTTPException(status_code=401, detail="세션이 만료되었습니다.")
 
-    return int(result.data)
+    return user_id
 
 
 # 1. 회원가입
-def signup_controller(email, password, nickname, profile_image, db):
+async def signup_controller(email, password, nickname, profile_image, db):
     # 이메일 중복 확인
-    if db.execute(text("SELECT id FROM users WHERE email = :email"), {"email": email}).fetchone():
+    if (await db.execute(text(queries.EMAIL_EXISTS), {"email": email})).fetchone():
         raise HTTPException(status_code=409, detail="이미 존재하는 이메일입니다.")
 
-    password_bytes = password.encode('utf-8')
-    salt = bcrypt.gensalt()
-    hashed_password = bcrypt.hashpw(password_bytes, salt).decode('utf-8')
-    image_url = save_image(profile_image)
+    hashed_password = await password_hasher.hash_password(password)
+    image_url = await run_in_threadpool(save_image, profile_image)
+    variant_generator.schedule(image_url)
 
     insert_sql = text("""
                       INSERT INTO users (email, password, nickname, image_url, created_at)
                       VALUES (:email, :password, :nickname, :image_url, NOW())
                       """)
-    db.execute(insert_sql, {
+    await db.execute(insert_sql, {
         "email": email, "password": hashed_password, "nickname": nickname, "image_url": image_url
     })
-    db.commit()
+    await db.commit()
     return {"message": "회원가입 성공"}
 
 
 # 2. 로그인
-def login_controller(email, password, response, db):
-    sql = text("SELECT * FROM users WHERE email = :email AND deleted_at IS NULL")
-    user = db.execute(sql, {"email": email}).fetchone()
+async def login_controller(email, password, response, db):
+    sql = text(queries.LOGIN_USER)
+    user = (await db.execute(sql, {"email": email})).fetchone()
 
     if not user:
         raise HTTPException(status_code=401, detail="이메일 또는 비밀번호 불일치")
 
-    if not bcrypt.checkpw(password.encode('utf-8'), user.password.encode('utf-8')):
+    if not await password_hasher.verify_password(password, user.password):
         raise HTTPException(status_code=401, detail="이메일 또는 비밀번호 불일치")
 
+    # 설정된 cost(BCRYPT_ROUNDS)와 다른 해시는 평문을 알고 있는 지금 다시 해시해 둡니다.
+    if password_hasher.needs_rehash(user.password):
+        await db.execute(text("UPDATE users SET password=:p WHERE id=:uid"),
+                         {"p": await password_hasher.hash_password(password), "uid": user.id})
+        password_hasher.rehashed += 1
+
     session_id = str(uuid.uuid4())
-    db.execute(
+    await db.execute(
         text("INSERT INTO sessions (session_id, expires, data) VALUES (:sess_id, 0, :u_id)"),
         {"sess_id": session_id, "u_id": str(user.id)}
     )
-    db.commit()
+    await db.commit()
 
     response.set_cookie(key="session_id", value=session_id, httponly=True, samesite="lax", secure=False)
 
 # 3. 로그아웃
-def logout_controller(request, response, db):
+async def logout_controller(request, response, db):
     session_id = request.cookies.get("session_id")
     if session_id:
-        db.execute(text("DELETE FROM sessions WHERE session_id = :sess_id"), {"sess_id": session_id})
-        db.commit()
+        await db.execute(text("DELETE FROM sessions WHERE session_id = :sess_id"), {"sess_id": session_id})
+        await db.commit()
+        await revoke_session(session_id)
     response.delete_cookie("session_id")
     return {"message": "로그아웃"}
 
 
 # 4. 내 정보 조회
-def get_me_controller(request, db):
-    user_id = get_current_user_id(request, db)
-    user = db.execute(
+async def get_me_controller(request, db):
+    user_id = await get_current_user_id(request, db)
+    user = (await db.execute(
         text("SELECT id, email, nickname, image_url, turnip_amount, bell_amount, bio FROM users WHERE id = :uid"),
-        {"uid": user_id}).fetchone()
+        {"uid": user_id})).fetchone()
 
     if not user:
         raise HTTPException(status_code=404, detail="사용자를 찾을 수 없습니다.")
@@ -118,324 +120,395 @@ def get_me_controller(request, db):
     }
 
 # 4. 소개팅 (Matching)
-def get_matching_users_controller(request, db):
-    user_id = get_current_user_id(request, db)
+async def get_matching_users_controller(request, db):
+    user_id = await get_current_user_id(request, db)
     sql = text("""
         SELECT id, nickname, image_url AS profile_image, bio 
         FROM users 
         WHERE id != :uid AND bio IS NOT NULL AND deleted_at IS NULL
     """)
-    users = db.execute(sql, {"uid": user_id}).fetchall()
+    users = (await db.execute(sql, {"uid": user_id})).fetchall()
     return [dict(row._mapping) for row in users]
 
-# 5. 게시글 목록 (삭제된 글 제외)
-def get_posts_list_controller(offset, limit, db):
-    sql = text("""
-               SELECT p.id,
-                      p.user_id,
-                      p.title,
-                      p.contents,
-                      p.image_url,
-                      p.likes_count,
-                      p.views_count,
-                      p.comments_count,
-                      p.created_at,
-                      u.nickname  as author_nickname,
-                      u.image_url as author_profile_image
-               FROM posts p
-                        JOIN users u ON p.user_id = u.id
-               WHERE p.deleted_at IS NULL
-               ORDER BY p.id DESC LIMIT :limit
-               OFFSET :offset
-               """)
-    posts = db.execute(sql, {"limit": limit, "offset": offset}).fetchall()
+# 5. 게시글 목록 (삭제된 글 제외, 쿼리는 queries.POST_LIST_*)
+POST_LIST_ROW = row_mapper(
+    post_id="id", user_id="user_id", title="title", contents="contents", image="image_url",
+    likes="likes_count", comments="comments_count", views="views_count", created_at="created_at",
+    author_nickname="author_nickname", author_profile_image="author_profile_image",
+)
 
-    results = []
-    for p in posts:
-        results.append({
-            "post_id": p.id,
-            "user_id": p.user_id,
-            "title": p.title,
-            "contents": p.contents,
-            "image": p.image_url,
-            "likes": p.likes_count,
-            "comments": p.comments_count,
-            "views": p.views_count,
-            "created_at": str(p.created_at),
-            "author_nickname": p.author_nickname,
-            "author_profile_image": p.author_profile_image
-        })
-    return {"posts": results}
 
+# 커서에는 방향도 같이 넣습니다. {"before_id": N} = 더 오래된 글, {"after_id": N} = 더 새로운 글
+def encode_post_cursor(before_id=None, after_id=None):
+    payload = {"after_id": after_id} if after_id is not None else {"before_id": before_id}
+    raw = json.dumps(payload).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
 
-# 6. 게시글 상세
-def get_post_detail_controller(post_id, request, db):
-    sql = text("""
-               SELECT id,
-                      user_id,
-                      title,
-                      contents,
-                      image_url,
-                      likes_count,
-                      views_count,
-                      comments_count,
-                      created_at,
-                      deleted_at
-               FROM posts
-               WHERE id = :pid
-                 AND deleted_at IS NULL
-               """)
-    post = db.execute(sql, {"pid": post_id}).fetchone()
 
-    if not post:
-        raise HTTPException(status_code=404, detail="삭제되었거나 존재하지 않는 게시글입니다.")
+def decode_post_cursor(cursor):
+    # (before_id, after_id) 중 하나만 채워서 돌려줍니다.
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded))
+        if "after_id" in payload:
+            return None, int(payload["after_id"])
+        return int(payload["before_id"]), None
+    except (ValueError, KeyError, TypeError, AttributeError):
+        raise HTTPException(status_code=400, detail="잘못된 커서입니다.")
+
+
+async def get_posts_list_controller(offset, limit, request, response, db, before_id=None, after_id=None, cursor=None):
+    if cursor is not None:
+        before_id, after_id = decode_post_cursor(cursor)
+
+    # 🚀 피드가 그대로면 캐시/쿼리 없이 304
+    not_modified = conditional_response(request, response, [FEED_VERSION_KEY, PROFILES_VERSION_KEY],
+                                        "posts", offset, limit, before_id, after_id)
+    if not_modified:
+        return not_modified
+
+    # 🚀 첫 몇 페이지는 읽기 캐시에서 바로 돌려줍니다. (커서 없는 첫 페이지 == offset 0)
+    cache_key = None
+    if before_id is None and after_id is None and is_cacheable_post_page(offset, limit):
+        cache_key = post_list_key(offset, limit)
+        cached = response_cache.get(cache_key)
+        if cached is not None:
+            return json_response(cached, response)
+
+    # 🚀 커서 모드: OFFSET 으로 앞 행을 버리지 않고 PK(id)에서 바로 seek 합니다.
+    if before_id is not None:
+        sql = text(queries.POST_LIST_BEFORE)
+        posts = (await db.execute(sql, {"before_id": before_id, "limit": limit})).fetchall()
+    elif after_id is not None:
+        # 더 새로운 글을 가져올 때는 오름차순으로 seek 한 뒤 응답 순서(최신순)로 뒤집습니다.
+        sql = text(queries.POST_LIST_AFTER)
+        posts = (await db.execute(sql, {"after_id": after_id, "limit": limit})).fetchall()[::-1]
+    else:
+        # 기존 클라이언트 호환용 offset 모드
+        sql = text(queries.POST_LIST_OFFSET)
+        posts = (await db.execute(sql, {"limit": limit, "offset": offset})).fetchall()
+
+    results = POST_LIST_ROW(posts)
+    for item in results:
+        item["image_variants"] = variant_urls(item["image"])
+        item["author_profile_image_variants"] = variant_urls(item["author_profile_image"])
+
+    # 다음 페이지가 있을 수 있을 때만 커서를 내려줍니다.
+    # after 모드는 응답이 최신순으로 뒤집혀 있으므로 맨 앞(가장 새로운) 글에서 같은 방향으로 이어 갑니다.
+    next_cursor = None
+    if len(posts) == limit:
+        if after_id is not None:
+            next_cursor = encode_post_cursor(after_id=posts[0].id)
+        else:
+            next_cursor = encode_post_cursor(before_id=posts[-1].id)
+    body = {"posts": results, "next_cursor": next_cursor}
+    if cache_key is not None:
+        response_cache.set(cache_key, body, POST_LIST_CACHE_TTL)
+    return json_response(body, response)
+
 
+# 6. 게시글 상세
+async def get_post_detail_controller(post_id, request, db):
     current_user_id = -1
     try:
-        current_user_id = get_current_user_id(request, db)
-        if not db.execute(text("SELECT id FROM views WHERE user_id=:uid AND post_id=:pid"),
-                          {"uid": current_user_id, "pid": post_id}).fetchone():
-            db.execute(text("INSERT INTO views (user_id, post_id) VALUES (:uid, :pid)"),
-                       {"uid": current_user_id, "pid": post_id})
-            db.execute(text("UPDATE posts SET views_count = COALESCE(views_count, 0) + 1 WHERE id = :pid"),
-                       {"pid": post_id})
-            db.commit()
-            post = db.execute(sql, {"pid": post_id}).fetchone()
-    except:
+        current_user_id = await get_current_user_id(request, db)
+    except HTTPException:
         pass
 
-    writer = db.execute(text("SELECT nickname, image_url FROM users WHERE id = :uid"), {"uid": post.user_id}).fetchone()
-    is_liked = False
-    if current_user_id != -1 and db.execute(text("SELECT id FROM likes WHERE user_id=:uid AND post_id=:pid"),
-                                            {"uid": current_user_id, "pid": post_id}).fetchone():
-        is_liked = True
+    # 🚀 모든 유저가 공유하는 본문은 캐시하고, is_owner / is_liked 만 요청마다 덧씌웁니다.
+    #    캐시 miss 면 게시글 + 작성자 + 내 좋아요 여부를 쿼리 한 번으로 가져옵니다.
+    cache_key = post_detail_key(post_id)
+    body = response_cache.get(cache_key)
+    if body is None:
+        body, is_liked = await load_post_detail(post_id, current_user_id, db)
+        response_cache.set(cache_key, body, POST_DETAIL_CACHE_TTL)
+    elif current_user_id != -1:
+        is_liked = (await db.execute(text(queries.LIKE_EXISTS),
+                                     {"uid": current_user_id, "pid": post_id})).fetchone() is not None
+    else:
+        is_liked = False
+
+    # 🚀 조회수는 응답 경로에서 쓰지 않고 버퍼에 모았다가 한 번에 반영합니다. (view_buffer 참고)
+    if current_user_id != -1:
+        view_buffer.record(current_user_id, post_id)
 
     return {
+        **body,
+        "is_owner": (current_user_id == body["user_id"]),
+        "is_liked": is_liked
+    }
+
+
+async def load_post_detail(post_id, current_user_id, db):
+    sql = text(queries.POST_DETAIL)
+    post = (await db.execute(sql, {"pid": post_id, "uid": current_user_id})).fetchone()
+
+    if not post:
+        raise HTTPException(status_code=404, detail="삭제되었거나 존재하지 않는 게시글입니다.")
+
+    body = {
         "post_id": post.id,
         "user_id": post.user_id,
         "title": post.title,
         "contents": post.contents,
         "image": post.image_url,
+        "image_variants": variant_urls(post.image_url),
         "likes_count": post.likes_count,
         "views_count": post.views_count,
         "comments_count": post.comments_count,
-        "created_at": str(post.created_at),
-        "author_nickname": writer.nickname if writer else "Unknown",
-        "author_profile_image": writer.image_url if writer else "",
-        "is_owner": (current_user_id == post.user_id),
-        "is_liked": is_liked
+        "created_at": post.created_at,
+        "author_nickname": post.author_nickname if post.author_nickname is not None else "Unknown",
+        "author_profile_image": post.author_profile_image if post.author_profile_image is not None else "",
+        "author_profile_image_variants": variant_urls(post.author_profile_image)
     }
+    return body, bool(post.is_liked)
 
 
 # 7. 게시글 작성
-def create_post_controller(title, contents, image, request, db):
-    user_id = get_current_user_id(request, db)
-    image_url = save_image(image)
+async def create_post_controller(title, contents, image, request, db):
+    user_id = await get_current_user_id(request, db)
+    image_url = await run_in_threadpool(save_image, image)
+    variant_generator.schedule(image_url)
 
     # 🚀 좋아요(likes_count), 조회수(views_count), 댓글수(comments_count)를 0으로 강제 삽입!
     sql = text("""
         INSERT INTO posts (user_id, title, contents, image_url, likes_count, views_count, comments_count, created_at) 
         VALUES (:uid, :title, :contents, :img, 0, 0, 0, NOW())
     """)
-    db.execute(sql, {"uid": user_id, "title": title, "contents": contents, "img": image_url})
-    db.commit()
+    await db.execute(sql, {"uid": user_id, "title": title, "contents": contents, "img": image_url})
+    await db.commit()
+    invalidate_feed()
     return {"message": "게시글 등록 성공"}
 
 
 # 8. 게시글 수정
-def update_post_controller(post_id, title, contents, image, request, db):
-    user_id = get_current_user_id(request, db)
-    post = db.execute(text("SELECT user_id FROM posts WHERE id=:pid AND deleted_at IS NULL"),
-                      {"pid": post_id}).fetchone()
+async def update_post_controller(post_id, title, contents, image, request, db):
+    user_id = await get_current_user_id(request, db)
+    post = (await db.execute(text("SELECT user_id FROM posts WHERE id=:pid AND deleted_at IS NULL"),
+                             {"pid": post_id})).fetchone()
     if not post or post.user_id != user_id: raise HTTPException(status_code=403, detail="권한 없음")
 
     if image:
-        new_url = save_image(image)
-        db.execute(text("UPDATE posts SET title=:t, contents=:c, image_url=:i WHERE id=:pid"),
-                   {"t": title, "c": contents, "i": new_url, "pid": post_id})
+        new_url = await run_in_threadpool(save_image, image)
+        variant_generator.schedule(new_url)
+        await db.execute(text("UPDATE posts SET title=:t, contents=:c, image_url=:i WHERE id=:pid"),
+                         {"t": title, "c": contents, "i": new_url, "pid": post_id})
     else:
-        db.execute(text("UPDATE posts SET title=:t, contents=:c WHERE id=:pid"),
-                   {"t": title, "c": contents, "pid": post_id})
-    db.commit()
+        await db.execute(text("UPDATE posts SET title=:t, contents=:c WHERE id=:pid"),
+                         {"t": title, "c": contents, "pid": post_id})
+    await db.commit()
+    invalidate_post(post_id)
     return {"message": "수정 완료"}
 
 
 # 9. 게시글 삭제 (Soft Delete)
-def delete_post_controller(post_id, request, db):
-    user_id = get_current_user_id(request, db)
-    post = db.execute(text("SELECT user_id FROM posts WHERE id=:pid AND deleted_at IS NULL"),
-                      {"pid": post_id}).fetchone()
+async def delete_post_controller(post_id, request, db):
+    user_id = await get_current_user_id(request, db)
+    post = (await db.execute(text("SELECT user_id FROM posts WHERE id=:pid AND deleted_at IS NULL"),
+                             {"pid": post_id})).fetchone()
     if not post or post.user_id != user_id: raise HTTPException(status_code=403, detail="권한 없음")
 
-    db.execute(text("UPDATE posts SET deleted_at = NOW() WHERE id=:pid"), {"pid": post_id})
-    db.commit()
+    await db.execute(text("UPDATE posts SET deleted_at = NOW() WHERE id=:pid"), {"pid": post_id})
+    await db.commit()
+    invalidate_post(post_id)
     return {"message": "삭제 완료"}
 
 
-# 10. 좋아요
-def like_post_controller(post_id, request, db):
-    user_id = get_current_user_id(request, db)
-    post = db.execute(text("SELECT * FROM posts WHERE id=:pid AND deleted_at IS NULL"), {"pid": post_id}).fetchone()
-    if not post: raise HTTPException(status_code=404, detail="게시글 없음")
-
-    current_likes = post.likes_count if post.likes_count is not None else 0
-    existing = db.execute(text("SELECT id FROM likes WHERE user_id=:uid AND post_id=:pid"),
-                          {"uid": user_id, "pid": post_id}).fetchone()
-    is_liked = False
+# 10. 좋아요 (토글)
+# 🚀 likes(user_id, post_id) 유니크 인덱스 + DB 안에서의 증감으로 한 트랜잭션에서 끝냅니다.
+#    LAST_INSERT_ID(expr) 로 갱신된 likes_count 를 UPDATE 응답에서 바로 받아 다시 SELECT 하지 않습니다.
+LIKE_DEADLOCK_RETRIES = 3
+MYSQL_DEADLOCK_ERRORS = {1205, 1213}
+
+
+async def like_post_controller(post_id, request, db):
+    user_id = await get_current_user_id(request, db)
+    params = {"uid": user_id, "pid": post_id}
+
+    for attempt in range(LIKE_DEADLOCK_RETRIES):
+        try:
+            removed = (await db.execute(text(queries.LIKE_DELETE), params)).rowcount
+            if removed:
+                is_liked = False
+                updated = await db.execute(text("""
+                    UPDATE posts SET likes_count = LAST_INSERT_ID(GREATEST(COALESCE(likes_count, 0) - 1, 0))
+                    WHERE id=:pid AND deleted_at IS NULL
+                """), params)
+            else:
+                is_liked = True
+                inserted = (await db.execute(text("INSERT IGNORE INTO likes (user_id, post_id) VALUES (:uid, :pid)"),
+                                             params)).rowcount
+                if inserted:
+                    updated = await db.execute(text("""
+                        UPDATE posts SET likes_count = LAST_INSERT_ID(COALESCE(likes_count, 0) + 1)
+                        WHERE id=:pid AND deleted_at IS NULL
+                    """), params)
+                else:
+                    # 같은 유저의 동시 요청이 먼저 좋아요를 넣은 경우: 카운트는 그쪽에서 올렸습니다.
+                    updated = await db.execute(text("""
+                        UPDATE posts SET likes_count = LAST_INSERT_ID(COALESCE(likes_count, 0))
+                        WHERE id=:pid AND deleted_at IS NULL
+                    """), params)
+
+            if updated.rowcount == 0:
+                await db.rollback()
+                raise HTTPException(status_code=404, detail="게시글 없음")
+
+            likes_count = updated.lastrowid or 0
+            await db.commit()
+            invalidate_post(post_id)
+            return {"likes_count": likes_count, "is_liked": is_liked}
+        except OperationalError as e:
+            await db.rollback()
+            code = e.orig.args[0] if e.orig is not None and e.orig.args else None
+            if code in MYSQL_DEADLOCK_ERRORS and attempt < LIKE_DEADLOCK_RETRIES - 1:
+                continue
+            raise
 
-    if existing:
-        db.execute(text("DELETE FROM likes WHERE id=:lid"), {"lid": existing.id})
-        if current_likes > 0:
-            db.execute(text("UPDATE posts SET likes_count = :new_likes WHERE id=:pid"),
-                       {"new_likes": current_likes - 1, "pid": post_id})
-    else:
-        db.execute(text("INSERT INTO likes (user_id, post_id) VALUES (:uid, :pid)"), {"uid": user_id, "pid": post_id})
-        db.execute(text("UPDATE posts SET likes_count = :new_likes WHERE id=:pid"),
-                   {"new_likes": current_likes + 1, "pid": post_id})
-        is_liked = True
-
-    db.commit()
-    updated = db.execute(text("SELECT likes_count FROM posts WHERE id=:pid"), {"pid": post_id}).fetchone()
-    return {"likes_count": updated.likes_count if updated.likes_count is not None else 0, "is_liked": is_liked}
 
 # 11. 댓글 작성
-def create_comment_controller(post_id, content, request, db):
-    user_id = get_current_user_id(request, db)
+async def create_comment_controller(post_id, content, request, db):
+    user_id = await get_current_user_id(request, db)
 
     if not content:
         raise HTTPException(status_code=400, detail="내용을 입력해주세요.")
     if len(content) > 1000:
         raise HTTPException(status_code=400, detail="댓글은 1000자까지만 가능합니다.")
 
-    if not db.execute(text("SELECT id FROM posts WHERE id=:pid AND deleted_at IS NULL"), {"pid": post_id}).fetchone():
+    if not (await db.execute(text("SELECT id FROM posts WHERE id=:pid AND deleted_at IS NULL"), {"pid": post_id})).fetchone():
         raise HTTPException(status_code=404, detail="게시글이 없습니다.")
 
-    db.execute(
+    await db.execute(
         text("INSERT INTO comments (post_id, user_id, content, created_at) VALUES (:pid, :uid, :content, NOW())"),
         {"pid": post_id, "uid": user_id, "content": content})
-    db.execute(text("UPDATE posts SET comments_count = COALESCE(comments_count, 0) + 1 WHERE id = :pid"),
-               {"pid": post_id})
-    db.commit()
+    await db.execute(text("UPDATE posts SET comments_count = COALESCE(comments_count, 0) + 1 WHERE id = :pid"),
+                     {"pid": post_id})
+    await db.commit()
+    invalidate_post(post_id)
+    bump_versions(comments_version_key(post_id))
     return {"message": "댓글 등록"}
 
 
 # 12. 댓글 목록
-def get_comments_controller(post_id, request, db):
-    sql = text("""
-               SELECT c.id, c.post_id, c.user_id, c.content, c.created_at, u.nickname, u.image_url
-               FROM comments c
-                        JOIN users u ON c.user_id = u.id
-               WHERE c.post_id = :pid
-                 AND c.deleted_at IS NULL
-               """)
-    comments = db.execute(sql, {"pid": post_id}).fetchall()
+COMMENT_ROW = row_mapper(
+    comment_id="id", content="content", created_at="created_at",
+    author_nickname="nickname", author_profile_image="image_url",
+)
+
 
+async def get_comments_controller(post_id, request, response, db):
     current_user_id = -1
     try:
-        current_user_id = get_current_user_id(request, db)
-    except:
+        current_user_id = await get_current_user_id(request, db)
+    except HTTPException:
         pass
 
-    results = []
-    for c in comments:
-        results.append({
-            "comment_id": c.id,
-            "content": c.content,
-            "created_at": str(c.created_at),
-            "author_nickname": c.nickname,
-            "author_profile_image": c.image_url,
-            "is_owner": (c.user_id == current_user_id)
-        })
-    return results
+    # is_owner 가 사용자마다 다르므로 ETag 에 사용자 id 를 섞습니다.
+    not_modified = conditional_response(request, response,
+                                        [comments_version_key(post_id), PROFILES_VERSION_KEY],
+                                        "comments", post_id, current_user_id)
+    if not_modified:
+        return not_modified
+
+    sql = text(queries.COMMENT_LIST)
+    comments = (await db.execute(sql, {"pid": post_id})).fetchall()
+
+    results = COMMENT_ROW(comments)
+    for item, c in zip(results, comments):
+        item["is_owner"] = (c.user_id == current_user_id)
+    return json_response(results, response)
 
 
 # 13. 댓글 삭제 (Soft Delete)
-def delete_comment_controller(comment_id, request, db):
-    user_id = get_current_user_id(request, db)
-    check = db.execute(text("SELECT user_id FROM comments WHERE id=:cid AND deleted_at IS NULL"),
-                       {"cid": comment_id}).fetchone()
+async def delete_comment_controller(comment_id, request, db):
+    user_id = await get_current_user_id(request, db)
+    check = (await db.execute(text("SELECT user_id, post_id FROM comments WHERE id=:cid AND deleted_at IS NULL"),
+                              {"cid": comment_id})).fetchone()
     if not check or check.user_id != user_id: raise HTTPException(status_code=403, detail="권한 없음")
 
-    db.execute(text("UPDATE comments SET deleted_at = NOW() WHERE id=:cid"), {"cid": comment_id})
-    db.commit()
+    await db.execute(text("UPDATE comments SET deleted_at = NOW() WHERE id=:cid"), {"cid": comment_id})
+    await db.commit()
+    bump_versions(comments_version_key(check.post_id))
     return {"message": "삭제 완료"}
 
 
 # 14. 댓글 수정
-def update_comment_controller(comment_id, content, request, db):
-    user_id = get_current_user_id(request, db)
-    check = db.execute(text("SELECT user_id FROM comments WHERE id=:cid AND deleted_at IS NULL"),
-                       {"cid": comment_id}).fetchone()
+async def update_comment_controller(comment_id, content, request, db):
+    user_id = await get_current_user_id(request, db)
+    check = (await db.execute(text("SELECT user_id, post_id FROM comments WHERE id=:cid AND deleted_at IS NULL"),
+                              {"cid": comment_id})).fetchone()
     if not check or check.user_id != user_id: raise HTTPException(status_code=403, detail="권한 없음")
 
-    db.execute(text("UPDATE comments SET content=:c WHERE id=:cid"), {"c": content, "cid": comment_id})
-    db.commit()
+    await db.execute(text("UPDATE comments SET content=:c WHERE id=:cid"), {"c": content, "cid": comment_id})
+    await db.commit()
+    bump_versions(comments_version_key(check.post_id))
     return {"message": "수정 완료"}
 
 
 # 15. 이메일 중복 체크
-def check_email_controller(email, db):
-    if db.execute(text("SELECT id FROM users WHERE email=:e"), {"e": email}).fetchone():
+async def check_email_controller(email, db):
+    if (await db.execute(text(queries.EMAIL_EXISTS), {"email": email})).fetchone():
         raise HTTPException(status_code=409, detail="중복")
     return {"message": "가능"}
 
 
 # 16. 프로필(닉네임/사진) 수정
-def update_nickname_controller(user_id, nickname, profile_image, request, db):
-    current_user_id = get_current_user_id(request, db)
+async def update_nickname_controller(user_id, nickname, profile_image, request, db):
+    current_user_id = await get_current_user_id(request, db)
     if current_user_id != user_id: raise HTTPException(status_code=403, detail="권한 없음")
 
     # 🚀 새 사진이 들어왔다면 사진 저장 + 닉네임 변경
     if profile_image:
-        new_image_url = save_image(profile_image)
-        db.execute(text("UPDATE users SET nickname=:n, image_url=:i WHERE id=:uid"),
-                   {"n": nickname, "i": new_image_url, "uid": user_id})
+        new_image_url = await run_in_threadpool(save_image, profile_image)
+        variant_generator.schedule(new_image_url)
+        await db.execute(text("UPDATE users SET nickname=:n, image_url=:i WHERE id=:uid"),
+                         {"n": nickname, "i": new_image_url, "uid": user_id})
     # 새 사진이 없다면 닉네임만 변경
     else:
-        db.execute(text("UPDATE users SET nickname=:n WHERE id=:uid"),
-                   {"n": nickname, "uid": user_id})
+        await db.execute(text("UPDATE users SET nickname=:n WHERE id=:uid"),
+                         {"n": nickname, "uid": user_id})
 
-    db.commit()
+    await db.commit()
+    # 목록에 작성자 닉네임/사진이 같이 나가므로 피드 캐시도 비웁니다.
+    invalidate_feed()
+    bump_versions(PROFILES_VERSION_KEY)
     return {"message": "수정 완료"}
 
 
 # 17. 비밀번호 수정
-def update_password_controller(password, request, db):
-    user_id = get_current_user_id(request, db)
-    password_bytes = password.encode('utf-8')
-    salt = bcrypt.gensalt()
-    hashed_password = bcrypt.hashpw(password_bytes, salt).decode('utf-8')
-    db.execute(text("UPDATE users SET password=:p WHERE id=:uid"), {"p": hashed_password, "uid": user_id})
-    db.commit()
+async def update_password_controller(password, request, db):
+    user_id = await get_current_user_id(request, db)
+    hashed_password = await password_hasher.hash_password(password)
+    await db.execute(text("UPDATE users SET password=:p WHERE id=:uid"), {"p": hashed_password, "uid": user_id})
+    await db.commit()
     return {"message": "수정 완료"}
 
 
 # 18. 회원 탈퇴 (Soft Delete)
-def delete_user_controller(request, response, db):
-    user_id = get_current_user_id(request, db)
-    db.execute(text("UPDATE users SET deleted_at = NOW() WHERE id=:uid"), {"uid": user_id})
-    db.commit()
+async def delete_user_controller(request, response, db):
+    user_id = await get_current_user_id(request, db)
+    await db.execute(text("UPDATE users SET deleted_at = NOW() WHERE id=:uid"), {"uid": user_id})
+    # 탈퇴한 유저의 세션이 캐시나 DB에 남아 있으면 TTL 동안 계속 인증되므로 같이 정리합니다.
+    await db.execute(text("DELETE FROM sessions WHERE data = :uid"), {"uid": str(user_id)})
+    await db.commit()
+    await revoke_user_sessions(user_id)
+    bump_versions(PROFILES_VERSION_KEY)
     response.delete_cookie("session_id")
     return {"message": "탈퇴 완료"}
 
 
 # --- Chat Controllers ---
 
-def initiate_chat_controller(recipient_id: int, request, db):
-    user_id = get_current_user_id(request, db)
+async def initiate_chat_controller(recipient_id: int, request, db):
+    user_id = await get_current_user_id(request, db)
 
     if user_id == recipient_id:
         raise HTTPException(status_code=400, detail="자기 자신과는 채팅할 수 없습니다.")
 
     # 1:1 채팅방이 이미 존재하는지 확인
     # 두 유저가 모두 참여하고 있는 방을 찾는다.
-    sql_find_room = text("""
-        SELECT p1.room_id
-        FROM chat_participants p1
-        JOIN chat_participants p2 ON p1.room_id = p2.room_id
-        WHERE p1.user_id = :user_id AND p2.user_id = :recipient_id
-    """)
-    result = db.execute(sql_find_room, {"user_id": user_id, "recipient_id": recipient_id}).fetchone()
+    sql_find_room = text(queries.FIND_DIRECT_ROOM)
+    result = (await db.execute(sql_find_room, {"user_id": user_id, "recipient_id": recipient_id})).fetchone()
 
     if result:
         # 이미 채팅방이 존재함
@@ -443,107 +516,124 @@ def initiate_chat_controller(recipient_id: int, request, db):
 
     # 새 채팅방 생성
     sql_create_room = text("INSERT INTO chat_rooms (created_at) VALUES (NOW())")
-    result = db.execute(sql_create_room)
-    db.commit()
+    result = await db.execute(sql_create_room)
+    await db.commit()
     new_room_id = result.lastrowid
 
     # 참가자 추가
     sql_add_participants = text("INSERT INTO chat_participants (room_id, user_id) VALUES (:room_id, :user_id)")
-    db.execute(sql_add_participants, {"room_id": new_room_id, "user_id": user_id})
-    db.execute(sql_add_participants, {"room_id": new_room_id, "user_id": recipient_id})
+    await db.execute(sql_add_participants, {"room_id": new_room_id, "user_id": user_id})
+    await db.execute(sql_add_participants, {"room_id": new_room_id, "user_id": recipient_id})
+    await create_room_summaries(db, new_room_id, [user_id, recipient_id])
 
-    db.commit()
+    await db.commit()
+    bump_versions(chat_user_version_key(user_id), chat_user_version_key(recipient_id))
 
     return {"room_id": new_room_id}
 
 
-def get_chat_list_controller(request, db):
-    user_id = get_current_user_id(request, db)
+CHAT_LIST_ROW = row_mapper(
+    room_id="room_id", other_user_id="other_user_id", other_user_nickname="other_user_nickname",
+    other_user_image_url="other_user_image_url", last_message_content="last_message_content",
+    last_message_created_at="last_message_created_at", unread_count="unread_count",
+)
 
-    # 사용자가 참여하고 있는 모든 채팅방과 상대방 정보, 마지막 메시지, 안읽은 메시지 수를 가져온다.
-    sql = text("""
-        SELECT
-            cr.id AS room_id,
-            other_user.id AS other_user_id,
-            other_user.nickname AS other_user_nickname,
-            other_user.image_url AS other_user_image_url,
-            last_message.content AS last_message_content,
-            last_message.created_at AS last_message_created_at,
-            (SELECT COUNT(id) FROM messages WHERE room_id = cr.id AND is_read = 0 AND sender_id != :user_id) AS unread_count
-        FROM chat_rooms cr
-        JOIN chat_participants cp_me ON cr.id = cp_me.room_id AND cp_me.user_id = :user_id
-        JOIN chat_participants cp_other ON cr.id = cp_other.room_id AND cp_other.user_id != :user_id
-        JOIN users other_user ON cp_other.user_id = other_user.id
-        LEFT JOIN (
-            SELECT 
-                m.room_id, 
-                m.content, 
-                m.created_at
-            FROM messages m
-            INNER JOIN (
-                SELECT room_id, MAX(created_at) as max_created_at
-                FROM messages
-                GROUP BY room_id
-            ) lm ON m.room_id = lm.room_id AND m.created_at = lm.max_created_at
-        ) AS last_message ON cr.id = last_message.room_id
-        ORDER BY last_message.created_at DESC;
-    """)
 
-    results = db.execute(sql, {"user_id": user_id}).fetchall()
+async def get_chat_list_controller(request, response, db):
+    user_id = await get_current_user_id(request, db)
+
+    # 🚀 내 방 목록(커버링 인덱스)만 보고 방별 토큰이 그대로면 무거운 목록 쿼리 없이 304
+    room_ids = [row.room_id for row in (await db.execute(
+        text(queries.USER_ROOM_IDS),
+        {"user_id": user_id})).fetchall()]
+    not_modified = conditional_response(
+        request, response,
+        [chat_user_version_key(user_id), PROFILES_VERSION_KEY] + [chat_room_version_key(r) for r in room_ids],
+        "chats", user_id, *room_ids)
+    if not_modified:
+        return not_modified
 
-    return {"chats": [dict(row._mapping) for row in results]}
+    # 🚀 마지막 메시지는 room_summary 에서 읽고, 안읽은 수는 내 워터마크 이후만 셉니다. (queries.CHAT_LIST)
+    sql = text(queries.CHAT_LIST)
 
-def get_messages_controller(room_id: int, request, db):
-    user_id = get_current_user_id(request, db)
+    results = (await db.execute(sql, {"user_id": user_id})).fetchall()
 
-    # 사용자가 이 채팅방의 참여자인지 확인
-    sql_check_participant = text("SELECT id FROM chat_participants WHERE room_id = :room_id AND user_id = :user_id")
-    if not db.execute(sql_check_participant, {"room_id": room_id, "user_id": user_id}).fetchone():
+    return json_response({"chats": CHAT_LIST_ROW(results)}, response)
+
+MESSAGE_PAGE_MAX_LIMIT = 100
+MESSAGE_ROW = row_mapper(id="id", sender_id="sender_id", content="content", created_at="created_at")
+
+
+async def get_messages_controller(room_id: int, request, db, before_id=None, limit=50):
+    user_id = await get_current_user_id(request, db)
+
+    # 사용자가 이 채팅방의 참여자인지 확인 + 참여자별 읽음 워터마크
+    sql_participants = text(queries.ROOM_PARTICIPANTS)
+    watermarks = {row.user_id: row.last_read_message_id for row in
+                  (await db.execute(sql_participants, {"room_id": room_id})).fetchall()}
+    if user_id not in watermarks:
         raise HTTPException(status_code=403, detail="채팅방에 접근할 권한이 없습니다.")
+    my_read_id = watermarks.pop(user_id)
+    # 1:1 방이므로 상대방 워터마크 = 내 메시지를 어디까지 읽었는지
+    other_read_id = max(watermarks.values(), default=0)
 
-    # 메시지 가져오기
-    sql_get_messages = text("""
-        SELECT id, sender_id, content, created_at, is_read
-        FROM messages
-        WHERE room_id = :room_id
-        ORDER BY created_at ASC
-    """)
-    messages = db.execute(sql_get_messages, {"room_id": room_id}).fetchall()
+    limit = max(1, min(limit, MESSAGE_PAGE_MAX_LIMIT))
 
-    # 상대방이 보낸 메시지 읽음 처리
-    sql_mark_as_read = text(
-        "UPDATE messages SET is_read = 1 WHERE room_id = :room_id AND sender_id != :user_id AND is_read = 0")
-    db.execute(sql_mark_as_read, {"room_id": room_id, "user_id": user_id})
-    db.commit()
+    # 🚀 최신 메시지부터 limit 개만 가져옵니다. 이전 내역은 before_id 로 거슬러 올라갑니다.
+    if before_id is not None:
+        sql_get_messages = text(queries.MESSAGES_BEFORE)
+        params = {"room_id": room_id, "before_id": before_id, "limit": limit}
+    else:
+        sql_get_messages = text(queries.MESSAGES_LATEST)
+        params = {"room_id": room_id, "limit": limit}
+    # 화면에는 오래된 순으로 그리므로 페이지 안에서는 기존처럼 오름차순으로 돌려줍니다.
+    messages = (await db.execute(sql_get_messages, params)).fetchall()[::-1]
+
+    # 읽음 처리: 메시지 행을 건드리지 않고 내 워터마크만 이번 페이지의 마지막 id 까지 올립니다.
+    if messages and messages[-1].id > my_read_id:
+        if await advance_read_watermark(db, room_id, user_id, messages[-1].id):
+            await db.commit()
+            # 내 채팅 목록의 안읽은 수가 바뀝니다.
+            bump_versions(chat_user_version_key(user_id))
+        else:
+            await db.commit()
+
+    results = MESSAGE_ROW(messages)
+    for item in results:
+        # is_read: 내가 보낸 건 상대가 읽었는지, 상대가 보낸 건 (이번 조회 전에) 내가 읽었는지
+        read_id = other_read_id if item["sender_id"] == user_id else my_read_id
+        item["is_read"] = 1 if item["id"] <= read_id else 0
+
+    next_before_id = messages[0].id if len(messages) == limit else None
+    return json_response({"messages": results, "next_before_id": next_before_id})
 
-    return {"messages": [dict(row._mapping) for row in messages]}
 
 # --- 지도 및 사용자 위치 ---
-def get_all_users_locations_controller(db):
+async def get_all_users_locations_controller(db):
     # 지도에 뿌려줄 모든 사용자의 간단한 정보 조회
     sql = text("SELECT id, nickname, image_url FROM users WHERE deleted_at IS NULL")
-    users = db.execute(sql).fetchall()
+    users = (await db.execute(sql)).fetchall()
     return [{"id": u.id, "nickname": u.nickname, "image_url": u.image_url} for u in users]
 
 
 # --- 기차표 예매 ---
-def reserve_train_controller(train_data, request, db):
-    user_id = get_current_user_id(request, db)
+async def reserve_train_controller(train_data, request, db):
+    user_id = await get_current_user_id(request, db)
     # 실제 환경에서는 Redis 대기열 로직이 들어가야 하지만, 로컬용으로 즉시 저장 구현
     sql = text("""
         INSERT INTO train_reservations (user_id, train_number, departure_time)
         VALUES (:uid, :t_num, :d_time)
     """)
-    db.execute(sql, {
+    await db.execute(sql, {
         "uid": user_id,
         "t_num": train_data.get("train_number"),
         "d_time": train_data.get("departure_time")
     })
-    db.commit()
+    await db.commit()
     return {"message": "예약이 완료되었습니다.", "queue_number": 0}
 
-def get_my_train_reservations_controller(request, db):
-    user_id = get_current_user_id(request, db)
+async def get_my_train_reservations_controller(request, db):
+    user_id = await get_current_user_id(request, db)
     # 예약 시간이 가까운 순서대로 내 티켓을 불러옵니다.
     sql = text("""
         SELECT id, train_number, departure_time, status, created_at
@@ -551,7 +641,7 @@ def get_my_train_reservations_controller(request, db):
         WHERE user_id = :uid
         ORDER BY departure_time DESC
     """)
-    reservations = db.execute(sql, {"uid": user_id}).fetchall()
+    reservations = (await db.execute(sql, {"uid": user_id})).fetchall()
 
     results = []
     for r in reservations:
@@ -563,13 +653,13 @@ def get_my_train_reservations_controller(request, db):
         })
     return {"reservations": results}
 
-def delete_train_reservation_controller(reservation_id, request, db):
-    user_id = get_current_user_id(request, db)
+async def delete_train_reservation_controller(reservation_id, request, db):
+    user_id = await get_current_user_id(request, db)
 
     # 내 예약이 맞는지 확인하고 삭제 진행
     sql = text("DELETE FROM train_reservations WHERE id = :res_id AND user_id = :uid")
-    result = db.execute(sql, {"res_id": reservation_id, "uid": user_id})
-    db.commit()
+    result = await db.execute(sql, {"res_id": reservation_id, "uid": user_id})
+    await db.commit()
 
     if result.rowcount == 0:
         raise HTTPException(status_code=404, detail="존재하지 않거나 이미 취소된 기차표입니다.")
@@ -578,11 +668,11 @@ def delete_train_reservation_controller(reservation_id, request, db):
 
 
 # --- 소개팅 (Matching) ---
-def update_bio_controller(bio_data, request, db):
-    user_id = get_current_user_id(request, db)
+async def update_bio_controller(bio_data, request, db):
+    user_id = await get_current_user_id(request, db)
     sql = text("UPDATE users SET bio = :bio WHERE id = :uid")  # User 테이블에 bio 컬럼 필요
-    db.execute(sql, {"bio": bio_data.get("bio"), "uid": user_id})
-    db.commit()
+    await db.execute(sql, {"bio": bio_data.get("bio"), "uid": user_id})
+    await db.commit()
     return {"message": "소개글이 수정되었습니다."}
 
 
@@ -594,12 +684,12 @@ def get_daily_turnip_price():
     return random.randint(50, 600)
 
 
-def get_turnip_price_controller():
+async def get_turnip_price_controller():
     return {"current_price": get_daily_turnip_price()}
 
 
-def trade_turnip_controller(trade_data, request, db):
-    user_id = get_current_user_id(request, db)
+async def trade_turnip_controller(trade_data, request, db):
+    user_id = await get_current_user_id(request, db)
     trade_type = trade_data.get("type")  # 'buy' or 'sell'
     quantity = trade_data.get("quantity")
     price_from_client = trade_data.get("price")
@@ -611,7 +701,7 @@ def trade_turnip_controller(trade_data, request, db):
     total_cost = quantity * current_server_price
 
     user_sql = text("SELECT bell_amount, turnip_amount FROM users WHERE id = :uid")
-    user = db.execute(user_sql, {"uid": user_id}).fetchone()
+    user = (await db.execute(user_sql, {"uid": user_id})).fetchone()
 
     current_bell = user.bell_amount if user.bell_amount is not None else 2000
     current_turnip = user.turnip_amount if user.turnip_amount is not None else 0
@@ -621,26 +711,26 @@ def trade_turnip_controller(trade_data, request, db):
             raise HTTPException(status_code=400, detail="벨이 부족합니다.")
         # 파이썬에서 미리 계산해서 넣어주기
         update_user_sql = text("UPDATE users SET bell_amount = :new_bell, turnip_amount = :new_turnip WHERE id = :uid")
-        db.execute(update_user_sql,
-                   {"new_bell": current_bell - total_cost, "new_turnip": current_turnip + quantity, "uid": user_id})
+        await db.execute(update_user_sql,
+                         {"new_bell": current_bell - total_cost, "new_turnip": current_turnip + quantity, "uid": user_id})
 
     elif trade_type == 'sell':
         if current_turnip < quantity:
             raise HTTPException(status_code=400, detail="보유한 무가 부족합니다.")
         # 파이썬에서 미리 계산해서 넣어주기
         update_user_sql = text("UPDATE users SET bell_amount = :new_bell, turnip_amount = :new_turnip WHERE id = :uid")
-        db.execute(update_user_sql,
-                   {"new_bell": current_bell + total_cost, "new_turnip": current_turnip - quantity, "uid": user_id})
+        await db.execute(update_user_sql,
+                         {"new_bell": current_bell + total_cost, "new_turnip": current_turnip - quantity, "uid": user_id})
     else:
         raise HTTPException(status_code=400, detail="잘못된 거래 타입입니다.")
 
     log_sql = text(
         "INSERT INTO turnip_transactions (user_id, type, quantity, price, created_at) VALUES (:uid, :type, :q, :p, NOW())")
-    db.execute(log_sql, {"uid": user_id, "type": trade_type, "q": quantity, "p": current_server_price})
+    await db.execute(log_sql, {"uid": user_id, "type": trade_type, "q": quantity, "p": current_server_price})
 
-    db.commit()
+    await db.commit()
 
-    updated_user = db.execute(user_sql, {"uid": user_id}).fetchone()
+    updated_user = (await db.execute(user_sql, {"uid": user_id})).fetchone()
 
     return {
         "message": "거래 성공",
@@ -0,0 +1,72 @@
+import hashlib
+import os
+import uuid
+
+from fastapi import Request, Response
+
+from app.services.response_cache import response_cache
+from app.services.static_files import etag_matches
+
+# 폴링이 잦은 GET (/posts, /posts/{id}/comments, /chats) 용 조건부 응답
+# 리소스마다 "버전 토큰" 을 캐시 백엔드에 두고, ETag 는 토큰들을 섞어서 만듭니다.
+# 토큰은 처음 읽을 때 임의 값으로 생기고, 쓰기 컨트롤러가 커밋 후 지우면(bump) 다음 읽기 때 새 값이 됩니다.
+# - 숫자 카운터가 아니라 임의 값이라 재시작/축출/파드별 메모리 캐시에서도 예전 ETag 와 겹치지 않습니다.
+# - 토큰을 못 읽으면(none 백엔드, Redis 장애) ETag 없이 평소처럼 응답합니다.
+# - 토큰은 한 번에 MGET 으로 읽고, 없는 것만 SET NX 로 만듭니다. (동시에 만들어도 모두 같은 값을 씀)
+# - 메모리 백엔드에서 지운(bump) 토큰은 broadcast 제어 채널로 다른 워커/파드에서도 지웁니다. (response_cache.delete)
+# - 토큰을 먼저 읽고 쿼리를 실행하므로, 토큰이 그대로인데 데이터가 더 오래된 응답이 나가는 일은 없습니다.
+
+ETAG_VERSION_TTL = int(os.getenv("ETAG_VERSION_TTL", "86400"))
+
+PROFILES_VERSION_KEY = "etag:profiles"   # 닉네임/프로필 사진 (목록/댓글/채팅 목록에 같이 나감)
+# 피드 토큰(FEED_VERSION_KEY)은 invalidate_feed() 가 같이 지웁니다. (글 쓰기/수정/삭제, 좋아요, 조회수 flush)
+
+
+def comments_version_key(post_id) -> str:
+    return f"etag:comments:{post_id}"
+
+
+def chat_room_version_key(room_id) -> str:
+    return f"etag:chats:room:{room_id}"
+
+
+def chat_user_version_key(user_id) -> str:
+    return f"etag:chats:user:{user_id}"
+
+
+def current_versions(keys):
+    # 토큰 목록. 하나라도 못 읽으면 None (ETag 사용 안 함)
+    backend = response_cache.backend
+    versions = backend.get_many(keys)
+    missing = [key for key, version in zip(keys, versions) if version is None]
+    if missing:
+        created = dict(zip(missing, backend.add_many({key: uuid.uuid4().hex for key in missing}, ETAG_VERSION_TTL)))
+        versions = [created.get(key) if version is None else version for key, version in zip(keys, versions)]
+        if any(version is None for version in versions):
+            return None
+    return [str(version) for version in versions]
+
+
+def bump_versions(*keys):
+    if keys:
+        response_cache.delete(*keys)
+
+
+def make_etag(*parts) -> str:
+    digest = hashlib.sha1(":".join(str(part) for part in parts).encode("utf-8")).hexdigest()[:20]
+    return f'W/"{digest}"'
+
+
+def conditional_response(request: Request, response: Response, keys, *parts):
+    # 304 로 끝낼 수 있으면 Response 를, 아니면 None 을 돌려줍니다. (ETag 헤더는 response 에 심어 둠)
+    versions = current_versions(keys)
+    if versions is None:
+        return None
+    etag = make_etag(*versions, *parts)
+    # 캐시는 하되 매번 재검증하도록 합니다. (로그인 사용자별 응답이 섞이지 않게 private)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    response.headers.update(headers)
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return None
+
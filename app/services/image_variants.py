@@ -0,0 +1,213 @@
+import argparse
+import asyncio
+import logging
+import os
+import re
+
+from starlette.exceptions import HTTPException
+
+from app.services.images import LocalStorage, storage
+from app.services.process_pool import BoundedProcessPool
+from app.services.static_files import ImmutableStaticFiles
+
+logger = logging.getLogger(__name__)
+
+# 피드 카드/아바타용 축소 WebP 변형 이미지 (thumb, medium)
+# 원본은 그대로 두고 static/images/variants/{stem}_{name}.webp 로 따로 만듭니다.
+# - 업로드 직후 별도 프로세스 풀에서 만들어 두고 (요청은 기다리지 않음)
+# - 예전에 올라온 이미지처럼 아직 없는 변형은 처음 요청될 때 만들어서 돌려줍니다. (VariantStaticFiles)
+#
+#   python -m app.services.image_variants backfill   # 기존 이미지 변형 일괄 생성
+
+VARIANT_SIZES = {"thumb": 200, "medium": 800}
+VARIANT_DIR_NAME = "variants"
+WEBP_QUALITY = int(os.getenv("WEBP_QUALITY", "80"))
+VARIANT_WORKERS = int(os.getenv("VARIANT_WORKERS", "2"))
+VARIANT_MAX_PENDING = int(os.getenv("VARIANT_MAX_PENDING", "100"))
+
+# 업로드 파일 이름은 "<uuid>_<원래 이름>" 이나 내용 해시라 stem 에 _ . 공백 등이 들어갑니다.
+# stem 이 실제 원본 파일인지는 find_source 가 디스크에서 확인합니다.
+VARIANT_NAME_RE = re.compile(r"^(.+?)_(" + "|".join(VARIANT_SIZES) + r")\.webp$")
+SOURCE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".gif", ".webp")
+
+
+# --- 프로세스 풀에서 실행되는 함수 (pickle 가능해야 하므로 모듈 최상단에 둡니다) ---
+def _render_variants(src_path: str, out_dir: str, stem: str, sizes: dict, quality: int) -> int:
+    from PIL import Image, ImageOps
+
+    os.makedirs(out_dir, exist_ok=True)
+    created = 0
+    with Image.open(src_path) as original:
+        image = ImageOps.exif_transpose(original)
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if image.mode in ("LA", "P") else "RGB")
+        for name, size in sizes.items():
+            dest = os.path.join(out_dir, f"{stem}_{name}.webp")
+            if os.path.exists(dest):
+                continue
+            resized = image.copy()
+            resized.thumbnail((size, size), Image.LANCZOS)
+            # 반쯤 쓰인 파일이 서빙되지 않도록 임시 파일에 쓰고 바꿔치기합니다.
+            tmp = f"{dest}.{os.getpid()}.tmp"
+            resized.save(tmp, "WEBP", quality=quality, method=4)
+            os.replace(tmp, dest)
+            created += 1
+    return created
+
+
+class VariantGenerator:
+    def __init__(self, workers: int = VARIANT_WORKERS, max_pending: int = VARIANT_MAX_PENDING):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._pool = BoundedProcessPool(workers, max_pending)
+
+        self.generated = 0
+        self.skipped = 0
+        self.failed = 0
+        self.lazy_generated = 0
+
+    @staticmethod
+    def source_path(image_url: str):
+        # 변형은 로컬 저장소 원본에서만 만듭니다. (S3 등은 원본 URL 을 그대로 씁니다)
+        if not isinstance(storage, LocalStorage) or not image_url.startswith(storage.url_prefix):
+            return None
+        name = image_url[len(storage.url_prefix):]
+        if "/" in name:
+            return None
+        return os.path.join(storage.root, name)
+
+    def _submit(self, src_path: str):
+        stem = os.path.splitext(os.path.basename(src_path))[0]
+        out_dir = os.path.join(os.path.dirname(src_path), VARIANT_DIR_NAME)
+        return self._pool.submit(_render_variants, src_path, out_dir, stem, VARIANT_SIZES, WEBP_QUALITY)
+
+    def schedule(self, image_url: str):
+        # 업로드 요청은 기다리지 않습니다. 풀이 밀려 있으면 건너뛰고 나중에 lazy 생성에 맡깁니다.
+        src_path = self.source_path(image_url) if image_url else None
+        if src_path is None:
+            return
+        if not self._pool.try_acquire():
+            self.skipped += 1
+            return
+        try:
+            future = self._submit(src_path)
+        except Exception:
+            self._pool.release()
+            raise
+        future.add_done_callback(self._on_done)
+
+    def _on_done(self, future):
+        self._pool.release()
+        if future.exception() is not None:
+            self.failed += 1
+            logger.warning("변형 이미지 생성 실패", exc_info=future.exception())
+        else:
+            self.generated += future.result()
+
+    async def generate_now(self, src_path: str) -> int:
+        created = await asyncio.wrap_future(self._submit(src_path))
+        self.lazy_generated += created
+        return created
+
+    def shutdown(self):
+        self._pool.shutdown()
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "generated": self.generated,
+            "lazy_generated": self.lazy_generated,
+            "skipped": self.skipped,
+            "failed": self.failed,
+        }
+
+
+variant_generator = VariantGenerator()
+
+
+def variant_urls(image_url):
+    # 응답에 내려줄 변형 URL 묶음. 변형을 만들 수 없는 저장소면 전부 원본 URL 입니다.
+    if not image_url:
+        return None
+    urls = {"original": image_url}
+    if variant_generator.source_path(image_url) is None:
+        urls.update({name: image_url for name in VARIANT_SIZES})
+        return urls
+    base, name = image_url.rsplit("/", 1)
+    stem = os.path.splitext(name)[0]
+    for variant in VARIANT_SIZES:
+        urls[variant] = f"{base}/{VARIANT_DIR_NAME}/{stem}_{variant}.webp"
+    return urls
+
+
+def find_source(directory: str, stem: str):
+    # 숨김/임시 파일(.upload-*)이나 경로가 섞인 이름은 원본으로 보지 않습니다.
+    if stem.startswith(".") or os.sep in stem or "/" in stem:
+        return None
+    for ext in SOURCE_EXTENSIONS:
+        path = os.path.join(directory, stem + ext)
+        if os.path.isfile(path):
+            return path
+    return None
+
+
+# /static/images/variants 전용: 파일이 없으면 원본에서 만들고 다시 서빙합니다.
+class VariantStaticFiles(ImmutableStaticFiles):
+    def __init__(self, source_dir: str, **kwargs):
+        super().__init__(**kwargs)
+        self.source_dir = source_dir
+
+    async def get_response(self, path, scope):
+        # StaticFiles 는 없는 파일에 404 HTTPException 을 던집니다.
+        try:
+            return await super().get_response(path, scope)
+        except HTTPException as e:
+            if e.status_code != 404:
+                raise
+            match = VARIANT_NAME_RE.match(os.path.basename(path))
+            src_path = find_source(self.source_dir, match.group(1)) if match else None
+            if src_path is None:
+                raise
+            try:
+                await variant_generator.generate_now(src_path)
+            except Exception:
+                variant_generator.failed += 1
+                logger.warning("lazy 변형 생성 실패 (%s)", src_path, exc_info=True)
+                raise e
+        return await super().get_response(path, scope)
+
+
+def backfill(directory: str) -> dict:
+    sources = [os.path.join(directory, name) for name in sorted(os.listdir(directory))
+               if not name.startswith(".") and name.lower().endswith(SOURCE_EXTENSIONS)]
+    futures = [variant_generator._submit(path) for path in sources]
+    created = failed = 0
+    for path, future in zip(sources, futures):
+        try:
+            created += future.result()
+        except Exception as e:
+            failed += 1
+            print(f"실패: {path} ({e})")
+    return {"sources": len(sources), "created": created, "failed": failed}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="변형 이미지 관리")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("backfill", help="기존 이미지의 thumb/medium 변형 생성")
+    args = parser.parse_args(argv)
+
+    if args.command == "backfill":
+        if not isinstance(storage, LocalStorage):
+            parser.error("backfill 은 local 저장소에서만 지원합니다.")
+        try:
+            report = backfill(storage.root)
+        finally:
+            variant_generator.shutdown()
+        for key, value in report.items():
+            print(f"{key}: {value}")
+
+
+if __name__ == "__main__":
+    main()
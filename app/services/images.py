@@ -0,0 +1,319 @@
+import argparse
+import hashlib
+import os
+import tempfile
+
+from fastapi import HTTPException, UploadFile
+from sqlalchemy import text
+
+# 이미지 저장소 (내용 주소 기반)
+# 업로드를 청크 단위로 읽으면서 sha256 을 계산하고 {digest}{ext} 키로 한 번만 저장합니다.
+# 같은 내용이 다시 올라오면 새로 저장하지 않고 기존 URL 을 그대로 돌려줍니다.
+# 파일 형식은 확장자가 아니라 앞부분 매직 바이트로 판단하고, MAX_UPLOAD_BYTES 를 넘으면 바로 중단합니다.
+#
+#   python -m app.services.images dedupe [--dry-run]   # 기존 디렉터리 중복 정리 (local 저장소)
+
+IMAGE_DIR = "static/images"
+IMAGE_URL_PREFIX = "/static/images/"
+CHUNK_SIZE = 1024 * 1024
+TEMP_PREFIX = ".upload-"
+
+IMAGE_STORAGE = os.getenv("IMAGE_STORAGE", "local")  # local | s3
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(10 * 1024 * 1024)))
+# 멀티파트 요청 전체 상한 (폼 필드/경계 문자열 여유분 포함)
+MAX_REQUEST_BYTES = int(os.getenv("MAX_REQUEST_BYTES", str(MAX_UPLOAD_BYTES + 1024 * 1024)))
+
+S3_BUCKET = os.getenv("S3_BUCKET", "")
+S3_PREFIX = os.getenv("S3_PREFIX", "images/")
+S3_ENDPOINT_URL = os.getenv("S3_ENDPOINT_URL")  # MinIO 등 S3 호환 로컬 서버
+S3_PUBLIC_URL = os.getenv("S3_PUBLIC_URL", "")  # CloudFront 등 공개 URL (없으면 버킷 URL)
+
+# (매직 바이트 검사, 확장자, Content-Type)
+IMAGE_SIGNATURES = [
+    (lambda head: head.startswith(b"\x89PNG\r\n\x1a\n"), ".png", "image/png"),
+    (lambda head: head.startswith(b"\xff\xd8\xff"), ".jpg", "image/jpeg"),
+    (lambda head: head[:6] in (b"GIF87a", b"GIF89a"), ".gif", "image/gif"),
+    (lambda head: head[:4] == b"RIFF" and head[8:12] == b"WEBP", ".webp", "image/webp"),
+]
+SNIFF_BYTES = 12
+
+
+def sniff_image_type(head: bytes):
+    for matches, ext, content_type in IMAGE_SIGNATURES:
+        if matches(head):
+            return ext, content_type
+    return None
+
+
+# --- 저장소 백엔드 ---
+class StorageBackend:
+    def exists(self, key: str) -> bool:
+        raise NotImplementedError
+
+    def put_file(self, key: str, path: str, content_type: str):
+        # path 의 파일을 key 로 저장합니다. (파일을 옮겨 갈 수 있으므로 호출한 쪽은 이후 path 를 쓰지 않음)
+        raise NotImplementedError
+
+    def temp_dir(self):
+        # 업로드 임시 파일을 만들 디렉터리 (None 이면 시스템 임시 디렉터리)
+        return None
+
+    def url(self, key: str) -> str:
+        raise NotImplementedError
+
+
+class LocalStorage(StorageBackend):
+    def __init__(self, root: str = IMAGE_DIR, url_prefix: str = IMAGE_URL_PREFIX):
+        self.root = root
+        self.url_prefix = url_prefix
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, key)
+
+    def exists(self, key: str) -> bool:
+        return os.path.exists(self._path(key))
+
+    def put_file(self, key: str, path: str, content_type: str):
+        # 임시 파일이 같은 디렉터리에 있으므로 원자적 rename 입니다.
+        # (다른 파일시스템으로 move 하면 복사가 되어, 동시에 들어온 GET 이 반쯤 쓴 파일을 1년 immutable 로 받을 수 있음)
+        os.chmod(path, 0o644)
+        os.replace(path, self._path(key))
+
+    def temp_dir(self):
+        # 점(.)으로 시작하는 임시 파일은 dedupe / 변형 이미지 생성에서 건너뜁니다.
+        os.makedirs(self.root, exist_ok=True)
+        return self.root
+
+    def url(self, key: str) -> str:
+        return f"{self.url_prefix}{key}"
+
+
+# S3 호환 저장소 (S3_ENDPOINT_URL 로 MinIO 같은 로컬 서버를 붙여 테스트할 수 있습니다)
+class S3Storage(StorageBackend):
+    def __init__(self, bucket: str = S3_BUCKET, prefix: str = S3_PREFIX, endpoint_url: str = S3_ENDPOINT_URL,
+                 public_url: str = S3_PUBLIC_URL):
+        import boto3
+        from botocore.exceptions import ClientError
+
+        self.client = boto3.client("s3", endpoint_url=endpoint_url)
+        self._client_error = ClientError
+        self.bucket = bucket
+        self.prefix = prefix
+        if public_url:
+            self.public_url = public_url.rstrip("/")
+        elif endpoint_url:
+            self.public_url = f"{endpoint_url.rstrip('/')}/{bucket}"
+        else:
+            self.public_url = f"https://{bucket}.s3.amazonaws.com"
+
+    def exists(self, key: str) -> bool:
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self.prefix + key)
+            return True
+        except self._client_error as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+
+    def put_file(self, key: str, path: str, content_type: str):
+        # 내용 주소 키는 절대 덮어쓰지 않으므로 오래 캐시해도 됩니다.
+        self.client.upload_file(path, self.bucket, self.prefix + key, ExtraArgs={
+            "ContentType": content_type,
+            "CacheControl": "public, max-age=31536000, immutable",
+        })
+
+    def url(self, key: str) -> str:
+        return f"{self.public_url}/{self.prefix}{key}"
+
+
+def create_storage(name: str = IMAGE_STORAGE) -> StorageBackend:
+    if name == "s3":
+        return S3Storage()
+    return LocalStorage()
+
+
+storage = create_storage()
+
+
+# 업로드 저장 파이프라인 (컨트롤러가 run_in_threadpool 로 부르므로 여기서의 파일 I/O 는 이벤트 루프를 막지 않습니다)
+def save_image(file: UploadFile) -> str:
+    if not file or not file.filename:
+        return ""
+
+    head = file.file.read(SNIFF_BYTES)
+    kind = sniff_image_type(head)
+    if kind is None:
+        raise HTTPException(status_code=400, detail="이미지 파일(png, jpg, gif, webp)만 업로드 가능합니다.")
+    ext, content_type = kind
+
+    digest = hashlib.sha256(head)
+    size = len(head)
+    fd, tmp_path = tempfile.mkstemp(prefix=TEMP_PREFIX, dir=storage.temp_dir())
+    try:
+        with os.fdopen(fd, "wb") as buffer:
+            buffer.write(head)
+            while chunk := file.file.read(CHUNK_SIZE):
+                size += len(chunk)
+                if size > MAX_UPLOAD_BYTES:
+                    raise HTTPException(status_code=413,
+                                        detail=f"이미지는 {MAX_UPLOAD_BYTES // (1024 * 1024)}MB 까지만 업로드 가능합니다.")
+                digest.update(chunk)
+                buffer.write(chunk)
+
+        key = f"{digest.hexdigest()}{ext}"
+        # 같은 내용이 이미 저장되어 있으면 기존 파일을 그대로 씁니다.
+        if not storage.exists(key):
+            storage.put_file(key, tmp_path, content_type)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return storage.url(key)
+
+
+# 멀티파트 본문이 라우트에 도착하기 전에(폼 파싱 중) 크기 상한을 넘으면 413 으로 끊습니다.
+class UploadSizeLimitMiddleware:
+    def __init__(self, app, max_bytes: int = MAX_REQUEST_BYTES):
+        self.app = app
+        self.max_bytes = max_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope.get("headers") or [])
+        if not headers.get(b"content-type", b"").startswith(b"multipart/"):
+            await self.app(scope, receive, send)
+            return
+
+        content_length = headers.get(b"content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > self.max_bytes:
+            await self._reject(send)
+            return
+
+        received = 0
+        response_started = False
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    # FastAPI 폼 파서는 다른 예외를 400 으로 바꾸지만 HTTPException 은 그대로 올려 보냅니다.
+                    raise _UploadTooLarge()
+            return message
+
+        async def tracking_send(message):
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, tracking_send)
+        except _UploadTooLarge:
+            if not response_started:
+                await self._reject(send)
+
+    async def _reject(self, send):
+        body = f'{{"detail":"{UPLOAD_TOO_LARGE_DETAIL}"}}'.encode("utf-8")
+        await send({"type": "http.response.start", "status": 413, "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+        ]})
+        await send({"type": "http.response.body", "body": body})
+
+
+UPLOAD_TOO_LARGE_DETAIL = "업로드 용량이 너무 큽니다."
+
+
+class _UploadTooLarge(HTTPException):
+    def __init__(self):
+        super().__init__(status_code=413, detail=UPLOAD_TOO_LARGE_DETAIL)
+
+
+def file_digest(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# --- 유지보수: 기존 static/images 중복 제거 ---
+# 1. 내용이 같은 파일끼리 묶고, 묶음마다 {digest}{ext} 이름의 대표 파일을 하나 둡니다.
+# 2. posts / users 의 image_url 을 대표 파일 URL 로 바꿉니다. (커밋이 끝난 뒤에야 파일을 지움)
+# 3. 나머지 복사본을 지우고 회수한 용량을 출력합니다.
+def dedupe_images(db, dry_run: bool = False) -> dict:
+    groups = {}
+    for name in sorted(os.listdir(IMAGE_DIR)):
+        path = os.path.join(IMAGE_DIR, name)
+        if name.startswith(".") or not os.path.isfile(path):
+            continue
+        groups.setdefault(file_digest(path), []).append(name)
+
+    renames = []      # (old_name, canonical_name)
+    to_delete = []    # 중복 복사본
+    reclaimed = 0
+    for digest, names in groups.items():
+        if len(names) < 2:
+            continue
+        ext = os.path.splitext(names[0])[1].lower()
+        canonical = next((n for n in names if n == f"{digest}{ext}"), f"{digest}{ext}")
+        for name in names:
+            if name == canonical:
+                continue
+            renames.append((name, canonical))
+            to_delete.append(name)
+            reclaimed += os.path.getsize(os.path.join(IMAGE_DIR, name))
+        # 대표 파일이 아직 없으면 첫 파일을 대표 이름으로 복사해 둡니다. (원본 삭제는 DB 반영 후)
+        if canonical not in names:
+            reclaimed -= os.path.getsize(os.path.join(IMAGE_DIR, names[0]))
+            if not dry_run:
+                # 대표 파일도 서빙 중인 디렉터리에 생기므로 임시 파일에 다 쓴 뒤 rename 합니다.
+                src = os.path.join(IMAGE_DIR, names[0])
+                fd, tmp_path = tempfile.mkstemp(prefix=TEMP_PREFIX, dir=IMAGE_DIR)
+                with open(src, "rb") as r, os.fdopen(fd, "wb") as w:
+                    while chunk := r.read(CHUNK_SIZE):
+                        w.write(chunk)
+                os.chmod(tmp_path, 0o644)
+                os.replace(tmp_path, os.path.join(IMAGE_DIR, canonical))
+
+    if not dry_run and renames:
+        params = [{"old": IMAGE_URL_PREFIX + old, "new": IMAGE_URL_PREFIX + new} for old, new in renames]
+        db.execute(text("UPDATE posts SET image_url = :new WHERE image_url = :old"), params)
+        db.execute(text("UPDATE users SET image_url = :new WHERE image_url = :old"), params)
+        db.commit()
+        for name in to_delete:
+            os.remove(os.path.join(IMAGE_DIR, name))
+
+    return {
+        "scanned": sum(len(names) for names in groups.values()),
+        "duplicate_groups": sum(1 for names in groups.values() if len(names) > 1),
+        "removed_files": len(to_delete),
+        "reclaimed_bytes": reclaimed,
+        "dry_run": dry_run,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="이미지 저장소 유지보수")
+    sub = parser.add_subparsers(dest="command", required=True)
+    dedupe = sub.add_parser("dedupe", help="static/images 의 중복 파일 정리")
+    dedupe.add_argument("--dry-run", action="store_true", help="지우지 않고 결과만 출력")
+    args = parser.parse_args(argv)
+
+    from app.db import SessionLocal
+
+    if args.command == "dedupe":
+        db = SessionLocal()
+        try:
+            report = dedupe_images(db, dry_run=args.dry_run)
+        finally:
+            db.close()
+        for key, value in report.items():
+            print(f"{key}: {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+import ipaddress
+import os
+
+from fastapi import HTTPException, Request
+
+# 운영용 엔드포인트(/stats/*, /metrics) 접근 제한
+# INTERNAL_ENDPOINTS_ENABLED 가 꺼져 있으면(기본) 아예 없는 경로처럼 404 를 돌려주고,
+# 켜져 있어도 INTERNAL_ALLOWED_NETWORKS 대역에서 직접 들어온 요청만 받습니다. (기본: 루프백만)
+# 로드밸런서 뒤에서는 외부 요청도 LB 의 사설 IP 로 보이므로 10.0.0.0/8 같은 넓은 대역은 넣지 말고
+# Prometheus 가 도는 파드/노드 대역만 넣어 주세요.
+INTERNAL_ENDPOINTS_ENABLED = os.getenv("INTERNAL_ENDPOINTS_ENABLED", "0").lower() in ("1", "true", "yes")
+INTERNAL_ALLOWED_NETWORKS = [
+    ipaddress.ip_network(network.strip())
+    for network in os.getenv("INTERNAL_ALLOWED_NETWORKS", "127.0.0.1/32,::1/128").split(",")
+    if network.strip()
+]
+
+
+def is_internal_client(host) -> bool:
+    try:
+        address = ipaddress.ip_address(host)
+    except (TypeError, ValueError):
+        return False
+    return any(address in network for network in INTERNAL_ALLOWED_NETWORKS)
+
+
+# 라우터 dependencies 로 붙입니다. 막힌 요청은 경로가 있다는 것도 드러나지 않게 기본 404 와 같은 응답을 줍니다.
+def require_internal(request: Request):
+    host = request.client.host if request.client else None
+    if not INTERNAL_ENDPOINTS_ENABLED or not is_internal_client(host):
+        raise HTTPException(status_code=404, detail="Not Found")
@@ -0,0 +1,131 @@
+import asyncio
+import logging
+import os
+
+from sqlalchemy import text
+
+from app.db import SessionLocal
+from app.services.room_summary import apply_new_messages
+from app.services.etags import bump_versions, chat_room_version_key
+
+logger = logging.getLogger(__name__)
+
+MESSAGE_WRITE_BATCH_SIZE = int(os.getenv("MESSAGE_WRITE_BATCH_SIZE", "100"))
+MESSAGE_WRITE_QUEUE_SIZE = int(os.getenv("MESSAGE_WRITE_QUEUE_SIZE", "10000"))
+
+
+# 채팅 메시지 비동기 쓰기 큐 (group commit)
+# WebSocket 루프는 write() 로 큐에 넣고 기다리기만 하고, 실제 INSERT 는 백그라운드 writer 가
+# 스레드에서 모아서 실행합니다. 이전 배치를 쓰는 동안 쌓인 메시지는 다음 배치에서
+# multi-row INSERT 한 번 + 커밋 한 번으로 같이 저장됩니다.
+class MessageWriter:
+    def __init__(self, session_factory=SessionLocal, batch_size: int = MESSAGE_WRITE_BATCH_SIZE,
+                 queue_size: int = MESSAGE_WRITE_QUEUE_SIZE):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.queue_size = queue_size
+        self._queue = None
+        self._task = None
+
+        self.batches = 0
+        self.written = 0
+        self.errors = 0
+
+    async def start(self):
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        # 큐에 남은 메시지를 모두 쓰고 끝냅니다.
+        if self._task:
+            await self._queue.put(None)
+            await self._task
+            self._task = None
+
+    async def write(self, room_id: int, sender_id: int, content: str) -> dict:
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((room_id, sender_id, content, future))
+        return await future
+
+    async def _run(self):
+        stopping = False
+        while not stopping:
+            item = await self._queue.get()
+            if item is None:
+                break
+            batch = [item]
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            rows = [(room_id, sender_id, content) for room_id, sender_id, content, _ in batch]
+            try:
+                saved = await asyncio.to_thread(self._write_batch, rows)
+            except Exception as e:
+                self.errors += 1
+                logger.exception("메시지 %d건 저장 실패", len(batch))
+                for *_, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.written += len(batch)
+            for (*_, future), result in zip(batch, saved):
+                if not future.done():
+                    future.set_result(result)
+
+    def _write_batch(self, rows):
+        values = ", ".join(f"(:room_id{i}, :sender_id{i}, :content{i}, :created_at, 0)" for i in range(len(rows)))
+        params = {}
+        for i, (room_id, sender_id, content) in enumerate(rows):
+            params[f"room_id{i}"] = room_id
+            params[f"sender_id{i}"] = sender_id
+            params[f"content{i}"] = content
+
+        db = self.session_factory()
+        try:
+            # 배치 시각은 다른 테이블(NOW() 기본값)과 같은 DB 시계/타임존에서 가져옵니다. (컨테이너 시계 X)
+            # NOW() 는 초 단위라 브로드캐스트 값과 저장된 값이 그대로 같습니다.
+            created_at = db.execute(text("SELECT NOW()")).scalar()
+            params["created_at"] = created_at
+            result = db.execute(text(f"""
+                INSERT INTO messages (room_id, sender_id, content, created_at, is_read)
+                VALUES {values}
+            """), params)
+            # multi-row INSERT 는 첫 행의 id 를 돌려주고, 한 문장 안의 id 는 연속으로 할당됩니다.
+            first_id = result.lastrowid
+            ids = [first_id + i for i in range(len(rows))]
+            apply_new_messages(db, [
+                (room_id, sender_id, message_id, content)
+                for (room_id, sender_id, content), message_id in zip(rows, ids)
+            ], created_at)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+        # 방마다 마지막 메시지/안읽은 수가 바뀌었으므로 참여자들의 채팅 목록 ETag 를 넘깁니다.
+        bump_versions(*{chat_room_version_key(room_id) for room_id, _, _ in rows})
+
+        return [{"id": message_id, "created_at": created_at} for message_id in ids]
+
+    def stats(self) -> dict:
+        return {
+            "pending": self._queue.qsize() if self._queue else 0,
+            "batches": self.batches,
+            "written": self.written,
+            "errors": self.errors,
+            "avg_batch_size": round(self.written / self.batches, 2) if self.batches else 0.0,
+        }
+
+
+message_writer = MessageWriter()
@@ -0,0 +1,190 @@
+import bisect
+import threading
+import time
+
+from app.services.query_counter import current_query_stats
+
+# 라우트별 지연시간 / 상태코드 / SQL 수 / DB 시간 메트릭 (Prometheus 텍스트 형식: GET /metrics)
+# - 라벨은 실제 경로가 아니라 라우트 템플릿(/posts/{post_id}) 이라 라벨 수가 라우트 수로 고정됩니다.
+# - 요청마다 dict 조회 + bisect 한 번이라 운영에서 켜 둬도 되는 수준입니다.
+# - SQL 수/DB 시간은 QueryCountMiddleware 가 깔아 둔 요청별 카운터(app/services/query_counter.py)에서 읽으므로
+#   MetricsMiddleware 는 QueryCountMiddleware 안쪽에 있어야 합니다.
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)  # 마지막 칸은 +Inf
+        self._lock = threading.Lock()
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self.count += 1
+            self.sum += value
+            if value > self.max:
+                self.max = value
+
+    def cumulative(self) -> list:
+        # [(상한, 누적 건수), ...] (Prometheus 히스토그램과 같은 모양)
+        with self._lock:
+            counts = list(self._counts)
+        result, total = [], 0
+        for bound, count in zip(self.buckets + (float("inf"),), counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+
+class RouteStats:
+    __slots__ = ("latency", "statuses", "sql_statements", "db_seconds")
+
+    def __init__(self):
+        self.latency = Histogram()
+        self.statuses: dict[int, int] = {}
+        self.sql_statements = 0
+        self.db_seconds = 0.0
+
+
+class RouteMetrics:
+    def __init__(self):
+        self._routes: dict[tuple[str, str], RouteStats] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, method: str, route: str) -> RouteStats:
+        key = (method, route)
+        stats = self._routes.get(key)
+        if stats is None:
+            with self._lock:
+                stats = self._routes.setdefault(key, RouteStats())
+        return stats
+
+    def record(self, method: str, route: str, status: int, seconds: float, sql_statements: int, db_seconds: float):
+        stats = self._get(method, route)
+        stats.latency.observe(seconds)
+        with self._lock:
+            stats.statuses[status] = stats.statuses.get(status, 0) + 1
+            stats.sql_statements += sql_statements
+            stats.db_seconds += db_seconds
+
+    def items(self):
+        with self._lock:
+            return sorted(self._routes.items())
+
+
+route_metrics = RouteMetrics()
+
+
+def route_label(scope) -> str:
+    route = scope.get("route")
+    if route is not None and getattr(route, "path", None):
+        return route.path
+    # 마운트된 정적 파일이나 404 는 경로를 그대로 쓰지 않고 묶습니다. (라벨 폭증 방지)
+    path = scope.get("path", "")
+    if path.startswith("/static/"):
+        return "/static/*"
+    return "<unmatched>"
+
+
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        started = time.perf_counter()
+
+        async def recording_send(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, recording_send)
+        finally:
+            query_stats = current_query_stats()
+            route_metrics.record(
+                scope["method"], route_label(scope), status_code, time.perf_counter() - started,
+                query_stats.count if query_stats else 0, query_stats.db_time if query_stats else 0.0,
+            )
+
+
+# --- Prometheus 텍스트 형식 ---
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _labels(**labels) -> str:
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+def _bound(bound: float) -> str:
+    return "+Inf" if bound == float("inf") else repr(bound)
+
+
+def _histogram_lines(name: str, histogram: Histogram, **labels) -> list:
+    lines = [f"{name}_bucket{_labels(**labels, le=_bound(bound))} {total}"
+             for bound, total in histogram.cumulative()]
+    lines.append(f"{name}_sum{_labels(**labels)} {histogram.sum}")
+    lines.append(f"{name}_count{_labels(**labels)} {histogram.count}")
+    return lines
+
+
+def render_metrics() -> str:
+    from app.services import pool_metrics
+
+    routes = route_metrics.items()
+    lines = [
+        "# HELP http_request_duration_seconds HTTP request latency by route template.",
+        "# TYPE http_request_duration_seconds histogram",
+    ]
+    for (method, route), stats in routes:
+        lines += _histogram_lines("http_request_duration_seconds", stats.latency, method=method, route=route)
+
+    lines += ["# HELP http_requests_total HTTP responses by route template and status.",
+              "# TYPE http_requests_total counter"]
+    for (method, route), stats in routes:
+        for status, count in sorted(stats.statuses.items()):
+            lines.append(f"http_requests_total{_labels(method=method, route=route, status=status)} {count}")
+
+    lines += ["# HELP db_statements_total SQL statements executed while serving the route.",
+              "# TYPE db_statements_total counter"]
+    for (method, route), stats in routes:
+        lines.append(f"db_statements_total{_labels(method=method, route=route)} {stats.sql_statements}")
+
+    lines += ["# HELP db_time_seconds_total Time spent in SQL statements while serving the route.",
+              "# TYPE db_time_seconds_total counter"]
+    for (method, route), stats in routes:
+        lines.append(f"db_time_seconds_total{_labels(method=method, route=route)} {stats.db_seconds}")
+
+    # 커넥션 풀 (app/services/pool_metrics.py)
+    pools = pool_metrics.stats()
+    for gauge, key, help_text in (
+        ("db_pool_checked_out", "checked_out", "Connections currently checked out."),
+        ("db_pool_idle", "idle", "Idle connections in the pool."),
+        ("db_pool_overflow", "overflow", "Connections opened beyond pool_size."),
+    ):
+        lines += [f"# HELP {gauge} {help_text}", f"# TYPE {gauge} gauge"]
+        for engine, snapshot in pools.items():
+            lines.append(f"{gauge}{_labels(engine=engine)} {snapshot[key]}")
+    lines += ["# HELP db_pool_wait_seconds Time spent waiting for a pooled connection.",
+              "# TYPE db_pool_wait_seconds histogram"]
+    for engine, histogram in sorted(pool_metrics.wait_histograms.items()):
+        lines += _histogram_lines("db_pool_wait_seconds", histogram, engine=engine)
+    lines += ["# HELP db_pool_timeouts_total Pool checkouts that hit pool_timeout.",
+              "# TYPE db_pool_timeouts_total counter"]
+    for engine, histogram in sorted(pool_metrics.wait_histograms.items()):
+        lines.append(f"db_pool_timeouts_total{_labels(engine=engine)} {histogram.timeouts}")
+
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,79 @@
+import asyncio
+import os
+
+import bcrypt
+from fastapi import HTTPException
+
+from app.services.process_pool import BoundedProcessPool
+
+# bcrypt 해시/검증 전용 프로세스 풀
+# bcrypt 는 한 번에 수십~수백 ms 의 CPU 를 쓰기 때문에 이벤트 루프나 공용 스레드풀에서 돌리면
+# 로그인 폭주 때 다른 요청까지 밀립니다. 별도 프로세스에서 돌리고,
+# 대기 중인 작업이 BCRYPT_MAX_PENDING 을 넘으면 바로 503 으로 돌려보냅니다.
+
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+BCRYPT_WORKERS = int(os.getenv("BCRYPT_WORKERS", str(os.cpu_count() or 2)))
+BCRYPT_MAX_PENDING = int(os.getenv("BCRYPT_MAX_PENDING", str(BCRYPT_WORKERS * 4)))
+
+
+# --- 프로세스 풀에서 실행되는 함수 (pickle 가능해야 하므로 모듈 최상단에 둡니다) ---
+def _hashpw(password: bytes, rounds: int) -> bytes:
+    return bcrypt.hashpw(password, bcrypt.gensalt(rounds))
+
+
+def _checkpw(password: bytes, hashed: bytes) -> bool:
+    return bcrypt.checkpw(password, hashed)
+
+
+class PasswordHasher:
+    def __init__(self, rounds: int = BCRYPT_ROUNDS, workers: int = BCRYPT_WORKERS,
+                 max_pending: int = BCRYPT_MAX_PENDING):
+        self.rounds = rounds
+        self.workers = workers
+        self.max_pending = max_pending
+        self._pool = BoundedProcessPool(workers, max_pending)
+
+        self.completed = 0
+        self.rejected = 0
+        self.rehashed = 0
+
+    async def _run(self, fn, *args):
+        if not self._pool.try_acquire():
+            self.rejected += 1
+            raise HTTPException(status_code=503, detail="요청이 많아 잠시 후 다시 시도해주세요.")
+        try:
+            # 이벤트 루프는 막지 않고 프로세스 풀 결과만 기다립니다.
+            result = await asyncio.wrap_future(self._pool.submit(fn, *args))
+            self.completed += 1
+            return result
+        finally:
+            self._pool.release()
+
+    async def hash_password(self, password: str) -> str:
+        return (await self._run(_hashpw, password.encode('utf-8'), self.rounds)).decode('utf-8')
+
+    async def verify_password(self, password: str, hashed: str) -> bool:
+        return await self._run(_checkpw, password.encode('utf-8'), hashed.encode('utf-8'))
+
+    def needs_rehash(self, hashed: str) -> bool:
+        # $2b$12$... 형식에서 cost 만 비교합니다.
+        try:
+            return int(hashed.split("$")[2]) != self.rounds
+        except (IndexError, ValueError):
+            return True
+
+    def shutdown(self):
+        self._pool.shutdown()
+
+    def stats(self) -> dict:
+        return {
+            "rounds": self.rounds,
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "rehashed": self.rehashed,
+        }
+
+
+password_hasher = PasswordHasher()
@@ -0,0 +1,109 @@
+import time
+
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from app.services.metrics import Histogram
+
+# DB 커넥션 풀 계측
+# - 풀에서 커넥션을 받기까지 기다린 시간(_do_get)을 히스토그램으로 모읍니다.
+#   (SQLAlchemy 풀 이벤트에는 "대기 시작" 이 없어서 풀 클래스를 감싸서 잽니다)
+# - checkout/checkin/connect/invalidate 는 풀 이벤트로 셉니다.
+# - stats() 는 엔진별 사용 중 / 유휴 / overflow 커넥션 수와 위 값들을 돌려줍니다.
+
+POOL_WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+# 대기 시간 히스토그램 (라우트 지연시간과 같은 Histogram 에 풀 타임아웃 수만 더합니다)
+class WaitHistogram(Histogram):
+    def __init__(self, buckets=POOL_WAIT_BUCKETS):
+        super().__init__(buckets)
+        self.timeouts = 0
+
+    def as_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "sum_seconds": round(self.sum, 6),
+            "avg_ms": round(self.sum / self.count * 1000, 3) if self.count else 0.0,
+            "max_ms": round(self.max * 1000, 3),
+            "timeouts": self.timeouts,
+            "buckets": {("+Inf" if bound == float("inf") else str(bound)): total
+                        for bound, total in self.cumulative()},
+        }
+
+
+class PoolEventCounters:
+    def __init__(self):
+        self.connects = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.invalidations = 0
+
+
+wait_histograms: dict = {}
+event_counters: dict = {}
+_engines: dict = {}
+
+
+def instrumented_pool_class(base, name: str):
+    # base(QueuePool / AsyncAdaptedQueuePool) 를 감싸 커넥션 대기 시간을 name 히스토그램에 기록합니다.
+    histogram = wait_histograms.setdefault(name, WaitHistogram())
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return base._do_get(self)
+        except PoolTimeoutError:
+            histogram.timeouts += 1
+            raise
+        finally:
+            histogram.observe(time.perf_counter() - started)
+
+    return type(f"Instrumented{base.__name__}", (base,), {"_do_get": _do_get})
+
+
+def watch_engine(name: str, engine):
+    # engine: 동기 Engine (async 엔진은 .sync_engine 을 넘깁니다)
+    counters = event_counters.setdefault(name, PoolEventCounters())
+    _engines[name] = engine
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        counters.connects += 1
+
+    @event.listens_for(engine, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        counters.checkouts += 1
+
+    @event.listens_for(engine, "checkin")
+    def _on_checkin(dbapi_connection, connection_record):
+        counters.checkins += 1
+
+    @event.listens_for(engine, "invalidate")
+    def _on_invalidate(dbapi_connection, connection_record, exception):
+        counters.invalidations += 1
+
+
+def pool_snapshot(name: str) -> dict:
+    pool = _engines[name].pool
+    counters = event_counters[name]
+    checked_out = pool.checkedout()
+    return {
+        "pool_class": type(pool).__name__,
+        "size": pool.size(),
+        "max_overflow": getattr(pool, "_max_overflow", None),
+        "timeout": pool.timeout() if hasattr(pool, "timeout") else None,
+        "checked_out": checked_out,
+        "idle": pool.checkedin(),
+        # overflow() 는 pool_size 를 넘겨서 연 커넥션 수 (아직 덜 찼으면 음수)
+        "overflow": max(pool.overflow(), 0),
+        "connects": counters.connects,
+        "checkouts": counters.checkouts,
+        "checkins": counters.checkins,
+        "invalidations": counters.invalidations,
+        "wait": wait_histograms[name].as_dict() if name in wait_histograms else None,
+    }
+
+
+def stats() -> dict:
+    return {name: pool_snapshot(name) for name in _engines}
@@ -0,0 +1,38 @@
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+# CPU 를 오래 쓰는 작업(bcrypt, 이미지 리사이즈)용 프로세스 풀 + 대기 작업 상한
+# - 풀은 처음 쓸 때 만듭니다. (스크립트/테스트에서 import 만 해도 프로세스가 뜨지 않게)
+# - 앱 스레드(조회수 버퍼 등)가 떠 있는 상태에서 fork 하지 않도록 spawn 을 씁니다.
+# - 넘겨주는 함수는 pickle 가능해야 하므로 모듈 최상단 함수여야 합니다.
+# - try_acquire() 로 자리를 잡지 못하면 호출한 쪽이 거절(503)하거나 건너뜁니다.
+
+
+class BoundedProcessPool:
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._executor = None
+        self._executor_lock = threading.Lock()
+
+    def try_acquire(self) -> bool:
+        return self._slots.acquire(blocking=False)
+
+    def release(self):
+        self._slots.release()
+
+    def submit(self, fn, *args):
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                     mp_context=multiprocessing.get_context("spawn"))
+            executor = self._executor
+        return executor.submit(fn, *args)
+
+    def shutdown(self):
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
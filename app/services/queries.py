@@ -0,0 +1,109 @@
+# 자주 타는 조회 쿼리 (컨트롤러와 `python -m app.migrate --explain` 이 같은 문자열을 씁니다)
+# 여기 있는 쿼리를 고치면 EXPLAIN 확인도 같이 바뀌므로 둘이 어긋나지 않습니다.
+# 이 모듈은 문자열만 두고 다른 app 모듈을 import 하지 않습니다. (마이그레이션 initContainer 에서도 가볍게)
+
+# --- 세션 / 사용자 ---
+SESSION_USER = "SELECT data FROM sessions WHERE session_id = :session_id"
+LOGIN_USER = "SELECT * FROM users WHERE email = :email AND deleted_at IS NULL"
+EMAIL_EXISTS = "SELECT id FROM users WHERE email = :email"
+
+# --- 게시글 ---
+POST_LIST_COLUMNS = """
+               SELECT p.id,
+                      p.user_id,
+                      p.title,
+                      p.contents,
+                      p.image_url,
+                      p.likes_count,
+                      p.views_count,
+                      p.comments_count,
+                      p.created_at,
+                      u.nickname  as author_nickname,
+                      u.image_url as author_profile_image
+               FROM posts p
+                        JOIN users u ON p.user_id = u.id
+               WHERE p.deleted_at IS NULL
+"""
+# 커서 모드: OFFSET 으로 앞 행을 버리지 않고 PK(id)에서 바로 seek
+POST_LIST_BEFORE = POST_LIST_COLUMNS + " AND p.id < :before_id ORDER BY p.id DESC LIMIT :limit"
+POST_LIST_AFTER = POST_LIST_COLUMNS + " AND p.id > :after_id ORDER BY p.id ASC LIMIT :limit"
+# 기존 클라이언트 호환용 offset 모드
+POST_LIST_OFFSET = POST_LIST_COLUMNS + " ORDER BY p.id DESC LIMIT :limit OFFSET :offset"
+
+POST_DETAIL = """
+               SELECT p.id,
+                      p.user_id,
+                      p.title,
+                      p.contents,
+                      p.image_url,
+                      p.likes_count,
+                      p.views_count,
+                      p.comments_count,
+                      p.created_at,
+                      u.nickname  as author_nickname,
+                      u.image_url as author_profile_image,
+                      EXISTS (SELECT 1 FROM likes l WHERE l.user_id = :uid AND l.post_id = p.id) as is_liked
+               FROM posts p
+                        LEFT JOIN users u ON p.user_id = u.id
+               WHERE p.id = :pid
+                 AND p.deleted_at IS NULL
+               """
+LIKE_EXISTS = "SELECT id FROM likes WHERE user_id=:uid AND post_id=:pid"
+LIKE_DELETE = "DELETE FROM likes WHERE user_id=:uid AND post_id=:pid"
+
+COMMENT_LIST = """
+               SELECT c.id, c.post_id, c.user_id, c.content, c.created_at, u.nickname, u.image_url
+               FROM comments c
+                        JOIN users u ON c.user_id = u.id
+               WHERE c.post_id = :pid
+                 AND c.deleted_at IS NULL
+               """
+
+# --- 채팅 ---
+# 두 유저가 모두 참여하고 있는 1:1 방
+FIND_DIRECT_ROOM = """
+        SELECT p1.room_id
+        FROM chat_participants p1
+        JOIN chat_participants p2 ON p1.room_id = p2.room_id
+        WHERE p1.user_id = :user_id AND p2.user_id = :recipient_id
+    """
+USER_ROOM_IDS = "SELECT room_id FROM chat_participants WHERE user_id = :user_id ORDER BY room_id"
+
+# 마지막 메시지는 room_summary 에 미리 계산되어 있으므로 내 요약 행만 인덱스로 읽습니다.
+# 안읽은 수는 내 읽음 워터마크 이후의 메시지만 messages(room_id, id) 범위로 셉니다. (마지막 메시지까지 읽은 방은 세지 않음)
+CHAT_LIST = """
+        SELECT
+            rs.room_id AS room_id,
+            other_user.id AS other_user_id,
+            other_user.nickname AS other_user_nickname,
+            other_user.image_url AS other_user_image_url,
+            rs.last_message_preview AS last_message_content,
+            rs.last_message_at AS last_message_created_at,
+            CASE WHEN rs.last_message_id > cp_me.last_read_message_id THEN (
+                SELECT COUNT(*) FROM messages m
+                WHERE m.room_id = rs.room_id AND m.id > cp_me.last_read_message_id AND m.sender_id != :user_id
+            ) ELSE 0 END AS unread_count
+        FROM room_summary rs
+        JOIN chat_participants cp_me ON rs.room_id = cp_me.room_id AND cp_me.user_id = :user_id
+        JOIN chat_participants cp_other ON rs.room_id = cp_other.room_id AND cp_other.user_id != :user_id
+        JOIN users other_user ON cp_other.user_id = other_user.id
+        WHERE rs.user_id = :user_id
+        ORDER BY rs.last_message_at DESC
+    """
+
+ROOM_PARTICIPANTS = "SELECT user_id, last_read_message_id FROM chat_participants WHERE room_id = :room_id"
+# 최신 메시지부터 limit 개. 이전 내역은 before_id 로 거슬러 올라갑니다.
+MESSAGES_LATEST = """
+            SELECT id, sender_id, content, created_at
+            FROM messages
+            WHERE room_id = :room_id
+            ORDER BY id DESC
+            LIMIT :limit
+        """
+MESSAGES_BEFORE = """
+            SELECT id, sender_id, content, created_at
+            FROM messages
+            WHERE room_id = :room_id AND id < :before_id
+            ORDER BY id DESC
+            LIMIT :limit
+        """
@@ -0,0 +1,177 @@
+import logging
+import os
+import re
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+
+logger = logging.getLogger(__name__)
+
+# 요청 하나가 DB 에 몇 번 왕복하는지 세는 카운터
+#
+#   with count_queries() as stats:
+#       await controllers.get_post_detail_controller(post_id, request, db)
+#   assert stats.count <= 2
+#
+# HTTP 요청마다 QueryCountMiddleware 가 새 카운터를 깔아 두므로, 요청 처리 중에는
+# current_query_stats() 로 지금까지 실행된 SQL 수(count)와 DB 에서 보낸 시간(db_time, 초)을 볼 수 있습니다.
+#
+# 프로파일링 모드 (DB_PROFILE=1, 개발/테스트용)
+# - SLOW_QUERY_MS 를 넘긴 문장은 정규화한 SQL, 파라미터 모양(값은 남기지 않음), 실행한 라우트 핸들러 이름과 함께 로그로 남깁니다.
+#   (핸들러 이름은 ProfiledRoute 가 contextvar 에 남깁니다. async 엔진의 greenlet / 스레드풀 안에서는 스택으로 찾을 수 없음)
+# - 한 요청에서 같은 SQL 템플릿을 N_PLUS_ONE_THRESHOLD 번 넘게 실행하면 N+1 의심으로 로그를 남깁니다.
+# - 응답에 X-DB-Queries(실행 수), X-DB-Time(ms) 헤더를 붙입니다. (N+1 의심이면 X-DB-Repeated 도)
+# - 테스트에서는 모드와 상관없이 count_queries(profile=True) 로 템플릿별 횟수를 볼 수 있습니다.
+#
+#   with count_queries(profile=True) as stats:
+#       await controllers.get_chat_list_controller(request, response, db)
+#   assert not stats.repeated()
+
+DB_PROFILE = os.getenv("DB_PROFILE", "0") == "1"
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "100"))
+N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD", "5"))
+
+
+class QueryStats:
+    __slots__ = ("count", "db_time", "templates")
+
+    def __init__(self, profile: bool = False):
+        self.count = 0
+        self.db_time = 0.0
+        # 프로파일링 중일 때만 {정규화한 SQL: 실행 수}
+        self.templates = {} if profile else None
+
+    def repeated(self, threshold: int = N_PLUS_ONE_THRESHOLD) -> dict:
+        # 같은 템플릿을 threshold 번 넘게 실행한 것들 (N+1 의심)
+        return {sql: count for sql, count in (self.templates or {}).items() if count > threshold}
+
+
+_current_stats: ContextVar = ContextVar("query_stats", default=None)
+_current_endpoint: ContextVar = ContextVar("query_endpoint", default=None)
+
+
+def current_query_stats():
+    return _current_stats.get()
+
+
+def current_endpoint():
+    return _current_endpoint.get()
+
+
+# 라우터의 route_class 로 씁니다. 핸들러를 부르는 동안 엔드포인트 이름을 contextvar 에 남겨 두면
+# 의존성(get_db)과 컨트롤러, SQLAlchemy greenlet, 스레드풀까지 같은 값을 봅니다.
+class ProfiledRoute(APIRoute):
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+        name = getattr(self.endpoint, "__name__", self.name)
+
+        async def route_handler(request):
+            token = _current_endpoint.set(name)
+            try:
+                return await handler(request)
+            finally:
+                _current_endpoint.reset(token)
+
+        return route_handler
+
+
+@contextmanager
+def count_queries(profile: bool = DB_PROFILE):
+    stats = QueryStats(profile)
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+
+# 모든 엔진에 한 번만 걸립니다. (스레드풀로 넘어가도 contextvar 는 복사되므로 같은 카운터를 봅니다.)
+@event.listens_for(Engine, "before_cursor_execute")
+def _count_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.count += 1
+        if stats.templates is not None:
+            template = normalize_sql(statement)
+            stats.templates[template] = stats.templates.get(template, 0) + 1
+        # 시작 시각은 실행 컨텍스트에 붙여 둡니다. (실행마다 새로 만들어져서 실패해도 남는 게 없음)
+        if context is not None:
+            context._query_started_at = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _time_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current_stats.get()
+    started = getattr(context, "_query_started_at", None)
+    if stats is not None and started is not None:
+        elapsed = time.perf_counter() - started
+        stats.db_time += elapsed
+        if stats.templates is not None and elapsed * 1000 >= SLOW_QUERY_MS:
+            logger.warning("느린 쿼리 %.1fms [%s] %s params=%s", elapsed * 1000, _current_endpoint.get() or "?",
+                           normalize_sql(statement), parameters_shape(parameters, executemany))
+
+
+# --- 프로파일링 도우미 ---
+_STRING_LITERAL = re.compile(r"'(?:[^'\\]|\\.|'')*'")
+_PLACEHOLDER = re.compile(r"%\(\w+\)s|%s")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_VALUE_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_REPEATED_LIST = re.compile(r"\(\.\.\.\)(?:\s*,\s*\(\.\.\.\))+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=1024)
+def normalize_sql(statement: str) -> str:
+    # 값 자리는 모두 ? 로, IN (?, ?, ...) / 여러 행 VALUES 는 (...) 로 접어서 같은 모양의 문장을 하나로 묶습니다.
+    sql = _STRING_LITERAL.sub("?", statement)
+    sql = _PLACEHOLDER.sub("?", sql)
+    sql = _NUMBER_LITERAL.sub("?", sql)
+    sql = _VALUE_LIST.sub("(...)", sql)
+    sql = _REPEATED_LIST.sub("(...)", sql)
+    return _WHITESPACE.sub(" ", sql).strip()
+
+
+def parameters_shape(parameters, executemany: bool = False) -> str:
+    # 값(비밀번호 해시, 이메일 등)은 남기지 않고 이름과 타입만
+    if executemany:
+        return f"{len(parameters)} x {parameters_shape(parameters[0])}" if parameters else "[]"
+    if isinstance(parameters, dict):
+        return "{" + ", ".join(f"{key}: {type(value).__name__}" for key, value in parameters.items()) + "}"
+    if isinstance(parameters, (list, tuple)):
+        return "(" + ", ".join(type(value).__name__ for value in parameters) + ")"
+    return type(parameters).__name__
+
+
+class QueryCountMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        with count_queries() as stats:
+            if stats.templates is None:
+                await self.app(scope, receive, send)
+                return
+
+            async def profiling_send(message):
+                if message["type"] == "http.response.start":
+                    headers = MutableHeaders(raw=message["headers"])
+                    headers["X-DB-Queries"] = str(stats.count)
+                    headers["X-DB-Time"] = f"{stats.db_time * 1000:.2f}"
+                    repeated = stats.repeated()
+                    if repeated:
+                        headers["X-DB-Repeated"] = str(max(repeated.values()))
+                await send(message)
+
+            await self.app(scope, receive, profiling_send)
+
+            for sql, count in stats.repeated().items():
+                logger.warning("N+1 의심 %s %s: 같은 쿼리 %d번 실행 %s", scope["method"], scope["path"], count, sql)
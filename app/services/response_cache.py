@@ -0,0 +1,275 @@
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import orjson
+
+from app.services.connections import manager
+
+logger = logging.getLogger(__name__)
+
+RESPONSE_CACHE_BACKEND = os.getenv("RESPONSE_CACHE_BACKEND", "memory")  # memory | redis | none
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+RESPONSE_CACHE_MAX_SIZE = int(os.getenv("RESPONSE_CACHE_MAX_SIZE", "2000"))
+POST_DETAIL_CACHE_TTL = int(os.getenv("POST_DETAIL_CACHE_TTL", "30"))
+POST_LIST_CACHE_TTL = int(os.getenv("POST_LIST_CACHE_TTL", "10"))
+# 게시글 목록은 앞쪽 몇 페이지만 캐시합니다. (깊은 페이지는 히트율이 낮음)
+POST_LIST_CACHE_PAGES = int(os.getenv("POST_LIST_CACHE_PAGES", "3"))
+
+
+# --- 백엔드 ---
+class CacheBackend:
+    # 같은 프로세스 안에서만 보이는 백엔드면 True (지울 때 다른 노드에도 알려야 함)
+    process_local = False
+
+    def get(self, key):
+        raise NotImplementedError
+
+    def get_many(self, keys) -> list:
+        # 없는 키는 None
+        raise NotImplementedError
+
+    def add_many(self, values: dict, ttl) -> list:
+        # 없는 키만 values 로 채우고(SET NX), 키마다 저장되어 있는 값을 돌려줍니다.
+        raise NotImplementedError
+
+    def set(self, key, value, ttl):
+        raise NotImplementedError
+
+    def delete(self, *keys):
+        raise NotImplementedError
+
+    def incr(self, key) -> int:
+        raise NotImplementedError
+
+
+class NullCacheBackend(CacheBackend):
+    def get(self, key):
+        return None
+
+    def get_many(self, keys) -> list:
+        return [None] * len(keys)
+
+    def add_many(self, values: dict, ttl) -> list:
+        return [None] * len(values)
+
+    def set(self, key, value, ttl):
+        pass
+
+    def delete(self, *keys):
+        pass
+
+    def incr(self, key) -> int:
+        return 0
+
+
+# 프로세스 메모리 LRU (키마다 TTL)
+class MemoryCacheBackend(CacheBackend):
+    process_local = True
+
+    def __init__(self, max_size: int = RESPONSE_CACHE_MAX_SIZE):
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, tuple[object, float]]" = OrderedDict()
+        # 세대 카운터는 LRU 축출 대상이 되면 안 되므로 따로 둡니다.
+        self._counters: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def _get_locked(self, key):
+        if key in self._counters:
+            return self._counters[key]
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at and expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def _set_locked(self, key, value, ttl):
+        self._entries[key] = (value, time.monotonic() + ttl if ttl else 0)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def get(self, key):
+        with self._lock:
+            return self._get_locked(key)
+
+    def get_many(self, keys) -> list:
+        with self._lock:
+            return [self._get_locked(key) for key in keys]
+
+    def add_many(self, values: dict, ttl) -> list:
+        with self._lock:
+            stored = []
+            for key, value in values.items():
+                current = self._get_locked(key)
+                if current is None:
+                    self._set_locked(key, value, ttl)
+                    current = value
+                stored.append(current)
+            return stored
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._set_locked(key, value, ttl)
+
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+                self._counters.pop(key, None)
+
+    def incr(self, key) -> int:
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+            return self._counters[key]
+
+
+# Redis 호환 백엔드 (여러 파드가 같은 캐시를 공유)
+# aioredis 는 Python 3.11 에서 import 가 깨지고 redis-py 로 흡수되었기 때문에 redis 패키지를 씁니다.
+# Redis 가 죽어도 API 는 DB 로 계속 응답해야 하므로 모든 오류는 캐시 miss 로 취급합니다.
+class RedisCacheBackend(CacheBackend):
+    def __init__(self, url: str = REDIS_URL, prefix: str = "community:"):
+        import redis
+
+        self.client = redis.Redis.from_url(url, socket_timeout=0.2, socket_connect_timeout=0.2)
+        self.prefix = prefix
+
+    def get(self, key):
+        try:
+            raw = self.client.get(self.prefix + key)
+        except Exception:
+            logger.warning("redis get 실패: %s", key, exc_info=True)
+            return None
+        return orjson.loads(raw) if raw is not None else None
+
+    def get_many(self, keys) -> list:
+        try:
+            raws = self.client.mget([self.prefix + key for key in keys])
+        except Exception:
+            logger.warning("redis mget 실패: %s", keys, exc_info=True)
+            return [None] * len(keys)
+        return [orjson.loads(raw) if raw is not None else None for raw in raws]
+
+    def add_many(self, values: dict, ttl) -> list:
+        # SET NX 들과 MGET 을 한 파이프라인으로 보내 왕복 한 번에 끝냅니다.
+        keys = [self.prefix + key for key in values]
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            for key, value in zip(keys, values.values()):
+                pipe.set(key, orjson.dumps(value), ex=ttl or None, nx=True)
+            pipe.mget(keys)
+            raws = pipe.execute()[-1]
+        except Exception:
+            logger.warning("redis set nx 실패: %s", list(values), exc_info=True)
+            return [None] * len(values)
+        return [orjson.loads(raw) if raw is not None else None for raw in raws]
+
+    def set(self, key, value, ttl):
+        try:
+            # 응답과 같은 인코더로 저장해야 캐시 hit/miss 의 datetime 표기가 같습니다.
+            self.client.set(self.prefix + key, orjson.dumps(value), ex=ttl or None)
+        except Exception:
+            logger.warning("redis set 실패: %s", key, exc_info=True)
+
+    def delete(self, *keys):
+        try:
+            self.client.delete(*(self.prefix + key for key in keys))
+        except Exception:
+            logger.warning("redis delete 실패: %s", keys, exc_info=True)
+
+    def incr(self, key) -> int:
+        try:
+            return int(self.client.incr(self.prefix + key))
+        except Exception:
+            logger.warning("redis incr 실패: %s", key, exc_info=True)
+            return 0
+
+
+def create_backend(name: str = RESPONSE_CACHE_BACKEND) -> CacheBackend:
+    if name == "redis":
+        return RedisCacheBackend()
+    if name == "none":
+        return NullCacheBackend()
+    return MemoryCacheBackend()
+
+
+# --- 캐시 + hit/miss 카운터 ---
+class ResponseCache:
+    def __init__(self, backend: CacheBackend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        value = self.backend.get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, key, value, ttl):
+        self.backend.set(key, value, ttl)
+
+    def delete(self, *keys):
+        self.backend.delete(*keys)
+        # 메모리 백엔드는 워커마다 따로라서 다른 노드의 같은 키도 broadcast 제어 채널로 지웁니다.
+        if keys and self.backend.process_local:
+            manager.publish_control_nowait("cache.delete", keys=list(keys))
+
+    def incr(self, key):
+        self.backend.incr(key)
+        # 세대 카운터도 워커마다 따로이므로 다른 노드에서도 각자 올리게 합니다. (값은 노드마다 달라도 됨)
+        if self.backend.process_local:
+            manager.publish_control_nowait("cache.incr", key=key)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "backend": type(self.backend).__name__,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+response_cache = ResponseCache(create_backend())
+# 다른 노드에서 지운 키 (다시 퍼뜨리지 않도록 백엔드에서 바로 지움)
+manager.add_control_handler("cache.delete", lambda payload: response_cache.backend.delete(*payload["keys"]))
+manager.add_control_handler("cache.incr", lambda payload: response_cache.backend.incr(payload["key"]))
+
+
+# --- 게시글 캐시 키 / 무효화 ---
+# 목록 캐시는 키를 하나씩 지우는 대신 "피드 세대(generation)" 를 올려서 한 번에 무효화합니다.
+FEED_GENERATION_KEY = "posts:feed:generation"
+# 목록 ETag 용 버전 토큰 (app.services.etags)
+FEED_VERSION_KEY = "etag:feed"
+
+
+def post_detail_key(post_id) -> str:
+    return f"posts:detail:{post_id}"
+
+
+def post_list_key(offset, limit) -> str:
+    generation = response_cache.backend.get(FEED_GENERATION_KEY) or 0
+    return f"posts:list:{generation}:{offset}:{limit}"
+
+
+def is_cacheable_post_page(offset, limit) -> bool:
+    return offset % limit == 0 and offset // limit < POST_LIST_CACHE_PAGES
+
+
+def invalidate_feed():
+    response_cache.incr(FEED_GENERATION_KEY)
+    response_cache.delete(FEED_VERSION_KEY)
+
+
+def invalidate_post(post_id):
+    response_cache.delete(post_detail_key(post_id))
+    invalidate_feed()
@@ -0,0 +1,50 @@
+from sqlalchemy import text
+
+# 채팅 목록(GET /chats)용 방 요약 테이블 room_summary + 읽음 워터마크 관리
+# - room_summary: (room_id, user_id) 마다 마지막 메시지 / 미리보기를 들고 있다가 메시지가 쓰일 때 갱신합니다.
+# - 읽음 상태는 메시지 행(is_read)이 아니라 chat_participants.last_read_message_id 하나로 관리하고,
+#   안 읽은 수는 messages(room_id, id) 인덱스 범위(id > 워터마크)로 셉니다.
+
+PREVIEW_LENGTH = 100
+
+
+async def create_room_summaries(db, room_id, user_ids):
+    for user_id in user_ids:
+        await db.execute(text("""
+            INSERT IGNORE INTO room_summary (room_id, user_id)
+            VALUES (:room_id, :user_id)
+        """), {"room_id": room_id, "user_id": user_id})
+
+
+def apply_new_messages(db, messages, created_at):
+    # messages: [(room_id, sender_id, message_id, content), ...] (한 번에 커밋되는 묶음, id 오름차순)
+    # 방마다 마지막 메시지를 한 번만 갱신합니다. (커밋은 호출한 쪽에서)
+    last_by_room = {}
+    for room_id, sender_id, message_id, content in messages:
+        last_by_room[room_id] = (message_id, content)
+
+    db.execute(text("""
+        UPDATE room_summary
+        SET last_message_id = :message_id,
+            last_message_at = :created_at,
+            last_message_preview = :preview
+        WHERE room_id = :room_id
+    """), [
+        {"room_id": room_id, "message_id": message_id, "created_at": created_at,
+         "preview": content[:PREVIEW_LENGTH]}
+        for room_id, (message_id, content) in last_by_room.items()
+    ])
+
+
+async def advance_read_watermark(db, room_id, user_id, message_id):
+    # 워터마크는 앞으로만 움직이고, 방의 마지막 메시지(room_summary.last_message_id)를 넘지 못합니다.
+    # (클라이언트가 아직 없는 id 를 보내 앞으로 올 메시지까지 읽음 처리하는 것을 막음)
+    # 실제로 올라갔으면 새 워터마크, 아니면 None (커밋은 호출한 쪽에서)
+    result = await db.execute(text("""
+        UPDATE chat_participants cp
+        JOIN room_summary rs ON rs.room_id = cp.room_id AND rs.user_id = cp.user_id
+        SET cp.last_read_message_id = LAST_INSERT_ID(LEAST(:message_id, rs.last_message_id))
+        WHERE cp.room_id = :room_id AND cp.user_id = :user_id
+          AND cp.last_read_message_id < LEAST(:message_id, rs.last_message_id)
+    """), {"room_id": room_id, "user_id": user_id, "message_id": message_id})
+    return result.lastrowid if result.rowcount > 0 else None
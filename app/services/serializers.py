@@ -0,0 +1,31 @@
+from operator import attrgetter
+
+from fastapi import Response
+from fastapi.responses import ORJSONResponse
+
+# 목록 API 용 빠른 직렬화
+# - 행 → 출력 dict 변환은 필드 목록을 미리 컴파일한 row_mapper 로 합니다. (행마다 키를 하나씩 채우지 않음)
+# - 컨트롤러가 ORJSONResponse 를 바로 돌려주면 FastAPI 의 jsonable_encoder 를 거치지 않고
+#   orjson 이 datetime 까지 바로 ISO 8601 로 인코딩합니다.
+#
+#   POST_ROW = row_mapper(post_id="id", title="title")
+#   POST_ROW(rows)  # → [{"post_id": 1, "title": "..."}, ...]
+
+
+def row_mapper(**fields):
+    # fields: 출력 키 = SQL 결과 컬럼 이름 (2개 이상)
+    names = tuple(fields)
+    getter = attrgetter(*fields.values())
+
+    def map_rows(rows) -> list:
+        return [dict(zip(names, getter(row))) for row in rows]
+
+    return map_rows
+
+
+def json_response(content, response: Response = None, status_code: int = 200) -> ORJSONResponse:
+    # 라우트에 주입된 response 에 심어 둔 헤더(ETag 등)를 그대로 옮겨 줍니다.
+    headers = dict(response.headers) if response is not None else None
+    if headers:
+        headers.pop("content-length", None)
+    return ORJSONResponse(content, status_code=status_code, headers=headers)
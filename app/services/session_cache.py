@@ -0,0 +1,116 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import text
+
+from app.services import queries
+from app.services.connections import manager
+
+SESSION_CACHE_TTL = float(os.getenv("SESSION_CACHE_TTL", "60"))
+SESSION_CACHE_MAX_SIZE = int(os.getenv("SESSION_CACHE_MAX_SIZE", "10000"))
+
+
+# session_id -> user_id 를 프로세스 메모리에 들고 있는 TTL + LRU 캐시
+# 캐시는 워커(프로세스)마다 따로 있으므로, 로그아웃/탈퇴는 revoke_session()/revoke_user_sessions() 로
+# 다른 워커/파드의 캐시까지 broadcast 제어 채널(app/services/broadcast.py)로 비웁니다.
+# BROADCAST_BACKEND=memory 는 단일 프로세스 전용이라, 워커/파드가 여럿이면 redis 로 두어야
+# 취소된 세션이 다른 워커에서 TTL 동안 계속 인증되지 않습니다.
+class SessionCache:
+    def __init__(self, max_size: int = SESSION_CACHE_MAX_SIZE, ttl: float = SESSION_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, tuple[int, float]]" = OrderedDict()
+        # 조회는 이벤트 루프에서 하지만 /stats 같은 동기 엔드포인트는 스레드풀에서 읽으므로 락을 둡니다.
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, session_id: str):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is None:
+                self.misses += 1
+                return None
+            user_id, expires_at = entry
+            if expires_at <= now:
+                del self._entries[session_id]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(session_id)
+            self.hits += 1
+            return user_id
+
+    def set(self, session_id: str, user_id: int):
+        with self._lock:
+            self._entries[session_id] = (user_id, time.monotonic() + self.ttl)
+            self._entries.move_to_end(session_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, session_id: str):
+        with self._lock:
+            self._entries.pop(session_id, None)
+
+    def invalidate_user(self, user_id: int):
+        # 한 유저가 여러 기기에서 로그인했을 수 있으므로 해당 유저의 세션을 모두 비웁니다.
+        with self._lock:
+            stale = [sid for sid, (uid, _) in self._entries.items() if uid == user_id]
+            for sid in stale:
+                del self._entries[sid]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+            }
+
+
+session_cache = SessionCache()
+
+
+async def revoke_session(session_id: str):
+    session_cache.invalidate(session_id)
+    await manager.publish_control("session.revoke", session_id=session_id)
+
+
+async def revoke_user_sessions(user_id: int):
+    session_cache.invalidate_user(user_id)
+    await manager.publish_control("session.revoke_user", user_id=user_id)
+
+
+# 다른 노드에서 보낸 무효화
+manager.add_control_handler("session.revoke", lambda payload: session_cache.invalidate(payload["session_id"]))
+manager.add_control_handler("session.revoke_user",
+                            lambda payload: session_cache.invalidate_user(int(payload["user_id"])))
+
+
+# HTTP 요청(get_current_user_id)과 WebSocket 핸드셰이크가 같이 쓰는 세션 조회. 없으면 None
+async def lookup_session_user_id(session_id: str, db):
+    user_id = session_cache.get(session_id)
+    if user_id is not None:
+        return user_id
+
+    sql = text(queries.SESSION_USER)
+    result = (await db.execute(sql, {"session_id": session_id})).fetchone()
+    if not result:
+        return None
+
+    user_id = int(result.data)
+    session_cache.set(session_id, user_id)
+    return user_id
@@ -0,0 +1,73 @@
+import os
+from mimetypes import guess_type
+
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import StaticFiles
+
+# /static/images 전용 StaticFiles
+# 업로드 파일은 내용 해시(또는 예전 UUID) 이름이라 한 번 생긴 URL 의 내용이 바뀌지 않습니다.
+# 그래서 1년 immutable 로 내려 브라우저/ALB 가 재검증하지 않게 하고,
+# 그래도 들어오는 조건부 요청(If-None-Match)은 본문 없이 304 로 끝냅니다.
+# Range 요청은 Starlette FileResponse 가 그대로 처리합니다.
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# 미리 압축해 둔 형제 파일 (foo.svg.br, foo.svg.gz) 을 우선순위대로 찾습니다.
+PRECOMPRESSED_SUFFIXES = (("br", ".br"), ("gzip", ".gz"))
+COMPRESSIBLE_TYPES = ("text/", "application/json", "application/javascript", "image/svg+xml")
+
+
+def is_compressible(media_type: str) -> bool:
+    return media_type.startswith(COMPRESSIBLE_TYPES)
+
+
+def accepted_encodings(headers: Headers) -> set:
+    accepted = set()
+    for token in headers.get("accept-encoding", "").split(","):
+        name, _, params = token.strip().partition(";")
+        if params.replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        if name:
+            accepted.add(name.lower())
+    return accepted
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    # If-None-Match 는 약한 비교를 씁니다. (RFC 9110: 양쪽 모두 W/ 접두어를 떼고 비교)
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+
+class ImmutableStaticFiles(StaticFiles):
+    def file_response(self, full_path, stat_result, scope, status_code: int = 200) -> Response:
+        request_headers = Headers(scope=scope)
+        media_type = guess_type(str(full_path))[0] or "text/plain"
+        compressible = is_compressible(media_type)
+
+        path, encoding = full_path, None
+        if compressible:
+            accepted = accepted_encodings(request_headers)
+            for name, suffix in PRECOMPRESSED_SUFFIXES:
+                candidate = f"{full_path}{suffix}"
+                if name in accepted and os.path.isfile(candidate):
+                    path, encoding = candidate, name
+                    stat_result = os.stat(candidate)
+                    break
+
+        # 파일 이름이 곧 내용의 식별자이므로 이름+크기로 강한 ETag 를 만듭니다. (인코딩별로 구분)
+        etag = f'"{os.path.basename(full_path)}-{stat_result.st_size}{"-" + encoding if encoding else ""}"'
+        headers = {"cache-control": IMMUTABLE_CACHE_CONTROL, "etag": etag}
+        if compressible:
+            headers["vary"] = "Accept-Encoding"
+        if encoding:
+            headers["content-encoding"] = encoding
+
+        if etag_matches(request_headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
+        return FileResponse(path, status_code=status_code, stat_result=stat_result, headers=headers,
+                            media_type=media_type)
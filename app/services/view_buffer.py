@@ -0,0 +1,148 @@
+import logging
+import os
+import threading
+from collections import OrderedDict, defaultdict
+
+from sqlalchemy import text
+
+from app.db import SessionLocal
+from app.services.response_cache import invalidate_feed
+
+logger = logging.getLogger(__name__)
+
+VIEW_FLUSH_INTERVAL = float(os.getenv("VIEW_FLUSH_INTERVAL", "5"))
+VIEW_FLUSH_SIZE = int(os.getenv("VIEW_FLUSH_SIZE", "500"))
+VIEW_SEEN_MAX_SIZE = int(os.getenv("VIEW_SEEN_MAX_SIZE", "100000"))
+
+
+# 게시글 조회 기록을 메모리에 모았다가 주기적으로(또는 일정 개수가 쌓이면) 한 번에 DB에 쓰는 버퍼
+# - 같은 (user, post) 는 버퍼 안에서 한 번만 남고, 이미 반영된 쌍은 _seen 에 기억해 다시 쌓지 않습니다.
+# - views 의 (user_id, post_id) 유니크 인덱스 + INSERT IGNORE 로 다른 워커/파드와 겹쳐도 중복 집계되지 않습니다.
+class ViewBuffer:
+    def __init__(self, session_factory=SessionLocal, flush_interval: float = VIEW_FLUSH_INTERVAL,
+                 flush_size: int = VIEW_FLUSH_SIZE, seen_max_size: int = VIEW_SEEN_MAX_SIZE):
+        self.session_factory = session_factory
+        self.flush_interval = flush_interval
+        self.flush_size = flush_size
+        self.seen_max_size = seen_max_size
+        # DB 장애로 flush 가 계속 실패할 때 메모리가 끝없이 늘지 않도록 상한을 둡니다.
+        self.max_pending = flush_size * 20
+
+        self._pending: set[tuple[int, int]] = set()
+        self._seen: "OrderedDict[tuple[int, int], None]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._thread = None
+
+        self.recorded = 0
+        self.deduplicated = 0
+        self.dropped = 0
+        self.flushes = 0
+        self.inserted_rows = 0
+        self.errors = 0
+
+    def record(self, user_id: int, post_id: int):
+        key = (user_id, post_id)
+        with self._lock:
+            if key in self._pending or key in self._seen:
+                self.deduplicated += 1
+                return
+            if len(self._pending) >= self.max_pending:
+                self.dropped += 1
+                return
+            self._pending.add(key)
+            self.recorded += 1
+            if len(self._pending) >= self.flush_size:
+                self._wake.set()
+
+    def flush(self) -> int:
+        # 주기 스레드와 종료 시 flush 가 겹치지 않도록 한 번에 하나만 실행합니다.
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, set()
+            if not batch:
+                return 0
+
+            by_post = defaultdict(list)
+            for user_id, post_id in batch:
+                by_post[post_id].append(user_id)
+
+            db = self.session_factory()
+            try:
+                increments = []
+                for post_id, user_ids in by_post.items():
+                    # 게시글별 multi-row INSERT IGNORE -> rowcount 가 실제로 새로 들어간 조회 수
+                    values = ", ".join(f"(:u{i}, :pid)" for i in range(len(user_ids)))
+                    params = {f"u{i}": uid for i, uid in enumerate(user_ids)}
+                    params["pid"] = post_id
+                    result = db.execute(text(f"INSERT IGNORE INTO views (user_id, post_id) VALUES {values}"), params)
+                    if result.rowcount:
+                        increments.append({"n": result.rowcount, "pid": post_id})
+
+                if increments:
+                    db.execute(text("UPDATE posts SET views_count = COALESCE(views_count, 0) + :n WHERE id = :pid"),
+                               increments)
+                db.commit()
+            except Exception:
+                db.rollback()
+                self.errors += 1
+                logger.exception("조회수 버퍼 flush 실패 (%d건 재시도 대기)", len(batch))
+                with self._lock:
+                    self._pending |= batch
+                return 0
+            finally:
+                db.close()
+
+            inserted = sum(item["n"] for item in increments)
+            # 목록에 나가는 조회수가 바뀌었으므로 피드 캐시/ETag 토큰을 넘깁니다. (커밋 후, 실제로 늘어난 경우만)
+            if inserted:
+                invalidate_feed()
+            with self._lock:
+                for key in batch:
+                    self._seen[key] = None
+                    self._seen.move_to_end(key)
+                while len(self._seen) > self.seen_max_size:
+                    self._seen.popitem(last=False)
+                self.flushes += 1
+                self.inserted_rows += inserted
+            return inserted
+
+    def _run(self):
+        while not self._stopping.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="view-buffer-flusher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        # 종료 시 남은 조회 기록을 모두 반영합니다.
+        self._stopping.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout=self.flush_interval + 5)
+            self._thread = None
+        self.flush()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "pending": len(self._pending),
+                "seen": len(self._seen),
+                "recorded": self.recorded,
+                "deduplicated": self.deduplicated,
+                "dropped": self.dropped,
+                "flushes": self.flushes,
+                "inserted_rows": self.inserted_rows,
+                "errors": self.errors,
+            }
+
+
+view_buffer = ViewBuffer()
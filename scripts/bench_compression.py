@@ -0,0 +1,74 @@
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+import orjson
+
+from app.services.compression import _BrotliEncoder, _GzipEncoder, brotli, GZIP_LEVEL, BROTLI_QUALITY
+
+# 응답 크기별 압축률 / CPU 비용 (CompressionMiddleware 와 같은 인코더)
+# 게시글 목록과 비슷한 JSON 을 크기별로 만들어 gzip 레벨, brotli 품질마다 잽니다.
+#
+#   python -m scripts.bench_compression --sizes 1k,10k,100k,1m --repeat 20
+
+
+def _post(i: int) -> dict:
+    created = datetime(2026, 1, 1) + timedelta(minutes=i)
+    return {
+        "post_id": i, "user_id": random.randint(1, 500), "title": f"게시글 제목 {i}",
+        "contents": "동물의 숲 무 가격 공유합니다. " * random.randint(1, 8),
+        "image": f"/static/images/{random.getrandbits(128):032x}.jpg",
+        "likes": random.randint(0, 300), "comments": random.randint(0, 50), "views": random.randint(0, 5000),
+        "created_at": created.isoformat(), "author_nickname": f"user{i % 97}",
+        "author_profile_image": f"/static/images/{random.getrandbits(128):032x}.png",
+    }
+
+
+def payload(size: int) -> bytes:
+    posts, body = [], b"{}"
+    while len(body) < size:
+        posts.append(_post(len(posts)))
+        body = orjson.dumps({"posts": posts, "next_cursor": None})
+    return body
+
+
+def parse_size(text: str) -> int:
+    units = {"k": 1024, "m": 1024 * 1024}
+    text = text.strip().lower()
+    return int(float(text[:-1]) * units[text[-1]]) if text[-1] in units else int(text)
+
+
+def measure(make_encoder, body: bytes, repeat: int):
+    compressed = b""
+    started = time.thread_time()
+    for _ in range(repeat):
+        encoder = make_encoder()
+        compressed = encoder.compress(body) + encoder.flush()
+    cpu = (time.thread_time() - started) / repeat
+    return len(compressed) / len(body), cpu
+
+
+def main(sizes, repeat: int):
+    encoders = [(f"gzip-{level}", lambda level=level: _GzipEncoder(level)) for level in sorted({1, GZIP_LEVEL, 9})]
+    if brotli is not None:
+        encoders += [(f"br-{q}", lambda q=q: _BrotliEncoder(q)) for q in sorted({1, BROTLI_QUALITY, 11})]
+    else:
+        print("brotli 가 설치되어 있지 않아 gzip 만 잽니다. (pip install .[brotli])")
+
+    print(f"{'size':>8} {'encoder':>8} {'ratio':>7} {'cpu/resp':>10} {'MB/s':>8}")
+    for size in sizes:
+        body = payload(size)
+        for name, make_encoder in encoders:
+            ratio, cpu = measure(make_encoder, body, repeat)
+            throughput = len(body) / cpu / (1024 * 1024) if cpu else float("inf")
+            print(f"{len(body):>8} {name:>8} {ratio:>7.3f} {cpu * 1000:>8.3f}ms {throughput:>8.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="compression ratio and CPU per payload size")
+    parser.add_argument("--sizes", default="500,1k,10k,100k,1m", help="쉼표로 구분한 응답 크기 (k/m 단위 가능)")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    random.seed(0)
+    main([parse_size(size) for size in args.sizes.split(",")], args.repeat)
@@ -0,0 +1,77 @@
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+# DB_ASYNC=1(aiomysql async 엔진) vs DB_ASYNC=0(pymysql 동기 세션 + 스레드풀) 비교
+# DB_ASYNC 는 import 때 읽으므로 모드마다 자식 프로세스를 따로 띄웁니다.
+# 응답 캐시는 꺼서(RESPONSE_CACHE_BACKEND=none) 매 요청이 실제로 DB 를 타게 합니다.
+# DB_HOST 등 DB 환경 변수가 필요합니다.
+#
+#   python -m scripts.bench_db_async --concurrency 100 --rounds 5 --path "/posts?limit=20"
+
+
+async def _run(concurrency: int, rounds: int, path: str):
+    import httpx
+    from app.main import app
+    from app.db import async_engine
+
+    transport = httpx.ASGITransport(app=app)
+    latencies = []
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def one():
+            started = time.perf_counter()
+            response = await client.get(path)
+            assert response.status_code == 200, response.text
+            return time.perf_counter() - started
+
+        # 풀 커넥션을 미리 채우고 잽니다.
+        await asyncio.gather(*(client.get(path) for _ in range(min(concurrency, 10))))
+        started = time.perf_counter()
+        for _ in range(rounds):
+            latencies += await asyncio.gather(*(one() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    if async_engine is not None:
+        await async_engine.dispose()
+    return {"latencies": sorted(latencies), "elapsed": elapsed}
+
+
+def _child(args):
+    result = asyncio.run(_run(args.concurrency, args.rounds, args.path))
+    print(json.dumps(result))
+
+
+def _report(name, result):
+    latencies = result["latencies"]
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(f"{name:<6} p50={statistics.median(latencies) * 1000:8.1f}ms  p95={p95 * 1000:8.1f}ms  "
+          f"max={latencies[-1] * 1000:8.1f}ms  throughput={len(latencies) / result['elapsed']:8.1f} req/s")
+
+
+def main(args):
+    for name, flag in (("sync", "0"), ("async", "1")):
+        env = {**os.environ, "DB_ASYNC": flag, "RESPONSE_CACHE_BACKEND": "none"}
+        output = subprocess.run(
+            [sys.executable, "-m", "scripts.bench_db_async", "--child",
+             "--concurrency", str(args.concurrency), "--rounds", str(args.rounds), "--path", args.path],
+            env=env, check=True, capture_output=True, text=True,
+        ).stdout
+        _report(name, json.loads(output.strip().splitlines()[-1]))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="DB_ASYNC=1 vs DB_ASYNC=0 request latency")
+    parser.add_argument("--concurrency", type=int, default=50, help="동시에 보내는 요청 수")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--path", default="/posts?limit=20")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        _child(args)
+    else:
+        main(args)
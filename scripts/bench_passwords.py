@@ -0,0 +1,74 @@
+import argparse
+import asyncio
+import statistics
+import time
+
+import bcrypt
+
+from app.services.passwords import PasswordHasher, BCRYPT_ROUNDS
+
+# 로그인 폭주 때 bcrypt 를 이벤트 루프에서 바로 돌릴 때(inline)와 프로세스 풀(PasswordHasher)에 맡길 때 비교
+# - login p50/p95/max: 동시에 들어온 로그인 요청 하나가 끝나기까지 걸린 시간
+# - loop lag max: 같은 시간 동안 다른 요청(이벤트 루프)이 최대 얼마나 밀렸는지
+#
+#   python -m scripts.bench_passwords --logins 64 --rounds 12
+
+
+async def _measure(verify, logins: int, hashed: bytes):
+    lags = []
+    stop = asyncio.Event()
+
+    async def ticker():
+        # 10ms 마다 깨어나야 하는 태스크가 실제로 얼마나 늦게 깨어나는지
+        while not stop.is_set():
+            started = time.perf_counter()
+            await asyncio.sleep(0.01)
+            lags.append(time.perf_counter() - started - 0.01)
+
+    async def login():
+        started = time.perf_counter()
+        assert await verify(b"correct horse battery staple", hashed)
+        return time.perf_counter() - started
+
+    tick_task = asyncio.create_task(ticker())
+    await asyncio.sleep(0.05)
+    started = time.perf_counter()
+    latencies = await asyncio.gather(*(login() for _ in range(logins)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await tick_task
+    return sorted(latencies), max(lags, default=0.0), elapsed
+
+
+def _report(name, latencies, lag, elapsed):
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(f"{name:<8} login p50={statistics.median(latencies) * 1000:8.1f}ms  p95={p95 * 1000:8.1f}ms  "
+          f"max={latencies[-1] * 1000:8.1f}ms  loop lag max={lag * 1000:8.1f}ms  total={elapsed:6.2f}s")
+
+
+async def main(logins: int, rounds: int, workers: int):
+    hashed = bcrypt.hashpw(b"correct horse battery staple", bcrypt.gensalt(rounds))
+
+    async def inline_verify(password, hashed_password):
+        return bcrypt.checkpw(password, hashed_password)
+
+    hasher = PasswordHasher(rounds=rounds, workers=workers, max_pending=logins)
+
+    async def pool_verify(password, hashed_password):
+        return await hasher.verify_password(password.decode(), hashed_password.decode())
+
+    # 프로세스 기동 비용은 빼고 잽니다.
+    await asyncio.gather(*(pool_verify(b"correct horse battery staple", hashed) for _ in range(workers)))
+
+    _report("inline", *await _measure(inline_verify, logins, hashed))
+    _report("pool", *await _measure(pool_verify, logins, hashed))
+    hasher.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="bcrypt inline vs process pool login latency")
+    parser.add_argument("--logins", type=int, default=32, help="동시에 들어오는 로그인 수")
+    parser.add_argument("--rounds", type=int, default=BCRYPT_ROUNDS)
+    parser.add_argument("--workers", type=int, default=PasswordHasher().workers)
+    args = parser.parse_args()
+    asyncio.run(main(args.logins, args.rounds, args.workers))
@@ -0,0 +1,85 @@
+import argparse
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse
+
+from app.services.controllers import POST_LIST_ROW, MESSAGE_ROW
+
+# 목록 응답 직렬화 비교: 예전 경로(행마다 dict 채우기 + jsonable_encoder + json) vs
+# 지금 경로(row_mapper + ORJSONResponse)
+# 게시글 100개 페이지, 메시지 1,000개 두 가지를 잽니다. (DB 없이 같은 모양의 행으로)
+#
+#   python -m scripts.bench_serialization --repeat 500
+
+PostRow = namedtuple("PostRow", "id user_id title contents image_url likes_count views_count comments_count "
+                                "created_at author_nickname author_profile_image")
+MessageRow = namedtuple("MessageRow", "id sender_id content created_at")
+
+
+def post_rows(n: int):
+    start = datetime(2026, 1, 1)
+    return [PostRow(i, i % 50, f"게시글 {i}", "내용 " * 20, f"/static/images/{i:032x}.jpg", i % 30, i * 3, i % 7,
+                    start + timedelta(minutes=i), f"user{i % 50}", f"/static/images/{i:032x}.png")
+            for i in range(n)]
+
+
+def message_rows(n: int):
+    start = datetime(2026, 1, 1)
+    return [MessageRow(i, i % 2, f"메시지 {i}", start + timedelta(seconds=i)) for i in range(n)]
+
+
+def legacy_posts(rows) -> bytes:
+    results = []
+    for p in rows:
+        results.append({
+            "post_id": p.id, "user_id": p.user_id, "title": p.title, "contents": p.contents,
+            "image": p.image_url, "likes": p.likes_count, "comments": p.comments_count, "views": p.views_count,
+            "created_at": str(p.created_at), "author_nickname": p.author_nickname,
+            "author_profile_image": p.author_profile_image,
+        })
+    return JSONResponse(jsonable_encoder({"posts": results})).body
+
+
+def legacy_messages(rows) -> bytes:
+    results = [{"id": m.id, "sender_id": m.sender_id, "content": m.content, "created_at": m.created_at,
+                "is_read": 0} for m in rows]
+    return JSONResponse(jsonable_encoder({"messages": results})).body
+
+
+def fast_posts(rows) -> bytes:
+    return ORJSONResponse({"posts": POST_LIST_ROW(rows), "next_cursor": None}).body
+
+
+def fast_messages(rows) -> bytes:
+    results = MESSAGE_ROW(rows)
+    for item in results:
+        item["is_read"] = 0
+    return ORJSONResponse({"messages": results, "next_before_id": None}).body
+
+
+def timeit(fn, rows, repeat: int) -> float:
+    fn(rows)
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn(rows)
+    return (time.perf_counter() - started) / repeat
+
+
+def main(repeat: int):
+    cases = [
+        ("100 posts", post_rows(100), legacy_posts, fast_posts),
+        ("1000 messages", message_rows(1000), legacy_messages, fast_messages),
+    ]
+    print(f"{'payload':<14} {'legacy':>10} {'orjson':>10} {'speedup':>8}")
+    for name, rows, legacy, fast in cases:
+        before, after = timeit(legacy, rows, repeat), timeit(fast, rows, repeat)
+        print(f"{name:<14} {before * 1000:>8.3f}ms {after * 1000:>8.3f}ms {before / after:>7.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="list response serialization timing")
+    parser.add_argument("--repeat", type=int, default=200)
+    main(parser.parse_args().repeat)
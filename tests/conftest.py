@@ -0,0 +1,100 @@
+import asyncio
+import os
+import uuid
+
+import pytest
+from sqlalchemy import text
+
+# MySQL 이 필요한 테스트는 DB_HOST 가 설정되어 있을 때만 돕니다.
+# 스키마는 미리 `python -m app.migrate` 로 만들어 두고, 테스트가 만든 행은 끝나면 지웁니다.
+requires_db = pytest.mark.skipif(not os.getenv("DB_HOST"), reason="DB_HOST 가 없어 MySQL 테스트를 건너뜁니다.")
+
+
+def run_async(coro):
+    # aiomysql 커넥션은 만든 이벤트 루프에 묶이므로, 루프를 닫기 전에 async 풀을 비웁니다.
+    from app.db import async_engine
+
+    async def main():
+        try:
+            return await coro
+        finally:
+            if async_engine is not None:
+                await async_engine.dispose()
+
+    return asyncio.run(main())
+
+
+class Seed:
+    def __init__(self, engine):
+        self.engine = engine
+        self.user_ids = []
+        self.post_ids = []
+        self.room_ids = []
+
+    def user(self) -> tuple[int, str]:
+        # (user_id, session_id)
+        tag = uuid.uuid4().hex[:10]
+        session_id = str(uuid.uuid4())
+        with self.engine.begin() as conn:
+            user_id = conn.execute(text("""
+                INSERT INTO users (nickname, email, image_url, password)
+                VALUES (:nickname, :email, '', 'x')
+            """), {"nickname": tag, "email": f"{tag}@test.local"}).lastrowid
+            conn.execute(text("INSERT INTO sessions (session_id, expires, data) VALUES (:sid, 0, :uid)"),
+                         {"sid": session_id, "uid": str(user_id)})
+        self.user_ids.append(user_id)
+        return user_id, session_id
+
+    def post(self, user_id: int) -> int:
+        with self.engine.begin() as conn:
+            post_id = conn.execute(text("""
+                INSERT INTO posts (user_id, title, contents, image_url, likes_count, views_count, comments_count)
+                VALUES (:uid, 'test', 'test', '', 0, 0, 0)
+            """), {"uid": user_id}).lastrowid
+        self.post_ids.append(post_id)
+        return post_id
+
+    def room(self, *user_ids, messages: int = 0) -> int:
+        # 참여자 + room_summary + 메시지 messages 개 (보낸 사람은 참여자 순서대로 돌아가며)
+        with self.engine.begin() as conn:
+            room_id = conn.execute(text("INSERT INTO chat_rooms () VALUES ()")).lastrowid
+            conn.execute(text("INSERT INTO chat_participants (room_id, user_id, last_read_message_id) "
+                              "VALUES (:rid, :uid, 0)"), [{"rid": room_id, "uid": uid} for uid in user_ids])
+            conn.execute(text("INSERT INTO room_summary (room_id, user_id) VALUES (:rid, :uid)"),
+                         [{"rid": room_id, "uid": uid} for uid in user_ids])
+            for i in range(messages):
+                message_id = conn.execute(text("""
+                    INSERT INTO messages (room_id, sender_id, content) VALUES (:rid, :uid, :content)
+                """), {"rid": room_id, "uid": user_ids[i % len(user_ids)], "content": f"message {i}"}).lastrowid
+                conn.execute(text("""
+                    UPDATE room_summary SET last_message_id = :mid, last_message_at = NOW(),
+                                            last_message_preview = :content
+                    WHERE room_id = :rid
+                """), {"mid": message_id, "rid": room_id, "content": f"message {i}"})
+        self.room_ids.append(room_id)
+        return room_id
+
+    def cleanup(self):
+        with self.engine.begin() as conn:
+            for room_id in self.room_ids:
+                for table in ("messages", "chat_participants", "room_summary"):
+                    conn.execute(text(f"DELETE FROM {table} WHERE room_id = :rid"), {"rid": room_id})
+                conn.execute(text("DELETE FROM chat_rooms WHERE id = :rid"), {"rid": room_id})
+            for post_id in self.post_ids:
+                for table in ("likes", "views", "comments"):
+                    conn.execute(text(f"DELETE FROM {table} WHERE post_id = :pid"), {"pid": post_id})
+                conn.execute(text("DELETE FROM posts WHERE id = :pid"), {"pid": post_id})
+            for user_id in self.user_ids:
+                conn.execute(text("DELETE FROM sessions WHERE data = :uid"), {"uid": str(user_id)})
+                conn.execute(text("DELETE FROM users WHERE id = :uid"), {"uid": user_id})
+
+
+@pytest.fixture
+def seed():
+    from app.db import engine
+
+    helper = Seed(engine)
+    try:
+        yield helper
+    finally:
+        helper.cleanup()
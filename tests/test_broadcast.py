@@ -0,0 +1,112 @@
+import asyncio
+import json
+
+from app.services.broadcast import MemoryBroker, MemoryBroadcastBackend
+from app.services.connections import ConnectionManager
+
+# 파드 두 개를 ConnectionManager 두 개로 흉내내고, 둘이 같은 가짜 브로커(MemoryBroker)를 나눠 씁니다.
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.sent: list[str] = []
+        self.closed_with = None
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, message: str):
+        self.sent.append(message)
+
+    async def close(self, code: int = 1000):
+        self.closed_with = code
+
+
+def two_nodes():
+    broker = MemoryBroker()
+    return (ConnectionManager(backend=MemoryBroadcastBackend(broker)),
+            ConnectionManager(backend=MemoryBroadcastBackend(broker)))
+
+
+async def wait_for(predicate, timeout: float = 1.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        assert asyncio.get_running_loop().time() < deadline, "timed out"
+        await asyncio.sleep(0.01)
+
+
+def test_message_published_on_one_node_is_delivered_on_the_other():
+    async def scenario():
+        node_a, node_b = two_nodes()
+        await node_a.start()
+        await node_b.start()
+        sender, recipient = FakeWebSocket(), FakeWebSocket()
+        await node_a.connect(1, sender)
+        await node_b.connect(1, recipient)
+
+        message = json.dumps({"type": "message", "id": 10, "room_id": 1, "content": "hi"})
+        await node_a.publish(1, message)
+
+        await wait_for(lambda: recipient.sent and sender.sent)
+        assert recipient.sent == [message]
+        assert sender.sent == [message]
+        await node_a.stop()
+        await node_b.stop()
+
+    asyncio.run(scenario())
+
+
+def test_node_without_the_room_does_not_receive_it():
+    async def scenario():
+        node_a, node_b = two_nodes()
+        await node_a.start()
+        await node_b.start()
+        elsewhere = FakeWebSocket()
+        await node_b.connect(2, elsewhere)
+
+        await node_a.publish(1, json.dumps({"id": 11, "room_id": 1}))
+        await asyncio.sleep(0.05)
+        assert elsewhere.sent == []
+
+        # 마지막 소켓이 나가면 그 노드는 구독을 끊습니다.
+        node_b.disconnect(2, elsewhere)
+        await asyncio.sleep(0.05)
+        await node_a.publish(2, json.dumps({"id": 12, "room_id": 2}))
+        await asyncio.sleep(0.05)
+        assert elsewhere.sent == []
+
+    asyncio.run(scenario())
+
+
+def test_duplicate_delivery_is_sent_once():
+    async def scenario():
+        node_a, node_b = two_nodes()
+        await node_a.start()
+        await node_b.start()
+        recipient = FakeWebSocket()
+        await node_b.connect(1, recipient)
+
+        message = json.dumps({"id": 13, "room_id": 1})
+        await node_a.publish(1, message)
+        await node_a.publish(1, message)
+
+        await wait_for(lambda: recipient.sent)
+        await asyncio.sleep(0.05)
+        assert recipient.sent == [message]
+        assert node_b.duplicate_messages == 1
+
+    asyncio.run(scenario())
+
+
+def test_control_message_reaches_every_node():
+    async def scenario():
+        node_a, node_b = two_nodes()
+        received = []
+        node_b.add_control_handler("session.revoke", received.append)
+        await node_a.start()
+        await node_b.start()
+
+        await node_a.publish_control("session.revoke", session_id="abc")
+        assert received == [{"session_id": "abc"}]
+
+    asyncio.run(scenario())
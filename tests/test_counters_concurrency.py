@@ -0,0 +1,73 @@
+import asyncio
+import os
+
+import httpx
+from sqlalchemy import text
+
+from app.main import app
+from app.services.view_buffer import view_buffer
+from tests.conftest import requires_db, run_async
+
+# 좋아요/조회수 카운터를 동시에 N 번 올렸을 때 정확히 N 이 되는지 (잃어버린 갱신이 없는지)
+CONCURRENCY = int(os.getenv("COUNTER_TEST_CONCURRENCY", "30"))
+
+pytestmark = requires_db
+
+
+async def _fire(method, url, session_ids):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        return await asyncio.gather(*(
+            client.request(method, url, headers={"Authorization": f"Bearer {sid}"}) for sid in session_ids
+        ))
+
+
+def _post_counts(seed, post_id):
+    with seed.engine.connect() as conn:
+        return conn.execute(text("SELECT likes_count, views_count FROM posts WHERE id = :pid"),
+                            {"pid": post_id}).one()
+
+
+def test_concurrent_likes_count_exactly(seed):
+    author_id, _ = seed.user()
+    post_id = seed.post(author_id)
+    session_ids = [seed.user()[1] for _ in range(CONCURRENCY)]
+
+    responses = run_async(_fire("POST", f"/posts/{post_id}/like", session_ids))
+    assert all(r.status_code == 200 for r in responses), [r.text for r in responses if r.status_code != 200]
+    assert all(r.json()["is_liked"] for r in responses)
+    # LAST_INSERT_ID(expr) 로 돌려받은 값은 행 잠금 순서대로 1..N 이 하나씩이어야 합니다.
+    assert sorted(r.json()["likes_count"] for r in responses) == list(range(1, CONCURRENCY + 1))
+    assert _post_counts(seed, post_id).likes_count == CONCURRENCY
+
+    # 모두 한 번 더 누르면(취소) 0
+    responses = run_async(_fire("POST", f"/posts/{post_id}/like", session_ids))
+    assert not any(r.json()["is_liked"] for r in responses)
+    assert sorted(r.json()["likes_count"] for r in responses) == list(range(CONCURRENCY))
+    assert _post_counts(seed, post_id).likes_count == 0
+
+
+def test_same_user_double_like_counts_once(seed):
+    author_id, _ = seed.user()
+    post_id = seed.post(author_id)
+    _, session_id = seed.user()
+
+    # 같은 유저의 토글이 동시에 여러 번 들어와도 카운트는 실제 likes 행 수와 같아야 합니다.
+    run_async(_fire("POST", f"/posts/{post_id}/like", [session_id] * 5))
+    with seed.engine.connect() as conn:
+        rows = conn.execute(text("SELECT COUNT(*) FROM likes WHERE post_id = :pid"), {"pid": post_id}).scalar()
+    assert _post_counts(seed, post_id).likes_count == rows
+
+
+def test_concurrent_views_count_exactly(seed):
+    author_id, _ = seed.user()
+    post_id = seed.post(author_id)
+    session_ids = [seed.user()[1] for _ in range(CONCURRENCY)]
+
+    # 같은 유저가 두 번 봐도 한 번만 집계됩니다.
+    for _ in range(2):
+        responses = run_async(_fire("GET", f"/posts/{post_id}", session_ids))
+        assert all(r.status_code == 200 for r in responses)
+        view_buffer.flush()
+
+    assert _post_counts(seed, post_id).views_count == CONCURRENCY
@@ -0,0 +1,126 @@
+import asyncio
+import json
+
+from fastapi import FastAPI, Request, Response
+from fastapi.testclient import TestClient
+
+from app.services.connections import manager
+from app.services.etags import bump_versions, conditional_response, current_versions, make_etag
+from app.services.response_cache import (response_cache, invalidate_feed, post_list_key,
+    FEED_GENERATION_KEY, FEED_VERSION_KEY)
+from app.services.static_files import etag_matches
+from app.services.view_buffer import ViewBuffer
+
+KEY = "etag:test:items"
+
+app = FastAPI()
+
+
+@app.get("/items")
+def items(request: Request, response: Response):
+    not_modified = conditional_response(request, response, [KEY], "items")
+    if not_modified:
+        return not_modified
+    return {"items": [1, 2, 3]}
+
+
+client = TestClient(app)
+
+
+def test_weak_etag_round_trip_is_304():
+    first = client.get("/items")
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+    assert etag.startswith('W/"')
+
+    # 받은 ETag 를 그대로 돌려보내면 304
+    second = client.get("/items", headers={"If-None-Match": etag})
+    assert second.status_code == 304
+    assert second.headers["etag"] == etag
+
+
+def test_bump_changes_the_etag():
+    etag = client.get("/items").headers["etag"]
+    bump_versions(KEY)
+    response = client.get("/items", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+
+
+def test_weak_comparison_ignores_prefix_on_both_sides():
+    etag = make_etag("a")
+    assert etag_matches(etag, etag)
+    assert etag_matches(etag.removeprefix("W/"), etag)
+    assert etag_matches(f'"x", {etag}', etag)
+    assert etag_matches(f"W/{etag.removeprefix('W/')}", etag.removeprefix("W/"))
+    assert not etag_matches('W/"other"', etag)
+
+
+def test_versions_are_created_once_and_reused():
+    keys = [f"{KEY}:a", f"{KEY}:b"]
+    bump_versions(*keys)
+    created = current_versions(keys)
+    assert created is not None and len(set(created)) == 2
+    assert current_versions(keys) == created
+
+
+def test_bump_from_another_node_drops_the_local_token():
+    before = current_versions([KEY])
+    # 다른 워커가 같은 키를 bump 하면 제어 채널로 이 메시지가 들어옵니다.
+    asyncio.run(manager._dispatch_control(json.dumps({"kind": "cache.delete", "keys": [KEY]})))
+    assert response_cache.backend.get(KEY) is None
+    assert current_versions([KEY]) != before
+
+
+
+def test_feed_invalidation_reaches_other_nodes(monkeypatch):
+    published = []
+    monkeypatch.setattr(manager, "publish_control_nowait", lambda kind, **payload: published.append(kind))
+    invalidate_feed()
+    # 목록 캐시 세대와 피드 토큰 둘 다 다른 워커로 나가야 합니다.
+    assert sorted(published) == ["cache.delete", "cache.incr"]
+
+
+def test_generation_bump_from_another_node_moves_the_list_key():
+    before = post_list_key(0, 10)
+    asyncio.run(manager._dispatch_control(json.dumps({"kind": "cache.incr", "key": FEED_GENERATION_KEY})))
+    assert post_list_key(0, 10) != before
+
+
+class FakeResult:
+    def __init__(self, rowcount):
+        self.rowcount = rowcount
+
+
+class FakeSession:
+    # INSERT IGNORE 가 rowcount 행을 넣었다고 돌려주는 세션
+    def __init__(self, rowcount):
+        self.rowcount = rowcount
+
+    def execute(self, *args, **kwargs):
+        return FakeResult(self.rowcount)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def test_feed_token_only_changes_when_views_are_flushed():
+    before = current_versions([FEED_VERSION_KEY])
+    # 시간이 지나도 피드가 그대로면 토큰(=ETag)도 그대로
+    assert current_versions([FEED_VERSION_KEY]) == before
+
+    already_seen = ViewBuffer(session_factory=lambda: FakeSession(0))
+    already_seen.record(1, 1)
+    assert already_seen.flush() == 0
+    assert current_versions([FEED_VERSION_KEY]) == before
+
+    new_views = ViewBuffer(session_factory=lambda: FakeSession(1))
+    new_views.record(1, 1)
+    assert new_views.flush() == 1
+    assert current_versions([FEED_VERSION_KEY]) != before
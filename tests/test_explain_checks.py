@@ -0,0 +1,16 @@
+from sqlalchemy import text
+
+from app.migrate import EXPLAIN_CHECKS
+from app.services import queries
+
+# --explain 이 컨트롤러와 같은 쿼리 문자열을 보고, 자리표시자를 빠짐없이 채우는지
+
+
+def test_every_shared_query_is_explained():
+    shared = {value for name, value in vars(queries).items() if name.isupper() and name != "POST_LIST_COLUMNS"}
+    assert shared == {sql for _, sql, _ in EXPLAIN_CHECKS}
+
+
+def test_example_params_fill_every_placeholder():
+    for name, sql, params in EXPLAIN_CHECKS:
+        assert set(text(sql)._bindparams) == set(params), name
@@ -0,0 +1,38 @@
+import io
+import os
+
+from fastapi import UploadFile
+
+from app.services import images
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"x" * 4096
+
+
+def test_upload_is_written_next_to_its_final_name(tmp_path, monkeypatch):
+    storage = images.LocalStorage(root=str(tmp_path))
+    monkeypatch.setattr(images, "storage", storage)
+    replaced = []
+    real_replace = os.replace
+
+    def recording_replace(src, dst):
+        replaced.append((os.path.dirname(src), os.path.dirname(dst)))
+        real_replace(src, dst)
+
+    monkeypatch.setattr(images.os, "replace", recording_replace)
+
+    url = images.save_image(UploadFile(file=io.BytesIO(PNG), filename="a.png"))
+
+    # 임시 파일이 저장소와 같은 디렉터리에 있어야 os.replace 가 원자적 rename 이 됩니다.
+    assert replaced == [(str(tmp_path), str(tmp_path))]
+    name = url.removeprefix(images.IMAGE_URL_PREFIX)
+    assert os.listdir(tmp_path) == [name]
+    assert (tmp_path / name).read_bytes() == PNG
+    assert oct(os.stat(tmp_path / name).st_mode & 0o777) == oct(0o644)
+
+
+def test_same_content_is_stored_once(tmp_path, monkeypatch):
+    monkeypatch.setattr(images, "storage", images.LocalStorage(root=str(tmp_path)))
+    first = images.save_image(UploadFile(file=io.BytesIO(PNG), filename="a.png"))
+    second = images.save_image(UploadFile(file=io.BytesIO(PNG), filename="b.png"))
+    assert first == second
+    assert len(os.listdir(tmp_path)) == 1
@@ -0,0 +1,27 @@
+import pytest
+
+from app.services.image_variants import VARIANT_NAME_RE, find_source
+
+
+@pytest.mark.parametrize("original", [
+    "16aeac7c-a62a-4c29-8233-360641321a05_KakaoTalk_20251229_094540111.jpg",
+    "e02a575f-6453-40be-adfa-c528609a239e_스크린샷 2026-01-29 154335.png",
+    "9f86d081884c7d659a2feaa0c55ad015a3bf4f1b2b0b822cd15d6c15b0f00a08.webp",
+    "photo.v2_thumb.jpg",
+])
+@pytest.mark.parametrize("variant", ["thumb", "medium"])
+def test_variant_name_resolves_to_the_original_on_disk(tmp_path, original, variant):
+    (tmp_path / original).write_bytes(b"x")
+    stem = original.rsplit(".", 1)[0]
+
+    match = VARIANT_NAME_RE.match(f"{stem}_{variant}.webp")
+
+    assert match is not None
+    assert find_source(str(tmp_path), match.group(1)) == str(tmp_path / original)
+
+
+def test_unknown_or_hidden_stems_have_no_source(tmp_path):
+    (tmp_path / ".upload-abc.png").write_bytes(b"x")
+    assert find_source(str(tmp_path), "missing") is None
+    assert find_source(str(tmp_path), ".upload-abc") is None
+    assert VARIANT_NAME_RE.match("photo_large.webp") is None
@@ -0,0 +1,55 @@
+import asyncio
+import ipaddress
+
+import httpx
+import pytest
+from fastapi import APIRouter, Depends, FastAPI
+
+from app.services import internal_access
+
+# /stats/*, /metrics 는 플래그가 켜져 있고 허용 대역에서 온 요청만 통과해야 합니다.
+app = FastAPI()
+internal = APIRouter(dependencies=[Depends(internal_access.require_internal)])
+
+
+@internal.get("/stats/example")
+def example_stats():
+    return {"hits": 1}
+
+
+app.include_router(internal)
+
+
+def get(host: str):
+    async def main():
+        transport = httpx.ASGITransport(app=app, client=(host, 50000))
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.get("/stats/example")
+
+    return asyncio.run(main())
+
+
+@pytest.fixture
+def enabled(monkeypatch):
+    monkeypatch.setattr(internal_access, "INTERNAL_ENDPOINTS_ENABLED", True)
+    monkeypatch.setattr(internal_access, "INTERNAL_ALLOWED_NETWORKS",
+                        [ipaddress.ip_network("127.0.0.1/32"), ipaddress.ip_network("10.42.0.0/16")])
+
+
+def test_disabled_by_default_even_from_loopback(monkeypatch):
+    monkeypatch.setattr(internal_access, "INTERNAL_ENDPOINTS_ENABLED", False)
+    response = get("127.0.0.1")
+    assert response.status_code == 404
+    assert response.json() == {"detail": "Not Found"}
+
+
+def test_allowed_networks_pass(enabled):
+    assert get("127.0.0.1").json() == {"hits": 1}
+    assert get("10.42.3.7").status_code == 200
+
+
+def test_other_addresses_look_like_missing_route(enabled):
+    for host in ("10.43.0.1", "203.0.113.9", "::1", "testclient"):
+        response = get(host)
+        assert response.status_code == 404, host
+        assert response.json() == {"detail": "Not Found"}
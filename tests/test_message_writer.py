@@ -0,0 +1,37 @@
+from datetime import timedelta
+
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+from app.db import SQLALCHEMY_DATABASE_URL
+from app.services.message_writer import MessageWriter
+from tests.conftest import requires_db, run_async
+
+pytestmark = requires_db
+
+
+def test_created_at_comes_from_the_database_clock(seed):
+    # 컨테이너와 DB 타임존이 다른 상황: 세션 타임존을 크게 틀어 둔 별도 엔진 (풀을 공유하지 않음)
+    engine = create_engine(SQLALCHEMY_DATABASE_URL, poolclass=NullPool)
+    event.listen(engine, "connect", lambda conn, _: conn.cursor().execute("SET time_zone = '+14:00'"))
+    me, _ = seed.user()
+    other, _ = seed.user()
+    room_id = seed.room(me, other)
+
+    async def scenario():
+        writer = MessageWriter(session_factory=sessionmaker(bind=engine))
+        await writer.start()
+        try:
+            return await writer.write(room_id, me, "hello")
+        finally:
+            await writer.stop()
+
+    saved = run_async(scenario())
+    with engine.connect() as conn:
+        now = conn.execute(text("SELECT NOW()")).scalar()
+        stored = conn.execute(text("SELECT created_at FROM messages WHERE id = :mid"), {"mid": saved["id"]}).scalar()
+    engine.dispose()
+
+    assert stored == saved["created_at"]
+    assert abs(now - saved["created_at"]) < timedelta(seconds=30)
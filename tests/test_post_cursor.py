@@ -0,0 +1,18 @@
+import pytest
+from fastapi import HTTPException
+
+from app.services.controllers import encode_post_cursor, decode_post_cursor
+
+
+def test_before_cursor_round_trip():
+    assert decode_post_cursor(encode_post_cursor(before_id=42)) == (42, None)
+
+
+def test_after_cursor_keeps_direction():
+    assert decode_post_cursor(encode_post_cursor(after_id=42)) == (None, 42)
+
+
+def test_invalid_cursor_is_400():
+    with pytest.raises(HTTPException) as exc_info:
+        decode_post_cursor("not-a-cursor")
+    assert exc_info.value.status_code == 400
@@ -0,0 +1,54 @@
+import logging
+
+from fastapi import APIRouter, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.util import greenlet_spawn
+from starlette.concurrency import run_in_threadpool
+
+from app.services import query_counter
+from app.services.query_counter import ProfiledRoute, count_queries
+
+# 느린 쿼리 로그에 실행한 라우트 이름이 붙는지
+# async 엔진(DB_ASYNC=1)은 SQL 을 greenlet 안에서, 동기 세션(DB_ASYNC=0)은 스레드풀에서 실행하므로 둘 다 봅니다.
+engine = create_engine("sqlite://")
+
+
+def select_one():
+    with engine.connect() as conn:
+        return conn.execute(text("SELECT 1")).scalar()
+
+
+app = FastAPI()
+router = APIRouter(route_class=ProfiledRoute)
+
+
+@router.get("/greenlet")
+async def greenlet_route():
+    with count_queries(profile=True):
+        return {"value": await greenlet_spawn(select_one)}
+
+
+@router.get("/threadpool")
+async def threadpool_route():
+    with count_queries(profile=True):
+        return {"value": await run_in_threadpool(select_one)}
+
+
+app.include_router(router)
+client = TestClient(app)
+
+
+def slow_query_logs(caplog, path):
+    caplog.clear()
+    with caplog.at_level(logging.WARNING, logger=query_counter.__name__):
+        assert client.get(path).json() == {"value": 1}
+    return [record.getMessage() for record in caplog.records if "느린 쿼리" in record.getMessage()]
+
+
+def test_slow_query_log_names_the_route(monkeypatch, caplog):
+    monkeypatch.setattr(query_counter, "SLOW_QUERY_MS", 0)
+    for path, name in (("/greenlet", "greenlet_route"), ("/threadpool", "threadpool_route")):
+        logs = slow_query_logs(caplog, path)
+        assert logs and all(f"[{name}]" in message for message in logs), logs
+
@@ -0,0 +1,80 @@
+from fastapi import Request, Response
+
+from app.db import db_session
+from app.services import controllers
+from app.services.query_counter import count_queries
+from app.services.response_cache import response_cache, post_detail_key
+from app.services.session_cache import session_cache
+from tests.conftest import requires_db, run_async
+
+# 요청 하나가 DB 에 몇 번 왕복하는지 (app/services/query_counter.py)
+# 방/메시지/댓글 수가 늘어도 왕복 수는 그대로여야 합니다.
+
+pytestmark = requires_db
+
+
+def make_request(session_id: str) -> Request:
+    return Request({
+        "type": "http", "method": "GET", "path": "/", "query_string": b"",
+        "headers": [(b"authorization", f"Bearer {session_id}".encode())],
+    })
+
+
+async def count_round_trips(controller, *args, **kwargs) -> int:
+    async with db_session() as db:
+        with count_queries() as stats:
+            await controller(*args, db, **kwargs)
+        return stats.count
+
+
+def test_post_detail_is_one_or_two_round_trips(seed):
+    author_id, session_id = seed.user()
+    post_id = seed.post(author_id)
+    response_cache.delete(post_detail_key(post_id))
+    session_cache.clear()
+
+    async def scenario():
+        request = make_request(session_id)
+        # 세션 조회 + 게시글/작성자/좋아요 여부 조인 한 번
+        cold = await count_round_trips(controllers.get_post_detail_controller, post_id, request)
+        # 세션/본문 캐시가 데워진 뒤에는 내 좋아요 여부만
+        warm = await count_round_trips(controllers.get_post_detail_controller, post_id, request)
+        return cold, warm
+
+    cold, warm = run_async(scenario())
+    assert cold <= 2
+    assert warm == 1
+
+
+def test_chat_list_round_trips_do_not_grow_with_rooms(seed):
+    me, session_id = seed.user()
+    seed.room(me, seed.user()[0], messages=3)
+
+    async def chat_list():
+        return await count_round_trips(controllers.get_chat_list_controller, make_request(session_id), Response())
+
+    session_cache.clear()
+    one_room = run_async(chat_list())
+    for _ in range(4):
+        seed.room(me, seed.user()[0], messages=3)
+    five_rooms = run_async(chat_list())
+
+    # 세션(캐시 hit 이면 생략) + 내 방 id 목록 + room_summary 목록
+    assert five_rooms <= one_room <= 3
+
+
+def test_room_messages_round_trips_do_not_grow_with_messages(seed):
+    me, session_id = seed.user()
+    other, _ = seed.user()
+    small_room = seed.room(me, other, messages=2)
+    big_room = seed.room(me, other, messages=60)
+
+    async def messages(room_id):
+        return await count_round_trips(controllers.get_messages_controller, room_id, make_request(session_id))
+
+    session_cache.clear()
+    small = run_async(messages(small_room))
+    big = run_async(messages(big_room))
+
+    # 세션 + 참여자/워터마크 + 메시지 한 페이지 + 워터마크 올리기
+    assert big <= small <= 4
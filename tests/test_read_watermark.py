@@ -0,0 +1,52 @@
+from sqlalchemy import text
+
+from app.db import db_session
+from app.services.room_summary import advance_read_watermark
+from tests.conftest import requires_db, run_async
+
+pytestmark = requires_db
+
+
+def _watermark(seed, room_id, user_id):
+    with seed.engine.connect() as conn:
+        return conn.execute(text("""
+            SELECT last_read_message_id FROM chat_participants WHERE room_id = :rid AND user_id = :uid
+        """), {"rid": room_id, "uid": user_id}).scalar()
+
+
+def _last_message_id(seed, room_id):
+    with seed.engine.connect() as conn:
+        return conn.execute(text("SELECT MAX(id) FROM messages WHERE room_id = :rid"), {"rid": room_id}).scalar()
+
+
+def _advance(room_id, user_id, message_id):
+    async def scenario():
+        async with db_session() as db:
+            watermark = await advance_read_watermark(db, room_id, user_id, message_id)
+            await db.commit()
+            return watermark
+
+    return run_async(scenario())
+
+
+def test_watermark_is_clamped_to_the_last_message(seed):
+    me, _ = seed.user()
+    other, _ = seed.user()
+    room_id = seed.room(me, other, messages=3)
+    last_id = _last_message_id(seed, room_id)
+
+    assert _advance(room_id, me, 2 ** 62) == last_id
+    assert _watermark(seed, room_id, me) == last_id
+    # 이미 끝까지 읽었으면 더 올라가지 않습니다.
+    assert _advance(room_id, me, 2 ** 62) is None
+
+
+def test_watermark_only_moves_forward(seed):
+    me, _ = seed.user()
+    other, _ = seed.user()
+    room_id = seed.room(me, other, messages=3)
+    last_id = _last_message_id(seed, room_id)
+
+    assert _advance(room_id, me, last_id) == last_id
+    assert _advance(room_id, me, last_id - 1) is None
+    assert _watermark(seed, room_id, me) == last_id
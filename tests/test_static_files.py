@@ -0,0 +1,75 @@
+import os
+
+import pytest
+from PIL import Image
+from starlette.applications import Starlette
+from starlette.routing import Mount
+from starlette.testclient import TestClient
+
+from app.services.image_variants import VariantStaticFiles, variant_generator, VARIANT_DIR_NAME
+from app.services.static_files import ImmutableStaticFiles, IMMUTABLE_CACHE_CONTROL
+
+ORIGINAL = "16aeac7c-a62a-4c29-8233-360641321a05_KakaoTalk_20251229_094540111.png"
+
+
+@pytest.fixture
+def client(tmp_path):
+    Image.new("RGB", (1200, 900), (200, 80, 40)).save(tmp_path / ORIGINAL)
+    os.makedirs(tmp_path / VARIANT_DIR_NAME)
+    app = Starlette(routes=[
+        Mount(f"/images/{VARIANT_DIR_NAME}",
+              VariantStaticFiles(source_dir=str(tmp_path), directory=str(tmp_path / VARIANT_DIR_NAME))),
+        Mount("/images", ImmutableStaticFiles(directory=str(tmp_path))),
+    ])
+    try:
+        yield TestClient(app)
+    finally:
+        variant_generator.shutdown()
+
+
+def test_original_is_immutable_and_revalidates_with_304(client):
+    response = client.get(f"/images/{ORIGINAL}")
+    assert response.status_code == 200
+    assert response.headers["cache-control"] == IMMUTABLE_CACHE_CONTROL
+    etag = response.headers["etag"]
+
+    # 받은 ETag 를 그대로 돌려보내면 본문 없이 304
+    revalidated = client.get(f"/images/{ORIGINAL}", headers={"If-None-Match": etag})
+    assert revalidated.status_code == 304
+    assert revalidated.content == b""
+    assert revalidated.headers["etag"] == etag
+
+    # 약한 비교: W/ 를 붙여 와도 같은 태그
+    weak = client.get(f"/images/{ORIGINAL}", headers={"If-None-Match": f'"other", W/{etag}'})
+    assert weak.status_code == 304
+
+    assert client.get(f"/images/{ORIGINAL}", headers={"If-None-Match": '"other"'}).status_code == 200
+
+
+def test_original_supports_range(client):
+    full = client.get(f"/images/{ORIGINAL}").content
+    response = client.get(f"/images/{ORIGINAL}", headers={"Range": "bytes=0-9"})
+    assert response.status_code == 206
+    assert response.headers["content-range"] == f"bytes 0-9/{len(full)}"
+    assert response.content == full[:10]
+
+
+def test_missing_variant_is_generated_on_first_request(client, tmp_path):
+    stem = ORIGINAL.rsplit(".", 1)[0]
+    url = f"/images/{VARIANT_DIR_NAME}/{stem}_thumb.webp"
+
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "image/webp"
+    assert (tmp_path / VARIANT_DIR_NAME / f"{stem}_thumb.webp").is_file()
+    with Image.open(tmp_path / VARIANT_DIR_NAME / f"{stem}_thumb.webp") as thumb:
+        assert max(thumb.size) == 200
+
+    assert client.get(url, headers={"If-None-Match": response.headers["etag"]}).status_code == 304
+    ranged = client.get(url, headers={"Range": "bytes=0-3"})
+    assert ranged.status_code == 206
+    assert ranged.content == b"RIFF"
+
+
+def test_variant_without_original_is_404(client):
+    assert client.get(f"/images/{VARIANT_DIR_NAME}/missing_thumb.webp").status_code == 404
@@ -0,0 +1,50 @@
+from fastapi import FastAPI, File, UploadFile
+from fastapi.testclient import TestClient
+
+from app.services.images import UploadSizeLimitMiddleware
+
+LIMIT = 4096
+BOUNDARY = "testboundary"
+
+app = FastAPI()
+app.add_middleware(UploadSizeLimitMiddleware, max_bytes=LIMIT)
+
+
+@app.post("/upload")
+async def upload(file: UploadFile = File(...)):
+    return {"size": len(await file.read())}
+
+
+client = TestClient(app)
+
+
+def multipart_body(size: int) -> bytes:
+    return (
+        f"--{BOUNDARY}\r\n"
+        'Content-Disposition: form-data; name="file"; filename="a.png"\r\n'
+        "Content-Type: image/png\r\n\r\n"
+    ).encode() + b"x" * size + f"\r\n--{BOUNDARY}--\r\n".encode()
+
+
+HEADERS = {"Content-Type": f"multipart/form-data; boundary={BOUNDARY}"}
+
+
+def test_small_upload_passes():
+    response = client.post("/upload", content=multipart_body(100), headers=HEADERS)
+    assert response.status_code == 200
+    assert response.json() == {"size": 100}
+
+
+def test_content_length_over_limit_is_413():
+    response = client.post("/upload", content=multipart_body(LIMIT * 2), headers=HEADERS)
+    assert response.status_code == 413
+
+
+def test_chunked_body_over_limit_is_413():
+    # 제너레이터 본문은 Content-Length 없이 Transfer-Encoding: chunked 로 갑니다.
+    def chunks():
+        yield multipart_body(LIMIT * 2)
+
+    response = client.post("/upload", content=chunks(), headers=HEADERS)
+    assert "content-length" not in {k.lower() for k in response.request.headers}
+    assert response.status_code == 413